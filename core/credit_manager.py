@@ -6,15 +6,23 @@ class CreditManager:
     def __init__(self, settings_manager, initial_credits=0):
         self.settings_manager = settings_manager
         self._balance = initial_credits
-        logger.info(f"Initialized with {self._balance} credits.")        
-        # In a real system, credits might be loaded from a persistent store
-        # or linked to a payment system. For now, it's in-memory.
+        # Called with the new balance after every change; the StateJournal hooks in here
+        # so balances survive a crash (the app restores them with set_balance at startup).
+        self.on_balance_changed = None
         logger.info(f"Initialized with {self._balance} credits.")
 
+    def _balance_changed(self):
+        if self.on_balance_changed:
+            try:
+                self.on_balance_changed(self._balance)
+            except Exception as e:
+                logger.error(f"Balance change callback failed: {e}", exc_info=True)
+
     def add_credits(self, amount):
         if amount > 0:
             self._balance += amount
             logger.info(f"Added {amount} credits. New balance: {self._balance}")
+            self._balance_changed()
             return True
         logger.warning(f"Invalid amount to add: {amount}")
         return False
@@ -23,6 +31,7 @@ class CreditManager:
         if amount > 0 and self._balance >= amount:
             self._balance -= amount
             logger.info(f"Deducted {amount} credits. New balance: {self._balance}")
+            self._balance_changed()
             return True
         elif amount <= 0:
             logger.warning(f"Invalid amount to deduct: {amount}")
@@ -41,5 +50,6 @@ class CreditManager:
         if amount >= 0:
             self._balance = amount
             logger.info(f"Balance directly set to: {self._balance}")
+            self._balance_changed()
         else:
             logger.info(f"Cannot set balance to a negative amount: {amount}")
\ No newline at end of file
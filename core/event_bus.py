@@ -0,0 +1,115 @@
+# core/event_bus.py
+import queue
+import time
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger("VideoJukebox.EventBus")
+
+DEFAULT_POLL_MS = 30        # Tk-side drain period; keeps VLC -> UI latency well under a frame or two
+MAX_EVENTS_PER_TICK = 100   # Bound the work done in one after() slice
+
+Event = namedtuple("Event", ["type", "data", "time"])
+
+
+class WorkerMessages:
+    """
+    Base class of the background workers (LibraryScanWorker, LibraryWatcher, MetadataWorker):
+    their thread puts (kind, payload) messages on self.messages and the Tk side polls
+    drain() with after().
+    """
+
+    def __init__(self):
+        self.messages = queue.Queue()
+
+    def drain(self, max_messages=50):
+        """Return up to max_messages queued messages without blocking (call from the Tk thread)."""
+        drained = []
+        while len(drained) < max_messages:
+            try:
+                drained.append(self.messages.get_nowait())
+            except queue.Empty:
+                break
+        return drained
+
+
+class EventBus:
+    """
+    Hands events from foreign threads (libVLC's event thread, workers) to the Tk thread.
+
+    publish() may be called from any thread and only appends a small Event record to a
+    thread-safe queue. On the Tk thread, a dispatcher started with start(tk_widget)
+    drains the queue every DEFAULT_POLL_MS with after() and calls the handlers
+    registered with subscribe(). Handlers therefore always run on the Tk thread and
+    may touch widgets and application state freely.
+
+    Handlers can defer follow-up work with coalesce(key, callback): each key runs at
+    most once after the current batch of events, so a burst of events that each want
+    a UI refresh results in a single refresh.
+    """
+
+    def __init__(self, poll_ms=DEFAULT_POLL_MS):
+        self.poll_ms = poll_ms
+        self._events = queue.SimpleQueue()
+        self._handlers = {}   # event type -> [handler(event)]
+        self._coalesced = {}  # key -> callback, run once after the current batch (insertion order)
+        self._widget = None
+        self._after_id = None
+
+    # --- Any thread ---
+    def publish(self, event_type, **data):
+        self._events.put(Event(event_type, data, time.monotonic()))
+
+    # --- Tk thread ---
+    def subscribe(self, event_type, handler):
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def coalesce(self, key, callback):
+        """Run callback once after the events currently being dispatched (or on the next tick)."""
+        self._coalesced.setdefault(key, callback)
+
+    def start(self, tk_widget):
+        self._widget = tk_widget
+        if self._after_id is None:
+            self._after_id = tk_widget.after(self.poll_ms, self._tick)
+
+    def stop(self):
+        if self._after_id is not None and self._widget is not None:
+            try:
+                self._widget.after_cancel(self._after_id)
+            except Exception:
+                pass # Widget already destroyed
+        self._after_id = None
+
+    def _tick(self):
+        self._after_id = None
+        try:
+            self.dispatch_pending()
+        finally:
+            if self._widget is not None:
+                self._after_id = self._widget.after(self.poll_ms, self._tick)
+
+    def dispatch_pending(self, max_events=MAX_EVENTS_PER_TICK):
+        """Dispatch queued events, then the coalesced callbacks they requested. Returns the event count."""
+        dispatched = 0
+        while dispatched < max_events:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            dispatched += 1
+            for handler in self._handlers.get(event.type, ()):
+                try:
+                    handler(event)
+                except Exception as e:
+                    logger.error(f"Handler for event '{event.type}' failed: {e}", exc_info=True)
+
+        coalesced, self._coalesced = self._coalesced, {} # Re-requests made now run next tick
+        for key, callback in coalesced.items():
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Coalesced callback '{key}' failed: {e}", exc_info=True)
+        if dispatched:
+            logger.debug(f"Dispatched {dispatched} events.")
+        return dispatched
@@ -0,0 +1,258 @@
+# core/library_catalog.py
+import os
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from core.library_scanner import ParallelDirectoryScanner
+
+logger = logging.getLogger("VideoJukebox.LibraryCatalog")
+
+CATALOG_SCHEMA_VERSION = "1"
+
+
+class LibraryCatalog:
+    """
+    Persistent on-disk catalog of the music video directory (SQLite).
+
+    Tracks are keyed by their full path and remember the size/mtime they had when
+    they were last parsed. Every directory also remembers its own mtime, so a
+    rescan only has to stat directories: a directory whose mtime is unchanged
+    cannot have gained, lost or renamed any entries, and its cached rows are reused.
+    Only directories that changed are listed again, changed files are re-parsed and
+    files that disappeared are dropped.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        # A connection is opened per operation so the catalog can be refreshed
+        # from a worker thread without sharing sqlite handles between threads.
+        self._lock = threading.Lock()
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        if not os.path.isdir(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            self._create_schema(conn)
+        logger.info(f"LibraryCatalog opened: {self.db_path}")
+
+    @contextmanager
+    def _connect(self, timeout=5.0):
+        """Open a connection, commit on success, roll back on error and always close it."""
+        conn = sqlite3.connect(self.db_path, timeout=timeout)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _create_schema(self, conn):
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("""CREATE TABLE IF NOT EXISTS directories (
+                            path TEXT PRIMARY KEY,
+                            parent TEXT,
+                            mtime_ns INTEGER)""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS tracks (
+                            path TEXT PRIMARY KEY,
+                            directory TEXT,
+                            size INTEGER,
+                            mtime_ns INTEGER,
+                            artist TEXT,
+                            title TEXT,
+                            genre TEXT)""")
+        conn.execute("CREATE INDEX IF NOT EXISTS tracks_by_directory ON tracks(directory)")
+        # Embedded tags/duration, valid while the file keeps this size and mtime (see MetadataWorker)
+        conn.execute("""CREATE TABLE IF NOT EXISTS metadata (
+                            path TEXT PRIMARY KEY,
+                            size INTEGER,
+                            mtime_ns INTEGER,
+                            title TEXT,
+                            artist TEXT,
+                            genre TEXT,
+                            year INTEGER,
+                            duration_ms INTEGER,
+                            source TEXT)""")
+        # Play history; not a cache, so clear() and rescans keep it
+        conn.execute("""CREATE TABLE IF NOT EXISTS plays (
+                            path TEXT PRIMARY KEY,
+                            play_count INTEGER,
+                            last_played REAL)""")
+        row = conn.execute("SELECT value FROM meta WHERE key='schema_version'").fetchone()
+        if row is None:
+            conn.execute("INSERT INTO meta (key, value) VALUES ('schema_version', ?)", (CATALOG_SCHEMA_VERSION,))
+        elif row[0] != CATALOG_SCHEMA_VERSION:
+            # Old layout: the catalog is only a cache, so start from scratch.
+            logger.warning(f"Catalog schema {row[0]} != {CATALOG_SCHEMA_VERSION}. Clearing catalog.")
+            conn.execute("DELETE FROM directories")
+            conn.execute("DELETE FROM tracks")
+            conn.execute("UPDATE meta SET value=? WHERE key='schema_version'", (CATALOG_SCHEMA_VERSION,))
+
+    def _get_meta(self, conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def refresh(self, root_dir, extensions, parse_func, full=False, scanner=None, cancel_event=None,
+                on_tracks=None, on_progress=None):
+        """
+        Bring the catalog in sync with root_dir and return every catalogued track.
+
+        parse_func(full_path) must return an (artist, title, genre) tuple; it is only
+        called for new or changed files. With full=True every directory is listed
+        again (use it if files were rewritten in place, which does not touch the
+        directory mtime). The directory walk itself is done by a
+        ParallelDirectoryScanner; only the calling thread touches the database.
+
+        on_tracks(list_of_tracks) receives each directory's tracks as soon as that
+        directory is done, and on_progress(dirs_done, dirs_expected, tracks_found)
+        reports progress (dirs_expected is the size of the previous scan, 0 if unknown).
+        Returns a list of dicts with 'path', 'artist', 'title' and 'genre' keys, sorted by path.
+        'meta' holds the cached embedded metadata when it is still valid for the file, else None.
+        If cancel_event is set while scanning, directories already visited stay updated,
+        nothing is dropped and None is returned.
+        """
+        root_dir = os.path.normpath(root_dir)
+        scanner = scanner or ParallelDirectoryScanner()
+        with self._lock, self._connect() as conn:
+            if self._get_meta(conn, "root") != root_dir:
+                logger.info(f"Catalog root changed to '{root_dir}'. Rebuilding catalog.")
+                conn.execute("DELETE FROM directories")
+                conn.execute("DELETE FROM tracks")
+                self._set_meta(conn, "root", root_dir)
+
+            known_dirs = {}      # path -> mtime_ns
+            known_children = {}  # parent path -> [child dir paths]
+            for path, parent, mtime_ns in conn.execute("SELECT path, parent, mtime_ns FROM directories"):
+                known_dirs[path] = mtime_ns
+                known_children.setdefault(parent, []).append(path)
+
+            stats = {"dirs_reused": 0, "dirs_listed": 0, "parsed": 0, "removed": 0}
+            seen_dirs = set()
+            tracks = []
+
+            def process_listing(listing):
+                seen_dirs.add(listing.path)
+                if listing.reused:
+                    # Unchanged directory: its file rows and subdirectories are still valid.
+                    stats["dirs_reused"] += 1
+                else:
+                    stats["dirs_listed"] += 1
+                    self._sync_directory(conn, listing, parse_func, stats)
+                    conn.execute("INSERT OR REPLACE INTO directories (path, parent, mtime_ns) VALUES (?, ?, ?)",
+                                 (listing.path, listing.parent, listing.mtime_ns))
+                dir_tracks = [
+                    {'path': row[0], 'artist': row[1], 'title': row[2], 'genre': row[3], 'meta': self._meta_from_row(row[4:])}
+                    for row in conn.execute(
+                        """SELECT t.path, t.artist, t.title, t.genre,
+                                  m.source, m.title, m.artist, m.genre, m.year, m.duration_ms
+                           FROM tracks t LEFT JOIN metadata m
+                             ON m.path = t.path AND m.size = t.size AND m.mtime_ns = t.mtime_ns
+                           WHERE t.directory=?""", (listing.path,))
+                ]
+                tracks.extend(dir_tracks)
+                if on_tracks and dir_tracks:
+                    on_tracks(dir_tracks)
+                if on_progress:
+                    on_progress(len(seen_dirs), len(known_dirs), len(tracks))
+
+            scanner.scan(root_dir, extensions, known_dirs, known_children,
+                         full=full, cancel_event=cancel_event, on_listing=process_listing)
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info(f"Catalog refresh of '{root_dir}' cancelled after {len(seen_dirs)} directories.")
+                return None
+
+            # Directories that vanished take their tracks with them.
+            for gone in set(known_dirs) - seen_dirs:
+                conn.execute("DELETE FROM metadata WHERE path IN (SELECT path FROM tracks WHERE directory=?)", (gone,))
+                cur = conn.execute("DELETE FROM tracks WHERE directory=?", (gone,))
+                stats["removed"] += cur.rowcount
+                conn.execute("DELETE FROM directories WHERE path=?", (gone,))
+
+        tracks.sort(key=lambda t: t['path'])
+        logger.info(f"Catalog refresh of '{root_dir}': {stats['dirs_reused']} dirs reused, "
+                    f"{stats['dirs_listed']} dirs listed, {stats['parsed']} files parsed, "
+                    f"{stats['removed']} removed. {len(tracks)} tracks catalogued.")
+        return tracks
+
+    def _sync_directory(self, conn, listing, parse_func, stats):
+        """Apply a fresh listing of one changed directory to its track rows."""
+        cached = {
+            path: (size, mtime_ns)
+            for path, size, mtime_ns in conn.execute(
+                "SELECT path, size, mtime_ns FROM tracks WHERE directory=?", (listing.path,))
+        }
+        present = set()
+        for name, size, mtime_ns in listing.files:
+            full_path = os.path.join(listing.path, name)
+            present.add(full_path)
+            if cached.get(full_path) == (size, mtime_ns):
+                continue # Unchanged file, keep the parsed row
+            artist, title, genre = parse_func(full_path)
+            conn.execute("""INSERT OR REPLACE INTO tracks
+                            (path, directory, size, mtime_ns, artist, title, genre)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                         (full_path, listing.path, size, mtime_ns, artist, title, genre))
+            stats["parsed"] += 1
+
+        for gone in set(cached) - present:
+            conn.execute("DELETE FROM tracks WHERE path=?", (gone,))
+            conn.execute("DELETE FROM metadata WHERE path=?", (gone,))
+            stats["removed"] += 1
+
+    @staticmethod
+    def _meta_from_row(row):
+        """(source, title, artist, genre, year, duration_ms) -> meta dict, or None if there is no row."""
+        if row[0] is None:
+            return None
+        meta = {'source': row[0]}
+        for key, value in zip(('title', 'artist', 'genre', 'year', 'duration_ms'), row[1:]):
+            if value is not None:
+                meta[key] = value
+        return meta
+
+    def get_metadata(self, files):
+        """files: [(path, size, mtime_ns)]. Returns {path: meta} for those with a still-valid cached row."""
+        found = {}
+        with self._connect() as conn:
+            for path, size, mtime_ns in files:
+                row = conn.execute("""SELECT source, title, artist, genre, year, duration_ms FROM metadata
+                                      WHERE path=? AND size=? AND mtime_ns=?""", (path, size, mtime_ns)).fetchone()
+                if row is not None:
+                    found[path] = self._meta_from_row(row)
+        return found
+
+    def store_metadata(self, rows):
+        """rows: [(path, size, mtime_ns, meta)]. Files without usable metadata are stored too, so they are not re-read."""
+        with self._connect() as conn:
+            conn.executemany("""INSERT OR REPLACE INTO metadata
+                                  (path, size, mtime_ns, title, artist, genre, year, duration_ms, source)
+                                  VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                             [(path, size, mtime_ns, meta.get('title'), meta.get('artist'), meta.get('genre'),
+                               meta.get('year'), meta.get('duration_ms'), meta.get('source', 'none'))
+                              for path, size, mtime_ns, meta in rows])
+
+    def load_play_stats(self):
+        """Returns {path: (play_count, last_played epoch seconds)}."""
+        with self._connect() as conn:
+            return {path: (count, when) for path, count, when in
+                    conn.execute("SELECT path, play_count, last_played FROM plays")}
+
+    def record_plays(self, plays, timeout=0.1):
+        """
+        plays: [(path, epoch seconds)]. Called from the Tk thread, so it waits at most
+        timeout for a scan's write lock; raises sqlite3.OperationalError if it is busy.
+        """
+        with self._connect(timeout=timeout) as conn:
+            conn.executemany("""INSERT INTO plays (path, play_count, last_played) VALUES (?, 1, ?)
+                                  ON CONFLICT(path) DO UPDATE SET play_count=play_count+1,
+                                                                  last_played=excluded.last_played""", plays)
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM directories")
+            conn.execute("DELETE FROM tracks")
+            conn.execute("DELETE FROM metadata")
+        logger.info("Catalog cleared.")
@@ -0,0 +1,519 @@
+# core/library_index.py
+import os
+import sys
+import mmap
+import bisect
+import struct
+import logging
+from array import array
+from collections.abc import Sequence
+from core.track import Track
+from core.search_index import (SearchIndex, TOKEN_RE, MIN_GRAM_QUERY, INTERSECT_UNTIL, FUZZY_LIMIT, FUZZY_BUDGET_S,
+                               fuzzy_rank, normalize_search_text, search_key, words_match, intersect_smallest_first,
+                               sorted_range_index, range_lookup, _trigrams)
+
+logger = logging.getLogger("VideoJukebox.LibraryIndex")
+
+INDEX_MAGIC = b"VJLIBIDX"
+INDEX_VERSION = 2 # 2: match keys are search_key() (accent-folded), not just casefolded
+# magic, version, track count, string count, trigram keys, token keys, rules fingerprint, then the
+# offsets of the sections (string offsets, string data, records, sorted ids, their rows, hidden flags,
+# trigram table, token table, postings) and the file size
+HEADER = struct.Struct("<8sIIIII8s10Q")
+# One fixed-width record per track, in library order: id, then string ids (path, artist, title, genre,
+# match key search_key(artist, title)), cost (-1: the default cost), year (0: none), duration_ms (-1: none),
+# metadata source string id, reserved. 48 bytes, so the table is also a 6-qword/12-word array.
+RECORD = struct.Struct("<qIIIIIiiiII")
+RECORD_WORDS = RECORD.size // 4
+RECORD_QWORDS = RECORD.size // 8
+W_PATH, W_ARTIST, W_TITLE, W_GENRE, W_MATCH_KEY, W_COST, W_YEAR, W_DURATION, W_SOURCE = range(2, 11)
+NO_STRING = 0xFFFFFFFF
+PENDING_SUFFIX = ".next" # Where a new index goes while the current one cannot be replaced (mapped, on Windows)
+MAX_INT32 = 2**31 - 1
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _little_endian(arr):
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def write_library_index(path, videos, hidden, rules_fingerprint, search_index=None):
+    """
+    Write videos (sorted, in library order) to a binary index file, atomically.
+    hidden: one flag per video, as computed by the music rules with this rules_fingerprint.
+    search_index: a SearchIndex over videos whose postings are reused; built here if None.
+    Safe to call on a worker thread as long as videos and search_index are not being changed.
+    If path cannot be replaced because it is still mapped (Windows), the index is left at
+    path + PENDING_SUFFIX instead and MappedLibraryIndex.open() installs it. Returns the path written.
+    """
+    strings = {}
+
+    def string_id(value):
+        if value is None:
+            return NO_STRING
+        sid = strings.get(value)
+        if sid is None:
+            sid = strings[value] = len(strings)
+        return sid
+
+    records = bytearray(RECORD.size * len(videos))
+    for row, video in enumerate(videos):
+        artist, title = video['artist'], video['title']
+        cost = video.own_cost if isinstance(video, Track) else video.get('cost')
+        duration_ms = video.get('duration_ms')
+        RECORD.pack_into(records, row * RECORD.size, video['id'], string_id(video['path']), string_id(artist),
+                         string_id(title), string_id(video['genre']),
+                         string_id(search_key(artist, title)),
+                         -1 if cost is None else int(cost), int(video.get('year') or 0),
+                         -1 if duration_ms is None else min(int(duration_ms), MAX_INT32),
+                         string_id(video.get('metadata_source')), 0)
+
+    trigrams, tokens = (search_index or SearchIndex(videos)).export_postings(videos)
+    postings = array('i')
+
+    def key_table(table):
+        entries = array('I')
+        for key in sorted(table):
+            ids = table[key]
+            entries.extend((string_id(key), len(postings), len(ids)))
+            postings.extend(ids)
+        return entries
+
+    trigram_table, token_table = key_table(trigrams), key_table(tokens)
+
+    string_offsets, string_data = array('I', [0]), bytearray()
+    for value in strings: # Insertion order == string id
+        string_data += value.encode("utf-8", "surrogateescape")
+        string_offsets.append(len(string_data))
+
+    by_id = sorted(range(len(videos)), key=lambda row: videos[row]['id'])
+    sections = [_little_endian(string_offsets), bytes(string_data), bytes(records),
+                _little_endian(array('q', (videos[row]['id'] for row in by_id))),
+                _little_endian(array('i', by_id)),
+                bytes(1 if flag else 0 for flag in hidden),
+                _little_endian(trigram_table), _little_endian(token_table), _little_endian(postings)]
+    offsets, position = [], HEADER.size
+    for data in sections:
+        position = _align(position)
+        offsets.append(position)
+        position += len(data)
+    header = HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(videos), len(strings), len(trigrams), len(tokens),
+                         rules_fingerprint, *offsets, position)
+
+    index_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(index_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        written = HEADER.size
+        for offset, data in zip(offsets, sections):
+            f.write(b"\0" * (offset - written))
+            f.write(data)
+            written = offset + len(data)
+        f.flush()
+        os.fsync(f.fileno())
+    pending_path = path + PENDING_SUFFIX
+    try:
+        os.replace(tmp_path, path)
+    except PermissionError: # Windows: this process still has the old file mapped
+        os.replace(tmp_path, pending_path)
+        logger.info(f"Library index is in use; new index left at '{pending_path}' for the next load.")
+        return pending_path
+    if os.path.exists(pending_path):
+        os.remove(pending_path) # Older than what was just written
+    logger.info(f"Library index written: {len(videos)} tracks, {len(strings)} strings, {position} bytes.")
+    return path
+
+
+class MappedTrackList(Sequence):
+    """
+    Read-only list of the tracks at some rows of a MappedLibraryIndex. A track is built on
+    first access (then cached by the index), so a 100k-row view costs nothing until its rows
+    are shown. Views check 'immutable' to keep it as it is instead of copying it.
+    """
+    __slots__ = ('index', 'rows')
+    immutable = True
+
+    def __init__(self, index, rows):
+        self.index = index
+        self.rows = rows # range or array of record rows: ascending (library order), or best first for fuzzy results
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return MappedTrackList(self.index, self.rows[i])
+        return self.index.track(self.rows[i])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        track = self.index.track
+        for row in self.rows:
+            yield track(row)
+
+    def __repr__(self):
+        return f"MappedTrackList({len(self.rows)} tracks)"
+
+
+class _KeyView:
+    """The sorted keys of a postings table as a lazily decoded sequence, for bisect."""
+    __slots__ = ('index', 'table')
+
+    def __init__(self, index, table):
+        self.index = index
+        self.table = table
+
+    def __len__(self):
+        return len(self.table) // 3
+
+    def __getitem__(self, i):
+        return self.index.string(self.table[3 * i])
+
+
+class MappedLibraryIndex:
+    """
+    A library index file (see write_library_index) opened with mmap, for an instant cold start.
+
+    Opening only checks the header and wraps the sections in memoryviews: no track, string
+    or posting is read until it is used. Tracks are built on first access and cached, so
+    showing the first screen of a 100k-track library builds a few dozen of them.
+
+    Besides get_by_id() and the track lists it has the query side of SearchIndex (search,
+    search_tokens, filter, match_key, is_hidden, set_hidden), answered from the stored
+    postings, so MusicLibrary can use it as its search index until a scan replaces it.
+    Results are MappedTrackLists in library order. It is read-only: adding or removing
+    tracks means building a real library (MusicLibrary does that when it has to).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        if len(mm) < HEADER.size:
+            raise ValueError("file too short")
+        (magic, version, self.track_count, string_count, trigram_count, token_count, self.rules_fingerprint,
+         *offsets) = HEADER.unpack_from(mm, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"not a version {INDEX_VERSION} library index")
+        (strings_at, string_data_at, records_at, ids_at, id_rows_at, hidden_at,
+         trigrams_at, tokens_at, postings_at, size) = offsets
+        if size != len(mm):
+            raise ValueError(f"size {len(mm)} != {size} (truncated write?)")
+        n = self.track_count
+        view = memoryview(mm)
+        self._string_offsets = view[strings_at:strings_at + 4 * (string_count + 1)].cast('I')
+        self._string_data_at = string_data_at
+        records = view[records_at:records_at + RECORD.size * n]
+        self._words = records.cast('I')
+        self._ints = records.cast('i')
+        self._qwords = records.cast('q')
+        self._ids = view[ids_at:ids_at + 8 * n].cast('q')
+        self._id_rows = view[id_rows_at:id_rows_at + 4 * n].cast('i')
+        self._hidden = bytearray(view[hidden_at:hidden_at + n]) # Own copy: set_hidden() replaces it
+        self._visible = None # Visible rows, computed on first use
+        self._trigram_table = view[trigrams_at:trigrams_at + 12 * trigram_count].cast('I')
+        self._token_table = view[tokens_at:tokens_at + 12 * token_count].cast('I')
+        self._postings = view[postings_at:size].cast('i')
+        self._tracks = {} # row -> Track, built on first access
+        self._field_indexes = {} # Genre map and cost/year range indexes for search_query(), built on first use
+
+    @classmethod
+    def open(cls, path):
+        """
+        Open path, or return None (logged) if it is missing or not a usable index. A pending
+        index (see write_library_index) is moved into place first, so close() a previous
+        index of the same path before calling this.
+        """
+        if not path:
+            return None
+        pending_path = path + PENDING_SUFFIX
+        if os.path.isfile(pending_path):
+            try:
+                os.replace(pending_path, path)
+            except OSError as e:
+                logger.warning(f"Could not install '{pending_path}' ({e}); using it where it is.")
+                path = pending_path
+        if not os.path.isfile(path):
+            return None
+        if sys.byteorder != "little":
+            logger.info("Library index is little-endian only; not used on this platform.")
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Ignoring library index '{path}': {e}")
+            return None
+
+    def __len__(self):
+        return self.track_count
+
+    def close(self):
+        """
+        Unmap the file (Windows cannot replace a mapped file). Tracks already built stay
+        valid; anything that still has to read the file raises ValueError afterwards.
+        """
+        if self._mm is None:
+            return
+        for view in (self._string_offsets, self._words, self._ints, self._qwords, self._ids, self._id_rows,
+                     self._trigram_table, self._token_table, self._postings):
+            view.release()
+        try:
+            self._mm.close()
+        except BufferError as e: # A postings slice is still referenced: the mapping goes when it does
+            logger.debug(f"Library index mapping not closed yet: {e}")
+        self._mm = None
+
+    # --- Records ---
+    def string(self, sid):
+        start = self._string_data_at + self._string_offsets[sid]
+        end = self._string_data_at + self._string_offsets[sid + 1]
+        return str(self._mm[start:end], "utf-8", "surrogateescape")
+
+    def _field(self, row, word):
+        return self.string(self._words[row * RECORD_WORDS + word])
+
+    def track(self, row):
+        track = self._tracks.get(row)
+        if track is None:
+            base = row * RECORD_WORDS
+            words, ints = self._words, self._ints
+            cost = ints[base + W_COST]
+            track = Track(self._qwords[row * RECORD_QWORDS], self.string(words[base + W_ARTIST]),
+                          self.string(words[base + W_TITLE]), self.string(words[base + W_PATH]),
+                          self.string(words[base + W_GENRE]), None if cost < 0 else cost)
+            if ints[base + W_YEAR]:
+                track['year'] = ints[base + W_YEAR]
+            if ints[base + W_DURATION] >= 0:
+                track['duration_ms'] = ints[base + W_DURATION]
+            if words[base + W_SOURCE] != NO_STRING:
+                track['metadata_source'] = self.string(words[base + W_SOURCE])
+            self._tracks[row] = track
+        return track
+
+    def row_of_id(self, track_id):
+        ids = self._ids
+        i = bisect.bisect_left(ids, track_id)
+        if i < len(ids) and ids[i] == track_id:
+            return self._id_rows[i]
+        return None
+
+    def get_by_id(self, track_id):
+        row = self.row_of_id(track_id)
+        return None if row is None else self.track(row)
+
+    def tracks(self, rows=None):
+        return MappedTrackList(self, range(self.track_count) if rows is None else rows)
+
+    def visible_tracks(self):
+        if self._visible is None:
+            if not self.hidden_count():
+                self._visible = range(self.track_count)
+            else:
+                self._visible = array('i', (row for row, flag in enumerate(self._hidden) if not flag))
+        return self.tracks(self._visible)
+
+    def distinct(self, field, include_hidden=False):
+        """Sorted distinct values of 'artist' or 'genre' over the visible (or all) tracks."""
+        word = {'artist': W_ARTIST, 'genre': W_GENRE}[field]
+        column = self._words[word::RECORD_WORDS]
+        if include_hidden or not self.hidden_count():
+            sids = set(column)
+        else:
+            sids = {sid for sid, flag in zip(column, self._hidden) if not flag}
+        return sorted(self.string(sid) for sid in sids)
+
+    def column_rows(self):
+        """(id, own cost or None, duration_ms, genre, artist) per track, for TrackColumns, without building tracks."""
+        names = {}
+
+        def name(sid):
+            value = names.get(sid)
+            if value is None:
+                value = names[sid] = self.string(sid)
+            return value
+
+        words, ints = self._words, self._ints
+        for row, track_id in enumerate(self._qwords[::RECORD_QWORDS]):
+            base = row * RECORD_WORDS
+            cost, duration_ms = ints[base + W_COST], ints[base + W_DURATION]
+            yield (track_id, None if cost < 0 else cost, max(duration_ms, 0),
+                   name(words[base + W_GENRE]), name(words[base + W_ARTIST]))
+
+    # --- Visibility (music rules) ---
+    def hidden_flags(self):
+        return self._hidden
+
+    def hidden_count(self):
+        return self._hidden.count(1)
+
+    def is_hidden(self, video):
+        row = self.row_of_id(video['id'])
+        return row is not None and self._hidden[row] == 1
+
+    def set_hidden(self, is_hidden, rules_fingerprint=None):
+        """
+        Recompute the hidden flags. is_hidden gets a dict with 'artist', 'genre' and 'path'
+        (what RuleEngine.is_blocked reads) rather than a Track, so no track is built.
+        Returns the number of hidden tracks.
+        """
+        hidden = bytearray(self.track_count)
+        for row in range(self.track_count):
+            if is_hidden({'artist': self._field(row, W_ARTIST), 'genre': self._field(row, W_GENRE),
+                          'path': self._field(row, W_PATH)}):
+                hidden[row] = 1
+        self._hidden = hidden
+        self._visible = None
+        self.rules_fingerprint = rules_fingerprint
+        return hidden.count(1)
+
+    # --- Search (same semantics as SearchIndex) ---
+    def _postings_for(self, table, key):
+        keys = _KeyView(self, table)
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return self._postings_at(table, i)
+        return None
+
+    def _postings_at(self, table, i):
+        start, count = table[3 * i + 1], table[3 * i + 2]
+        return self._postings[start:start + count]
+
+    def _matching_rows(self, rows, needle):
+        """The rows whose match key contains needle. UTF-8 is compared as bytes: no decoding per row."""
+        needle = needle.encode("utf-8", "surrogateescape")
+        mm, words, offsets, base = self._mm, self._words, self._string_offsets, self._string_data_at
+        for row in rows:
+            sid = words[row * RECORD_WORDS + W_MATCH_KEY]
+            if needle in mm[base + offsets[sid]:base + offsets[sid + 1]]:
+                yield row
+
+    def _results(self, rows, needle=None):
+        hidden = self._hidden
+        if needle is not None:
+            rows = self._matching_rows(rows, needle)
+        return self.tracks(array('i', sorted(row for row in rows if not hidden[row])))
+
+    def search(self, query):
+        if not query.strip():
+            return self.visible_tracks()
+        needle = normalize_search_text(query)
+        if not needle:
+            return self.tracks(array('i'))
+        if len(needle) < MIN_GRAM_QUERY:
+            return self._results(range(self.track_count), needle)
+        return self._results(self._trigram_candidates(needle), needle)
+
+    def _trigram_candidates(self, needle):
+        postings = []
+        for gram in _trigrams(needle):
+            p = self._postings_for(self._trigram_table, gram)
+            if p is None:
+                return set()
+            postings.append(p)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for p in postings[1:]:
+            if len(candidates) <= INTERSECT_UNTIL or len(p) > 16 * len(candidates):
+                break
+            candidates.intersection_update(p)
+        return candidates
+
+    def search_query(self, query):
+        """SearchIndex.search_query() over the mapped rows: same lookups, keys read from the file."""
+        lookups = []
+        for field, words in query.fields:
+            if field == 'genre':
+                lookups.append(self._genre_rows(words))
+            else:
+                lookups.extend(self._prefix_postings(word) for word in words)
+        for field, low, high in query.ranges:
+            lookups.append(range_lookup(self._range_index(field), low, high))
+        if len(query.text) >= MIN_GRAM_QUERY:
+            lookups.append(self._trigram_candidates(query.text))
+        candidates = intersect_smallest_first(lookups) if lookups else range(self.track_count)
+        checks = query.key_checks()
+        return self._results(row for row in candidates
+                             if query.matches_key(self._field(row, W_MATCH_KEY), checks))
+
+    def _genre_rows(self, words):
+        genres = self._field_indexes.get('genre')
+        if genres is None:
+            genres, normalized = {}, {} # Normalize each distinct genre string once
+            for row, sid in enumerate(self._words[W_GENRE::RECORD_WORDS]):
+                genre = normalized.get(sid)
+                if genre is None:
+                    genre = normalized[sid] = normalize_search_text(self.string(sid))
+                genres.setdefault(genre, []).append(row)
+            self._field_indexes['genre'] = genres
+        rows = set()
+        for genre, genre_rows in genres.items():
+            if words_match(words, genre):
+                rows.update(genre_rows)
+        return rows
+
+    def _range_index(self, field):
+        default_cost = Track.default_cost
+        key = (field, default_cost) if field == 'cost' else field # Rows without a cost follow the setting
+        range_index = self._field_indexes.get(key)
+        if range_index is None:
+            if field == 'cost':
+                values = ((row, default_cost if cost < 0 else cost)
+                          for row, cost in enumerate(self._ints[W_COST::RECORD_WORDS]))
+            else:
+                values = ((row, year) for row, year in enumerate(self._ints[W_YEAR::RECORD_WORDS]) if year)
+            range_index = self._field_indexes[key] = sorted_range_index(values)
+        return range_index
+
+    def search_fuzzy(self, query, limit=FUZZY_LIMIT, budget_s=FUZZY_BUDGET_S):
+        needle = normalize_search_text(query)
+        if len(needle) < MIN_GRAM_QUERY:
+            return self.tracks(array('i'))
+        hidden = self._hidden
+        rows = fuzzy_rank(needle, lambda gram: self._postings_for(self._trigram_table, gram),
+                          lambda row: self._field(row, W_MATCH_KEY), lambda row: not hidden[row],
+                          lambda row: row, limit, budget_s)
+        return self.tracks(array('i', rows))
+
+    def search_tokens(self, query):
+        words = TOKEN_RE.findall(normalize_search_text(query))
+        if not words:
+            return self.search(query)
+        candidates = None
+        for i, word in enumerate(words):
+            if i == len(words) - 1:
+                rows = self._prefix_postings(word)
+            else:
+                rows = set(self._postings_for(self._token_table, word) or ())
+            candidates = rows if candidates is None else candidates & rows
+            if not candidates:
+                return self.tracks(array('i'))
+        return self._results(candidates)
+
+    def _prefix_postings(self, prefix):
+        keys = _KeyView(self, self._token_table)
+        rows = set()
+        i = bisect.bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix):
+            rows.update(self._postings_at(self._token_table, i))
+            i += 1
+        return rows
+
+    def match_key(self, video):
+        row = self.row_of_id(video['id'])
+        return self._field(row, W_MATCH_KEY) if row is not None else search_key(video['artist'], video['title'])
+
+    def filter(self, videos, query):
+        if not query.strip():
+            return videos if isinstance(videos, MappedTrackList) else list(videos)
+        needle = normalize_search_text(query)
+        if not needle:
+            return self.tracks(array('i'))
+        if isinstance(videos, MappedTrackList) and videos.index is self:
+            return self.tracks(array('i', self._matching_rows(videos.rows, needle)))
+        return [video for video in videos if needle in self.match_key(video)]
@@ -0,0 +1,84 @@
+# core/library_scan_worker.py
+import threading
+import time
+import logging
+from core.event_bus import WorkerMessages
+
+logger = logging.getLogger("VideoJukebox.LibraryScanWorker")
+
+SCAN_BATCH_SIZE = 250          # Videos per "batch" message
+SCAN_PROGRESS_INTERVAL_S = 0.1 # Minimum time between "progress" messages
+
+
+class LibraryScanWorker(WorkerMessages):
+    """
+    Runs MusicLibrary.collect_videos() on a background thread so the Tk loop never
+    blocks on the filesystem. The worker never touches the library or any widget;
+    it only posts messages to a thread-safe queue, which the Tk side drains with
+    after() through drain():
+
+        ("batch", [videos])                          - newly found videos (unsorted)
+        ("progress", (dirs_done, dirs_expected, n))  - dirs_expected is 0 when unknown
+        ("done", ([videos], search_index))           - complete, sorted video list and its index
+        ("cancelled", None)
+        ("error", message)
+    """
+
+    def __init__(self, music_library, full=False, batch_size=SCAN_BATCH_SIZE):
+        self.music_library = music_library
+        self.full = full
+        self.batch_size = batch_size
+        super().__init__()
+        self.cancel_event = threading.Event()
+        self._pending_batch = []
+        self._last_progress_time = 0.0
+        self._thread = threading.Thread(target=self._run, name="LibraryScanWorker", daemon=True)
+
+    def start(self):
+        logger.info(f"Starting background library scan (full={self.full}).")
+        self._thread.start()
+
+    def cancel(self):
+        if self.is_running():
+            logger.info("Background library scan cancel requested.")
+            self.cancel_event.set()
+
+    def is_running(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        try:
+            videos = self.music_library.collect_videos(full=self.full,
+                                                       on_batch=self._on_batch,
+                                                       on_progress=self._on_progress,
+                                                       cancel_event=self.cancel_event)
+            self._flush_batch()
+            if videos is None:
+                self.messages.put(("cancelled", None))
+            else:
+                # Index here too, so installing the result on the Tk thread is just an assignment
+                search_index = self.music_library.build_search_index(videos)
+                # Saved before the Tk side gets (and starts changing) them; the next start maps this file
+                self.music_library.save_index(videos, search_index)
+                self.messages.put(("done", (videos, search_index)))
+        except Exception as e:
+            logger.error(f"Background library scan failed: {e}", exc_info=True)
+            self.messages.put(("error", str(e)))
+
+    def _on_batch(self, videos):
+        self._pending_batch.extend(videos)
+        if len(self._pending_batch) >= self.batch_size:
+            self._flush_batch()
+
+    def _flush_batch(self):
+        if self._pending_batch:
+            self.messages.put(("batch", self._pending_batch))
+            self._pending_batch = []
+
+    def _on_progress(self, dirs_done, dirs_expected, videos_found):
+        now = time.monotonic()
+        if now - self._last_progress_time >= SCAN_PROGRESS_INTERVAL_S:
+            self._last_progress_time = now
+            # Flush what we have so the results fill in at the same pace as the progress bar
+            self._flush_batch()
+            self.messages.put(("progress", (dirs_done, dirs_expected, videos_found)))
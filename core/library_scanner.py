@@ -0,0 +1,113 @@
+# core/library_scanner.py
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger("VideoJukebox.LibraryScanner")
+
+DEFAULT_SCAN_WORKERS = 8
+
+
+class DirectoryListing:
+    """Result of visiting one directory. 'files' is None when the cached listing was reused."""
+    __slots__ = ('path', 'parent', 'mtime_ns', 'files', 'subdirs')
+
+    def __init__(self, path, parent, mtime_ns, files, subdirs):
+        self.path = path
+        self.parent = parent
+        self.mtime_ns = mtime_ns
+        self.files = files      # sorted [(name, size, mtime_ns)] or None if reused
+        self.subdirs = subdirs  # sorted [full dir path]
+
+    @property
+    def reused(self):
+        return self.files is None
+
+
+class ParallelDirectoryScanner:
+    """
+    Walks a directory tree with os.scandir, fanning subdirectories out to a bounded
+    thread pool. On network/cloud-sync folders each listdir is a round trip, so
+    listing several directories at once hides most of that latency.
+
+    Results are merged in sorted path order, so the outcome does not depend on the
+    order in which the workers finish.
+    """
+
+    def __init__(self, max_workers=DEFAULT_SCAN_WORKERS):
+        try:
+            max_workers = int(max_workers)
+        except (TypeError, ValueError):
+            max_workers = DEFAULT_SCAN_WORKERS
+        self.max_workers = max(1, max_workers)
+
+    def scan(self, root_dir, extensions, known_dirs=None, known_children=None, full=False,
+             cancel_event=None, on_listing=None):
+        """
+        Visit every directory below root_dir and return a sorted list of DirectoryListing.
+
+        known_dirs maps directory path -> mtime_ns from a previous scan and
+        known_children maps directory path -> [subdirectory paths]. A directory whose
+        mtime still matches is only stat'ed; its cached subdirectories are followed
+        without listing it (unless full=True).
+        on_listing(listing) is called on the calling thread as each directory completes
+        (in completion order), so results can be consumed before the walk finishes.
+        """
+        root_dir = os.path.normpath(root_dir)
+        known_dirs = known_dirs or {}
+        known_children = known_children or {}
+        listings = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="LibraryScan") as pool:
+            in_flight = {pool.submit(self._visit, root_dir, None, extensions, known_dirs, known_children, full)}
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    listing = future.result()
+                    if listing is None:
+                        continue
+                    listings.append(listing)
+                    if on_listing:
+                        on_listing(listing)
+                    if cancel_event is not None and cancel_event.is_set():
+                        continue # Let running visits drain, but do not fan out further
+                    for child in listing.subdirs:
+                        in_flight.add(pool.submit(self._visit, child, listing.path, extensions,
+                                                  known_dirs, known_children, full))
+
+        listings.sort(key=lambda l: l.path)
+        logger.debug(f"Scanned {len(listings)} directories under '{root_dir}' with {self.max_workers} workers.")
+        return listings
+
+    def _visit(self, directory, parent, extensions, known_dirs, known_children, full):
+        """Runs on a worker thread. Must not touch anything but the filesystem."""
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError as e:
+            logger.warning(f"Cannot stat directory '{directory}': {e}")
+            return None
+
+        if not full and known_dirs.get(directory) == mtime_ns:
+            return DirectoryListing(directory, parent, mtime_ns, None, sorted(known_children.get(directory, [])))
+
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(os.path.normpath(entry.path))
+                        elif entry.name.lower().endswith(extensions):
+                            st = entry.stat()
+                            files.append((entry.name, st.st_size, st.st_mtime_ns))
+                    except OSError as e:
+                        logger.warning(f"Skipping unreadable entry '{entry.path}': {e}")
+        except OSError as e:
+            # Keep whatever was catalogued for it rather than dropping a folder on a network hiccup.
+            logger.warning(f"Cannot list directory '{directory}': {e}. Keeping cached entries.")
+            return DirectoryListing(directory, parent, known_dirs.get(directory), None,
+                                    sorted(known_children.get(directory, [])))
+        files.sort()
+        subdirs.sort()
+        return DirectoryListing(directory, parent, mtime_ns, files, subdirs)
@@ -0,0 +1,280 @@
+# core/library_watcher.py
+import os
+import sys
+import select
+import struct
+import threading
+import time
+import logging
+from core.event_bus import WorkerMessages
+
+logger = logging.getLogger("VideoJukebox.LibraryWatcher")
+
+DEFAULT_DEBOUNCE_S = 1.5        # Quiet time before a burst of events is delivered
+MAX_BATCH_LATENCY_S = 10.0      # Deliver at least this often during a long copy
+DEFAULT_POLL_INTERVAL_S = 10.0  # Directory mtime polling period (fallback backend)
+
+# inotify constants (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT_HEADER = struct.Struct("iIII") # wd, mask, cookie, len
+
+
+class _InotifyBackend:
+    """Recursive inotify watches via ctypes (Linux only). Raises OSError if inotify is unusable."""
+
+    def __init__(self, root_dir, extensions, record):
+        import ctypes
+        import ctypes.util
+        self.extensions = extensions
+        self.record = record
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._ctypes = ctypes
+        self.wd_to_dir = {}
+        try:
+            self._add_tree(root_dir, report_files=False)
+        except BaseException:
+            self.close() # e.g. ENOSPC: the caller falls back to polling, don't leak the inotify fd
+            raise
+        logger.info(f"inotify watching {len(self.wd_to_dir)} directories under '{root_dir}'.")
+
+    def _add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            # ENOSPC means fs.inotify.max_user_watches is exhausted: let the caller fall back to polling
+            raise OSError(self._ctypes.get_errno(), f"inotify_add_watch failed for '{directory}'")
+        self.wd_to_dir[wd] = directory
+
+    def _add_tree(self, top, report_files):
+        for root, _dirs, files in os.walk(top):
+            self._add_watch(root)
+            if report_files: # A directory moved or copied in: its files are new to us
+                for name in files:
+                    if name.lower().endswith(self.extensions):
+                        self.record("added", os.path.join(root, name))
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, name_len = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_len].rstrip(b"\0"))
+            offset += name_len
+            self._handle_event(wd, mask, name)
+
+    def _handle_event(self, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            self.record("overflow", None)
+            return
+        if mask & IN_IGNORED:
+            self.wd_to_dir.pop(wd, None)
+            return
+        directory = self.wd_to_dir.get(wd)
+        if directory is None or not name:
+            return # DELETE_SELF/MOVE_SELF are covered by the parent's DELETE/MOVED_FROM
+        path = os.path.join(directory, name)
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                try:
+                    self._add_tree(path, report_files=True)
+                except OSError as e:
+                    logger.warning(f"Could not watch new directory '{path}': {e}")
+                    self.record("overflow", None)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.record("removed", path)
+            return
+        if not name.lower().endswith(self.extensions):
+            return
+        # IN_CREATE is ignored for files: the copy is still in progress. CLOSE_WRITE marks it complete.
+        if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+            self.record("added", path)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            self.record("removed", path)
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class _PollingBackend:
+    """Portable fallback: stat every known directory and re-list only the ones whose mtime changed."""
+
+    def __init__(self, root_dir, extensions, record, poll_interval_s):
+        self.extensions = extensions
+        self.record = record
+        self.poll_interval_s = poll_interval_s
+        self.dirs = {} # path -> (mtime_ns, set(video file names), set(subdir paths))
+        self._add_tree(root_dir, report_files=False)
+        self._next_poll = time.monotonic() + poll_interval_s
+        logger.info(f"Polling {len(self.dirs)} directories under '{root_dir}' every {poll_interval_s}s.")
+
+    def _list(self, directory):
+        files, subdirs = set(), set()
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.add(os.path.normpath(entry.path))
+                    elif entry.name.lower().endswith(self.extensions):
+                        files.add(entry.name)
+                except OSError:
+                    continue
+        return files, subdirs
+
+    def _add_tree(self, top, report_files):
+        pending = [top]
+        while pending:
+            directory = pending.pop()
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+                files, subdirs = self._list(directory)
+            except OSError as e:
+                logger.warning(f"Cannot poll directory '{directory}': {e}")
+                continue
+            self.dirs[directory] = (mtime_ns, files, subdirs)
+            if report_files:
+                for name in files:
+                    self.record("added", os.path.join(directory, name))
+            pending.extend(subdirs)
+
+    def _drop_tree(self, top):
+        prefix = top + os.sep
+        for directory in [d for d in self.dirs if d == top or d.startswith(prefix)]:
+            del self.dirs[directory]
+
+    def wait(self, timeout):
+        delay = self._next_poll - time.monotonic()
+        if delay > 0:
+            time.sleep(min(delay, timeout))
+            return
+        self._next_poll = time.monotonic() + self.poll_interval_s
+        self.poll()
+
+    def poll(self):
+        for directory, (old_mtime, old_files, old_subdirs) in list(self.dirs.items()):
+            if directory not in self.dirs:
+                continue # Dropped earlier in this pass together with its parent
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+                if mtime_ns == old_mtime:
+                    continue
+                files, subdirs = self._list(directory)
+            except OSError:
+                continue # Reported as removed by its parent's listing
+            self.dirs[directory] = (mtime_ns, files, subdirs)
+            for name in files - old_files:
+                self.record("added", os.path.join(directory, name))
+            for name in old_files - files:
+                self.record("removed", os.path.join(directory, name))
+            for gone in old_subdirs - subdirs:
+                self._drop_tree(gone)
+                self.record("removed", gone)
+            for new_dir in subdirs - old_subdirs:
+                self._add_tree(new_dir, report_files=True)
+
+    def close(self):
+        self.dirs.clear()
+
+
+class LibraryWatcher(WorkerMessages):
+    """
+    Keeps the library in sync with the music video directory without rescans.
+
+    Uses inotify on Linux and falls back to directory-mtime polling elsewhere (or
+    when inotify is unavailable, e.g. on network mounts or when the watch limit is
+    hit). Events are debounced: a burst such as a 500-file copy is delivered as one
+    ("changes", (added_files, removed_paths)) message once the folder has been quiet
+    for debounce_s. removed_paths may name directories, meaning everything below them.
+    An ("overflow", None) message means events were lost and a rescan is needed.
+
+    Like LibraryScanWorker, it runs on its own thread and only posts to a queue that
+    the Tk side drains with drain().
+    """
+
+    def __init__(self, root_dir, extensions, mode="auto", debounce_s=DEFAULT_DEBOUNCE_S,
+                 poll_interval_s=DEFAULT_POLL_INTERVAL_S):
+        self.root_dir = os.path.normpath(root_dir)
+        self.extensions = extensions
+        self.mode = mode
+        self.debounce_s = debounce_s
+        self.poll_interval_s = poll_interval_s
+        super().__init__()
+        self._stop_event = threading.Event()
+        self._pending = {}          # path -> "added" | "removed" (last event wins)
+        self._first_event_time = None
+        self._last_event_time = None
+        self._backend = None
+        self._thread = threading.Thread(target=self._run, name="LibraryWatcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def is_running(self):
+        return self._thread.is_alive()
+
+    def _create_backend(self):
+        if self.mode in ("auto", "inotify") and sys.platform.startswith("linux"):
+            try:
+                return _InotifyBackend(self.root_dir, self.extensions, self._record)
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotify unavailable ({e}). Falling back to polling.")
+        return _PollingBackend(self.root_dir, self.extensions, self._record, self.poll_interval_s)
+
+    def _record(self, kind, path):
+        if kind == "overflow":
+            self.messages.put(("overflow", None))
+            return
+        self._pending[path] = kind
+        now = time.monotonic()
+        self._last_event_time = now
+        if self._first_event_time is None:
+            self._first_event_time = now
+
+    def _flush_if_due(self):
+        if not self._pending:
+            return
+        now = time.monotonic()
+        if now - self._last_event_time < self.debounce_s and now - self._first_event_time < MAX_BATCH_LATENCY_S:
+            return
+        added = sorted(p for p, kind in self._pending.items() if kind == "added")
+        removed = sorted(p for p, kind in self._pending.items() if kind == "removed")
+        self._pending = {}
+        self._first_event_time = self._last_event_time = None
+        logger.info(f"Library change batch: {len(added)} added, {len(removed)} removed.")
+        self.messages.put(("changes", (added, removed)))
+
+    def _run(self):
+        try:
+            self._backend = self._create_backend()
+            while not self._stop_event.is_set():
+                self._backend.wait(timeout=min(self.debounce_s / 2, 0.5))
+                self._flush_if_due()
+        except Exception as e:
+            logger.error(f"Library watcher stopped: {e}", exc_info=True)
+        finally:
+            if self._backend:
+                self._backend.close()
+            logger.info("Library watcher stopped.")
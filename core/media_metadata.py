@@ -0,0 +1,346 @@
+# core/media_metadata.py
+import io
+import os
+import re
+import time
+import struct
+
+# Everything here runs in MetadataWorker's child processes: keep it stdlib-only and
+# free of logging/Tk so the module is cheap to import there. vlc is only imported
+# lazily, for the fallback.
+
+MP4_EXTENSIONS = ('.mp4', '.m4v', '.mov')
+MATROSKA_EXTENSIONS = ('.mkv', '.webm')
+MAX_BOX_READ = 8 * 1024 * 1024  # Larger metadata boxes (e.g. huge cover art) are skipped
+VLC_PARSE_TIMEOUT_MS = 5000
+
+META_FIELDS = ('title', 'artist', 'genre', 'year', 'duration_ms')
+YEAR_RE = re.compile(r"(1[89]\d\d|20\d\d)")
+
+# ID3v1 genre list, used by the MP4 'gnre' atom (1-based index)
+ID3_GENRES = (
+    "Blues", "Classic Rock", "Country", "Dance", "Disco", "Funk", "Grunge", "Hip-Hop", "Jazz", "Metal",
+    "New Age", "Oldies", "Other", "Pop", "R&B", "Rap", "Reggae", "Rock", "Techno", "Industrial",
+    "Alternative", "Ska", "Death Metal", "Pranks", "Soundtrack", "Euro-Techno", "Ambient", "Trip-Hop",
+    "Vocal", "Jazz+Funk", "Fusion", "Trance", "Classical", "Instrumental", "Acid", "House", "Game",
+    "Sound Clip", "Gospel", "Noise", "AlternRock", "Bass", "Soul", "Punk", "Space", "Meditative",
+    "Instrumental Pop", "Instrumental Rock", "Ethnic", "Gothic", "Darkwave", "Techno-Industrial",
+    "Electronic", "Pop-Folk", "Eurodance", "Dream", "Southern Rock", "Comedy", "Cult", "Gangsta", "Top 40",
+    "Christian Rap", "Pop/Funk", "Jungle", "Native American", "Cabaret", "New Wave", "Psychedelic", "Rave",
+    "Showtunes", "Trailer", "Lo-Fi", "Tribal", "Acid Punk", "Acid Jazz", "Polka", "Retro", "Musical",
+    "Rock & Roll", "Hard Rock",
+)
+
+
+def read_metadata(path):
+    """
+    Read embedded tags and duration from a video file.
+
+    Returns a dict with the META_FIELDS that were found plus 'source' ("mp4", "matroska",
+    "vlc" or "none"). MP4/QuickTime atoms and Matroska EBML headers are read directly
+    (a few small reads, no decoding); other containers, and files the readers cannot
+    make sense of, go through libVLC's parser if python-vlc is available.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    meta = {}
+    try:
+        if ext in MP4_EXTENSIONS:
+            meta = _read_mp4(path)
+            meta['source'] = 'mp4'
+        elif ext in MATROSKA_EXTENSIONS:
+            meta = _read_matroska(path)
+            meta['source'] = 'matroska'
+    except (OSError, ValueError, EOFError, struct.error):
+        meta = {}
+    if meta.get('duration_ms') is None:
+        vlc_meta = _read_with_vlc(path)
+        if vlc_meta:
+            for key, value in meta.items(): # Keep tags the direct reader did find
+                vlc_meta.setdefault(key, value)
+            meta = vlc_meta
+    meta.setdefault('source', 'none')
+    return {key: value for key, value in meta.items() if value not in (None, "")}
+
+
+def _year(text):
+    match = YEAR_RE.search(text or "")
+    return int(match.group(1)) if match else None
+
+
+# --- MP4 / QuickTime ---
+MP4_TEXT_ATOMS = {b'\xa9nam': 'title', b'\xa9ART': 'artist', b'aART': 'artist', b'\xa9gen': 'genre', b'\xa9day': 'year'}
+
+
+def _iter_boxes(f, start, end):
+    """Yield (type, payload_start, box_end) for the boxes laid out between start and end."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header_len = 8
+        if size == 1: # 64-bit size follows
+            size = struct.unpack(">Q", f.read(8))[0]
+            header_len = 16
+        elif size == 0: # Extends to the end of the enclosing box/file
+            size = end - pos
+        if size < header_len:
+            return # Corrupt
+        yield kind, pos + header_len, min(pos + size, end)
+        pos += size
+
+
+def _read_mp4(path):
+    meta = {}
+    with open(path, 'rb') as f:
+        file_end = f.seek(0, io.SEEK_END)
+        for kind, start, end in _iter_boxes(f, 0, file_end):
+            if kind == b'moov': # Often after the media data: _iter_boxes seeks over mdat
+                _read_moov(f, start, end, meta)
+                break
+    return meta
+
+
+def _read_moov(f, start, end, meta):
+    for kind, child_start, child_end in _iter_boxes(f, start, end):
+        if kind == b'mvhd':
+            f.seek(child_start)
+            data = f.read(min(child_end - child_start, 32))
+            if data[0] == 1:
+                timescale, duration = struct.unpack(">IQ", data[20:32])
+            else:
+                timescale, duration = struct.unpack(">II", data[12:20])
+            if timescale:
+                meta['duration_ms'] = duration * 1000 // timescale
+        elif kind == b'udta' and child_end - child_start <= MAX_BOX_READ:
+            f.seek(child_start)
+            udta = io.BytesIO(f.read(child_end - child_start))
+            _read_udta(udta, 0, child_end - child_start, meta)
+
+
+def _read_udta(f, start, end, meta):
+    for kind, child_start, child_end in _iter_boxes(f, start, end):
+        if kind == b'meta':
+            f.seek(child_start + 4)
+            # ISO 'meta' is a full box (4 bytes version/flags); QuickTime's is not
+            offset = 0 if f.read(4) == b'hdlr' else 4
+            for item_kind, item_start, item_end in _iter_boxes(f, child_start + offset, child_end):
+                if item_kind == b'ilst':
+                    _read_ilst(f, item_start, item_end, meta)
+        elif kind in MP4_TEXT_ATOMS and child_end - child_start > 4:
+            # QuickTime user data text: 16-bit length, 16-bit language, text
+            f.seek(child_start)
+            length, _language = struct.unpack(">HH", f.read(4))
+            _set_text(meta, MP4_TEXT_ATOMS[kind], f.read(min(length, child_end - child_start - 4)))
+
+
+def _read_ilst(f, start, end, meta):
+    for kind, item_start, item_end in _iter_boxes(f, start, end):
+        if kind not in MP4_TEXT_ATOMS and kind != b'gnre':
+            continue
+        for data_kind, data_start, data_end in _iter_boxes(f, item_start, item_end):
+            if data_kind != b'data' or data_end - data_start < 8:
+                continue
+            f.seek(data_start + 8) # Skip type indicator and locale
+            payload = f.read(data_end - data_start - 8)
+            if kind == b'gnre':
+                if len(payload) >= 2 and 'genre' not in meta:
+                    index = struct.unpack(">H", payload[:2])[0]
+                    if 1 <= index <= len(ID3_GENRES):
+                        meta['genre'] = ID3_GENRES[index - 1]
+            else:
+                _set_text(meta, MP4_TEXT_ATOMS[kind], payload)
+            break
+
+
+def _set_text(meta, field, raw):
+    text = raw.decode('utf-8', errors='replace').strip('\x00').strip()
+    if not text or field in meta:
+        return
+    meta[field] = _year(text) if field == 'year' else text
+
+
+# --- Matroska / WebM (EBML) ---
+EBML_HEADER = 0x1A45DFA3
+MKV_SEGMENT = 0x18538067
+MKV_SEEK_HEAD, MKV_SEEK, MKV_SEEK_ID, MKV_SEEK_POSITION = 0x114D9B74, 0x4DBB, 0x53AB, 0x53AC
+MKV_INFO, MKV_TIMESTAMP_SCALE, MKV_DURATION, MKV_TITLE = 0x1549A966, 0x2AD7B1, 0x4489, 0x7BA9
+MKV_TAGS, MKV_TAG, MKV_SIMPLE_TAG, MKV_TAG_NAME, MKV_TAG_STRING = 0x1254C367, 0x7373, 0x67C8, 0x45A3, 0x4487
+MKV_CLUSTER = 0x1F43B675
+MKV_TAG_FIELDS = {'TITLE': 'title', 'ARTIST': 'artist', 'GENRE': 'genre',
+                  'DATE_RELEASED': 'year', 'DATE_RECORDED': 'year', 'DATE': 'year'}
+
+
+def _read_vint(f, keep_marker):
+    first = f.read(1)
+    if not first:
+        raise EOFError
+    value, length, mask = first[0], 1, 0x80
+    while length <= 8 and not value & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("invalid EBML variable-length integer")
+    if not keep_marker:
+        value &= mask - 1
+    rest = f.read(length - 1)
+    if len(rest) < length - 1:
+        raise EOFError
+    for byte in rest:
+        value = (value << 8) | byte
+    unknown_size = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, unknown_size
+
+
+def _iter_elements(f, start, end):
+    """Yield (element_id, data_start, data_end) for the EBML elements between start and end."""
+    pos = start
+    while pos < end:
+        f.seek(pos)
+        try:
+            element_id, _ = _read_vint(f, keep_marker=True)
+            size, unknown_size = _read_vint(f, keep_marker=False)
+        except EOFError:
+            return
+        data_start = f.tell()
+        data_end = end if unknown_size else min(data_start + size, end)
+        yield element_id, data_start, data_end
+        if unknown_size:
+            return # Only the segment is allowed an unknown size in practice; its children follow inline
+        pos = data_end
+
+
+def _read_element_bytes(f, start, end):
+    f.seek(start)
+    return f.read(end - start)
+
+
+def _read_matroska(path):
+    meta = {}
+    with open(path, 'rb') as f:
+        file_end = f.seek(0, io.SEEK_END)
+        elements = _iter_elements(f, 0, file_end)
+        header = next(elements, None)
+        if header is None or header[0] != EBML_HEADER:
+            raise ValueError("not an EBML file")
+        segment = next(elements, None)
+        if segment is None or segment[0] != MKV_SEGMENT:
+            raise ValueError("no Matroska segment")
+        segment_start, segment_end = segment[1], segment[2]
+
+        seek_positions, seen = {}, set()
+        for element_id, start, end in _iter_elements(f, segment_start, segment_end):
+            if element_id == MKV_CLUSTER:
+                break # Media data: anything else we need is reached through the SeekHead
+            seen.add(element_id)
+            if element_id == MKV_SEEK_HEAD:
+                seek_positions.update(_read_seek_head(f, start, end, segment_start))
+            elif element_id in (MKV_INFO, MKV_TAGS):
+                _read_matroska_element(f, element_id, start, end, meta)
+        for element_id in (MKV_INFO, MKV_TAGS):
+            position = seek_positions.get(element_id)
+            if element_id not in seen and position is not None and position < file_end:
+                for found_id, start, end in _iter_elements(f, position, file_end):
+                    if found_id == element_id:
+                        _read_matroska_element(f, element_id, start, end, meta)
+                    break
+    return meta
+
+
+def _read_seek_head(f, start, end, segment_start):
+    positions = {}
+    buf = io.BytesIO(_read_element_bytes(f, start, end))
+    for element_id, seek_start, seek_end in _iter_elements(buf, 0, end - start):
+        if element_id != MKV_SEEK:
+            continue
+        target_id = position = None
+        for child_id, child_start, child_end in _iter_elements(buf, seek_start, seek_end):
+            data = _read_element_bytes(buf, child_start, child_end)
+            if child_id == MKV_SEEK_ID:
+                target_id = int.from_bytes(data, 'big')
+            elif child_id == MKV_SEEK_POSITION:
+                position = int.from_bytes(data, 'big')
+        if target_id is not None and position is not None:
+            positions[target_id] = segment_start + position
+    return positions
+
+
+def _read_matroska_element(f, element_id, start, end, meta):
+    if end - start > MAX_BOX_READ:
+        return
+    buf = io.BytesIO(_read_element_bytes(f, start, end))
+    if element_id == MKV_INFO:
+        _read_matroska_info(buf, end - start, meta)
+    else:
+        _read_matroska_tags(buf, end - start, meta)
+
+
+def _read_matroska_info(buf, length, meta):
+    timestamp_scale, duration = 1000000, None
+    for element_id, start, end in _iter_elements(buf, 0, length):
+        data = _read_element_bytes(buf, start, end)
+        if element_id == MKV_TIMESTAMP_SCALE:
+            timestamp_scale = int.from_bytes(data, 'big') or timestamp_scale
+        elif element_id == MKV_DURATION and len(data) in (4, 8):
+            duration = struct.unpack(">f" if len(data) == 4 else ">d", data)[0]
+        elif element_id == MKV_TITLE:
+            _set_text(meta, 'title', data)
+    if duration is not None:
+        meta['duration_ms'] = int(duration * timestamp_scale / 1000000)
+
+
+def _read_matroska_tags(buf, length, meta):
+    for tag_id, tag_start, tag_end in _iter_elements(buf, 0, length):
+        if tag_id != MKV_TAG:
+            continue
+        for child_id, child_start, child_end in _iter_elements(buf, tag_start, tag_end):
+            if child_id != MKV_SIMPLE_TAG:
+                continue
+            name = value = None
+            for simple_id, simple_start, simple_end in _iter_elements(buf, child_start, child_end):
+                if simple_id == MKV_TAG_NAME:
+                    name = _read_element_bytes(buf, simple_start, simple_end).decode('utf-8', errors='replace')
+                elif simple_id == MKV_TAG_STRING:
+                    value = _read_element_bytes(buf, simple_start, simple_end)
+            field = MKV_TAG_FIELDS.get((name or "").upper())
+            if field and value is not None:
+                _set_text(meta, field, value)
+
+
+# --- libVLC fallback ---
+_vlc_instance = None
+
+
+def _read_with_vlc(path):
+    """Parse with libVLC (any container it supports). Returns a meta dict or None."""
+    global _vlc_instance
+    try:
+        import vlc
+        if _vlc_instance is None:
+            _vlc_instance = vlc.Instance("--quiet", "--no-video", "--no-audio")
+        media = _vlc_instance.media_new_path(path)
+    except Exception:
+        return None
+    try:
+        if media.parse_with_options(vlc.MediaParseFlag.local, VLC_PARSE_TIMEOUT_MS) != 0:
+            return None
+        deadline = time.monotonic() + VLC_PARSE_TIMEOUT_MS / 1000.0
+        while media.get_parsed_status() == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if media.get_parsed_status() != vlc.MediaParsedStatus.done:
+            return None
+        title = media.get_meta(vlc.Meta.Title)
+        if title == os.path.basename(path): # libVLC falls back to the file name
+            title = None
+        duration_ms = media.get_duration()
+        return {
+            'title': title,
+            'artist': media.get_meta(vlc.Meta.Artist),
+            'genre': media.get_meta(vlc.Meta.Genre),
+            'year': _year(media.get_meta(vlc.Meta.Date)),
+            'duration_ms': duration_ms if duration_ms and duration_ms > 0 else None,
+            'source': 'vlc',
+        }
+    except Exception:
+        return None
+    finally:
+        media.release()
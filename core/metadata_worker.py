@@ -0,0 +1,121 @@
+# core/metadata_worker.py
+import os
+import queue
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from core.media_metadata import read_metadata
+from core.event_bus import WorkerMessages
+
+logger = logging.getLogger("VideoJukebox.MetadataWorker")
+
+DEFAULT_METADATA_PROCESSES = 2  # Header reads are I/O bound; two processes keep a disk busy without hogging the CPU
+METADATA_BATCH_SIZE = 64        # Files submitted (and results posted/stored) per round
+
+
+class MetadataWorker(WorkerMessages):
+    """
+    Reads embedded tags and durations (core.media_metadata) for library files off the Tk thread.
+
+    enqueue(paths) may be called at any time. A background thread stats each file,
+    looks it up in the LibraryCatalog metadata cache by (path, size, mtime) and sends
+    only the misses to a process pool, so every file is read once until it changes.
+    Results are stored in the catalog and posted to a queue that the Tk side drains
+    with drain():
+
+        ("metadata", [(path, meta), ...])  - meta as returned by read_metadata()
+    """
+
+    def __init__(self, catalog, max_processes=DEFAULT_METADATA_PROCESSES, batch_size=METADATA_BATCH_SIZE):
+        self.catalog = catalog
+        try:
+            self.max_processes = max(1, int(max_processes))
+        except (TypeError, ValueError):
+            self.max_processes = DEFAULT_METADATA_PROCESSES
+        self.batch_size = batch_size
+        super().__init__()
+        self._requests = queue.Queue()
+        self._stop_event = threading.Event()
+        self._unstored = [] # Rows the catalog was too busy to take (a scan holds its write lock)
+        self._executor = None
+        self._thread = threading.Thread(target=self._run, name="MetadataWorker", daemon=True)
+
+    def start(self):
+        logger.info(f"Starting metadata worker ({self.max_processes} processes).")
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._requests.put(None) # Wake the thread
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def is_running(self):
+        return self._thread.is_alive()
+
+    def enqueue(self, paths):
+        paths = list(paths)
+        if paths:
+            self._requests.put(paths)
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                paths = self._requests.get()
+                if paths is None:
+                    break
+                for i in range(0, len(paths), self.batch_size):
+                    if self._stop_event.is_set():
+                        break
+                    self._process_batch(paths[i:i + self.batch_size])
+        except Exception as e:
+            logger.error(f"Metadata worker failed: {e}", exc_info=True)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _process_batch(self, paths):
+        files = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue # Gone already
+            files.append((path, st.st_size, st.st_mtime_ns))
+        try:
+            cached = self.catalog.get_metadata(files)
+        except sqlite3.Error as e:
+            logger.warning(f"Metadata cache lookup failed: {e}")
+            cached = {}
+        results = list(cached.items())
+        missing = [f for f in files if f[0] not in cached]
+
+        if missing:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_processes)
+            futures = {self._executor.submit(read_metadata, path): (path, size, mtime_ns)
+                       for path, size, mtime_ns in missing}
+            for future in as_completed(futures):
+                if self._stop_event.is_set():
+                    return
+                path, size, mtime_ns = futures[future]
+                try:
+                    meta = future.result()
+                except Exception as e:
+                    logger.debug(f"Metadata read failed for {path}: {e}")
+                    meta = {'source': 'none'}
+                self._unstored.append((path, size, mtime_ns, meta))
+                results.append((path, meta))
+            self._store()
+
+        if results:
+            self.messages.put(("metadata", results))
+        logger.debug(f"Metadata batch: {len(cached)} cached, {len(missing)} read.")
+
+    def _store(self):
+        try:
+            self.catalog.store_metadata(self._unstored)
+            self._unstored = []
+        except sqlite3.Error as e:
+            logger.info(f"Metadata cache busy ({e}); keeping {len(self._unstored)} rows for the next batch.")
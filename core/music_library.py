@@ -2,86 +2,539 @@
 import os
 import re # For parsing filenames
 import logging
+import bisect
+import sqlite3
+import hashlib
+import time
+from core.library_catalog import LibraryCatalog
+from core.library_scanner import ParallelDirectoryScanner, DEFAULT_SCAN_WORKERS
+from core.search_index import SearchIndex, normalize_search_text
+from core.query_parser import parse_query
+from core.rule_engine import RuleEngine, RULE_SETTINGS
+from core.track import Track, ReadOnlyList
+from core.track_columns import TrackColumns
+from core.library_index import MappedLibraryIndex, write_library_index
+
+SUPPORTED_FORMATS = ('.mp4', '.mkv', '.avi', '.mov', '.webm', '.flv') # Add more if needed
+
+
+def parse_video_filename(full_path):
+    """
+    Simple parsing: "Artist - Title.ext" -> (artist, title, genre)
+    More complex parsing might involve looking for NFO files or embedded metadata
+    """
+    filename_no_ext = os.path.splitext(os.path.basename(full_path))[0]
+    parts = re.split(r'\s+-\s+', filename_no_ext, 1)
+    artist = parts[0].strip() if len(parts) > 0 else "Unknown Artist"
+    title = parts[1].strip() if len(parts) > 1 else filename_no_ext.strip()
+    genre = "Unknown" # Placeholder, could come from folder structure or NFO
+    return artist, title, genre
+
+
+def canonical_path(path):
+    """The normalized form of a video path used as the library's primary key."""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def track_id_for_path(path):
+    """Stable track id: a 63-bit hash of the canonical path, the same on every scan and run."""
+    digest = hashlib.blake2b(os.fsencode(canonical_path(path)), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+
+def video_sort_key(video):
+    # Library order: by artist then title, case-insensitive
+    return (video['artist'].lower(), video['title'].lower())
+
 
 class MusicLibrary:
     def __init__(self, settings_manager):
         self.settings_manager = settings_manager
-        self.videos = []
+        self.all_videos = [] # Every catalogued video, blocked ones included (sorted)
+        self.videos = []     # The visible view: all_videos minus what the music rules block
+        self._videos_by_id = {} # Track id -> video, see get_by_id()/get_by_path()
+        self.catalog = None # LibraryCatalog, opened on first scan
+        self.search_index = SearchIndex() # Token/trigram index over self.videos
+        self._rules = None # Compiled RuleEngine, rebuilt only when the rule settings change
+        self._rules_source = None
+        self._columns = None # TrackColumns over all_videos, built on first use (see get_columns)
+        self._play_stats = None # path -> (play_count, last_played), loaded from the catalog on first use
+        self._unsaved_plays = [] # (path, when) the catalog was too busy to take
+        self._mapped = None # MappedLibraryIndex loaded at startup, until a scan installs a real library
+        self._index_dirty = False # The library changed since the index file was written
         # Get a logger instance specifically for this class
         self.logger = logging.getLogger("VideoJukebox.MusicLibrary") # Store as self.logger
         self.logger.info("MusicLibrary initialized.") # Example log
         
-    def scan_videos(self):
-        self.videos = []
+    def scan_videos(self, full=False):
+        """
+        Refresh the library from the persistent catalog. Only directories whose mtime
+        changed are listed again and only new/changed files are re-parsed, so a warm
+        start costs one stat per directory. Pass full=True to force a complete re-list.
+        Blocks until done; the UI uses LibraryScanWorker to run collect_videos() instead.
+        """
+        videos = self.collect_videos(full=full)
+        if videos is not None:
+            self.set_videos(videos)
+
+    def collect_videos(self, full=False, on_batch=None, on_progress=None, cancel_event=None):
+        """
+        Build the sorted video list (blocked tracks included; set_videos() applies the
+        music rules) without installing it, so it can run on a worker thread.
+        on_batch(list_of_videos) receives videos as each directory
+        completes and on_progress(dirs_done, dirs_expected, videos_found) reports progress.
+        Returns None if cancel_event was set before the scan finished.
+        """
         music_dir = self.settings_manager.get("music_video_directory")
         if not music_dir or not os.path.isdir(music_dir):
             print(f"Music video directory not set or invalid: {music_dir}")
-            return
+            return []
+
+        default_cost = self.settings_manager.get("default_credit_cost", 1)
+        videos = []
 
-        blocked_artists = [a.lower() for a in self.settings_manager.get("blocked_artists", [])]
-        blocked_genres = [g.lower() for g in self.settings_manager.get("blocked_genres", [])]
-        blocked_tracks_paths = self.settings_manager.get("blocked_tracks", [])
-
-
-        supported_formats = ('.mp4', '.mkv', '.avi', '.mov', '.webm', '.flv') # Add more if needed
-
-        for root, _, files in os.walk(music_dir):
-            for file in files:
-                if file.lower().endswith(supported_formats):
-                    full_path = os.path.join(root, file)
-                    
-                    # Simple parsing: "Artist - Title.ext"
-                    # More complex parsing might involve looking for NFO files or embedded metadata
-                    filename_no_ext = os.path.splitext(file)[0]
-                    parts = re.split(r'\s+-\s+', filename_no_ext, 1)
-                    artist = parts[0].strip() if len(parts) > 0 else "Unknown Artist"
-                    title = parts[1].strip() if len(parts) > 1 else filename_no_ext.strip()
-                    genre = "Unknown" # Placeholder, could come from folder structure or NFO
-
-                    # Apply rules
-                    if artist.lower() in blocked_artists:
-                        self.logger.debug(f"Skipping blocked artist: {artist}")
-                        continue
-                    if genre.lower() in blocked_genres: # Requires genre detection
-                        self.logger.debug(f"Skipping blocked genre: {genre}")
-                        continue
-                    if full_path in blocked_tracks_paths:
-                        self.logger.debug(f"Skipping blocked track: {full_path}")
-                        continue
-
-                    self.videos.append({
-                        'artist': artist,
-                        'title': title,
-                        'path': full_path,
-                        'genre': genre, # Add genre if you parse it
-                        'cost': self.settings_manager.get("default_credit_cost", 1) # Add default cost
-                    })
-        print(f"Found {len(self.videos)} videos.")
-        self.logger.info(f"Scan complete. Found {len(self.videos)} videos.") # Use self.logger
+        def add_entries(entries):
+            batch = self._build_videos(entries, default_cost)
+            videos.extend(batch)
+            if on_batch and batch:
+                on_batch(batch)
+
+        def report_progress(dirs_done, dirs_expected, _tracks_found):
+            if on_progress:
+                on_progress(dirs_done, dirs_expected, len(videos))
+
+        scanner = ParallelDirectoryScanner(self.settings_manager.get("scan_worker_count", DEFAULT_SCAN_WORKERS))
+        catalog = self._get_catalog()
+        if catalog:
+            catalogued_tracks = catalog.refresh(music_dir, SUPPORTED_FORMATS, parse_video_filename,
+                                                full=full, scanner=scanner, cancel_event=cancel_event,
+                                                on_tracks=add_entries, on_progress=report_progress)
+        else:
+            catalogued_tracks = self._scan_without_catalog(music_dir, scanner, cancel_event,
+                                                           add_entries, report_progress)
+        if catalogued_tracks is None:
+            self.logger.info(f"Scan cancelled after {len(videos)} videos.")
+            return None
+
+        print(f"Found {len(videos)} videos.")
+        self.logger.info(f"Scan complete. Found {len(videos)} videos.") # Use self.logger
         # Sort videos, e.g., by artist then title
-        self.videos.sort(key=lambda x: (x['artist'].lower(), x['title'].lower()))
-        
+        videos.sort(key=video_sort_key)
+        return videos
+
+    def build_search_index(self, videos):
+        """Build a SearchIndex for a video list. Safe to call on a worker thread."""
+        return SearchIndex(videos)
+
+    def _rule_settings(self):
+        return tuple(tuple(self.settings_manager.get(key, [])) for key in RULE_SETTINGS)
+
+    def get_rules(self):
+        """The compiled music rules; recompiled only when the rule settings have changed."""
+        source = self._rule_settings()
+        if self._rules is None or source != self._rules_source:
+            self._rules = RuleEngine(*source)
+            self._rules_source = source
+            self.logger.info(f"Compiled music rules: {len(self._rules.blocked_artists)} artists, "
+                             f"{len(self._rules.blocked_genres)} genres, {len(self._rules.blocked_tracks)} tracks, "
+                             f"{len(self._rules.path_patterns)} path patterns.")
+        return self._rules
+
+    def apply_rules(self):
+        """
+        Re-evaluate the music rules over the in-memory catalog: updates the search index's
+        visibility bitmap and the visible list. No disk access, so rule edits apply at once.
+        Returns the number of hidden videos.
+        """
+        rules = self.get_rules()
+        mapped = self._mapped
+        if mapped is not None:
+            fingerprint = rules.fingerprint()
+            if mapped.rules_fingerprint == fingerprint:
+                hidden_count = mapped.hidden_count() # The flags stored in the index are still valid
+            else:
+                hidden_count = mapped.set_hidden(rules.is_blocked, fingerprint)
+            self.videos = mapped.visible_tracks()
+            if self._columns is not None:
+                self._columns.set_blocked(mapped.hidden_flags())
+        else:
+            hidden_count = self.search_index.set_hidden(rules.is_blocked)
+            is_hidden = self.search_index.is_hidden
+            self.videos = [video for video in self.all_videos if not is_hidden(video)] if hidden_count else list(self.all_videos)
+            if self._columns is not None:
+                self._columns.set_blocked(is_hidden(video) for video in self.all_videos)
+        self.logger.info(f"Music rules applied: {hidden_count} of {len(self.all_videos)} videos hidden.")
+        return hidden_count
+
+    def is_visible(self, video):
+        return not self.search_index.is_hidden(video)
+
+    def _build_videos(self, entries, default_cost):
+        """Turn catalog entries into Track records. Blocking is applied later, as a view (see apply_rules)."""
+        Track.default_cost = default_cost # Shared by every track without a cost of its own
+        videos = []
+        for entry in entries:
+            artist, title, genre, full_path = entry['artist'], entry['title'], entry['genre'], entry['path']
+            video = Track(track_id_for_path(full_path), artist, title, full_path, genre)
+            if entry.get('meta'):
+                self._merge_metadata(video, entry['meta'])
+            videos.append(video)
+        return videos
+
+    @staticmethod
+    def _merge_metadata(video, meta):
+        """Fold embedded metadata (see core.media_metadata) into a video. Returns True if artist/title changed."""
+        video['metadata_source'] = meta.get('source', 'none')
+        for key in ('year', 'duration_ms'):
+            if key in meta:
+                video[key] = meta[key]
+        if meta.get('genre'):
+            video['genre'] = meta['genre']
+        # "Artist - Title" file names are curated and win; tags only name files without that
+        # pattern (parse_video_filename then returns the bare file name for both fields).
+        if video['artist'] == video['title'] and (meta.get('artist') or meta.get('title')):
+            video['artist'] = meta.get('artist') or "Unknown Artist"
+            video['title'] = meta.get('title') or video['title']
+            return True
+        return False
+
+    def paths_missing_metadata(self):
+        """Paths of catalogued videos that have no embedded metadata cached yet."""
+        return [video['path'] for video in self.all_videos if 'metadata_source' not in video]
+
+    def apply_metadata(self, results):
+        """
+        Merge a batch of (path, meta) results from MetadataWorker into the library.
+        Returns True if the visible library changed (names or visibility), i.e. views need a refresh.
+        """
+        self._materialize()
+        self._index_dirty = True
+        renamed = genre_changed = False
+        for path, meta in results:
+            video = self.get_by_path(path)
+            if video is None:
+                continue # Deleted or rescanned meanwhile
+            old_genre = video['genre']
+            if self._merge_metadata(video, meta):
+                self.search_index.remove(video) # Re-index under the new name
+                self.search_index.add(video)
+                renamed = True
+            genre_changed = genre_changed or video['genre'] != old_genre
+            if self._columns is not None:
+                self._columns.update_track(video)
+        self.search_index.invalidate_field_indexes() # Genres and years may have changed
+        if renamed:
+            self.all_videos.sort(key=video_sort_key)
+            self._columns = None # Row order changed
+        if renamed or (genre_changed and self.get_rules().blocked_genres):
+            self.apply_rules()
+            return True
+        return False
+
+    def apply_file_changes(self, added_paths, removed_paths):
+        """
+        Incrementally apply a batch of filesystem changes (from LibraryWatcher) without a rescan.
+        removed_paths may name directories, which removes everything below them. A path that
+        is "added" but already in the library (file rewritten) replaces its old entry.
+        Returns the visible (added_videos, removed_videos).
+        """
+        self._materialize()
+        self._index_dirty = True
+        replaced = set(removed_paths)
+        replaced.update(added_paths)
+        removed_dir_prefixes = tuple(p.rstrip(os.sep) + os.sep for p in removed_paths)
+        kept, removed_videos = [], []
+        for video in self.all_videos:
+            path = video['path']
+            if path in replaced or (removed_dir_prefixes and path.startswith(removed_dir_prefixes)):
+                removed_videos.append(video)
+            else:
+                kept.append(video)
+
+        entries = []
+        for path in added_paths:
+            if path.lower().endswith(SUPPORTED_FORMATS) and os.path.isfile(path):
+                artist, title, genre = parse_video_filename(path)
+                entries.append({'path': path, 'artist': artist, 'title': title, 'genre': genre})
+        added_videos = self._build_videos(entries, self.settings_manager.get("default_credit_cost", 1))
+
+        visible_removed = [video for video in removed_videos if self.is_visible(video)] # Before removal
+        for video in removed_videos:
+            self.search_index.remove(video)
+            self._videos_by_id.pop(video['id'], None)
+        rules = self.get_rules()
+        self.search_index.add_all(added_videos, rules.is_blocked if rules else None)
+        self._videos_by_id.update((video['id'], video) for video in added_videos)
+
+        if len(added_videos) > 64:
+            kept.extend(added_videos)
+            kept.sort(key=video_sort_key)
+        else:
+            for video in added_videos:
+                bisect.insort(kept, video, key=video_sort_key)
+        self.all_videos = kept
+        self._columns = None
+        self.videos = [video for video in kept if self.is_visible(video)]
+        added_videos = [video for video in added_videos if self.is_visible(video)]
+        self.logger.info(f"Applied file changes: {len(added_videos)} added, {len(visible_removed)} removed "
+                         f"(library now {len(self.videos)} visible videos).")
+        return added_videos, visible_removed
+
+    def set_videos(self, videos, search_index=None):
+        """
+        Install a complete (sorted) video list, e.g. the result of collect_videos(), and
+        apply the music rules to it. Pass a SearchIndex built off the Tk thread to avoid
+        indexing here.
+        """
+        self._close_mapped()
+        self.all_videos = videos
+        self._columns = None
+        self._videos_by_id = {video['id']: video for video in videos}
+        self.search_index = search_index if search_index is not None else SearchIndex(videos)
+        self.apply_rules()
+
+    def extend_videos(self, batch):
+        """
+        Append a partial batch while a background scan is still streaming results (unsorted).
+        Returns the visible part of the batch.
+        """
+        self._materialize()
+        rules = self.get_rules()
+        self.all_videos.extend(batch)
+        self._columns = None
+        self._videos_by_id.update((video['id'], video) for video in batch)
+        self.search_index.add_all(batch, rules.is_blocked if rules else None)
+        visible = [video for video in batch if self.is_visible(video)] if rules else batch
+        self.videos.extend(visible)
+        return visible
+
+    def get_columns(self):
+        """
+        The library as TrackColumns (cost, duration, genre, artist, play stats, blocked flag),
+        for vectorized filters such as suggest_videos(). Built once per
+        library change; plays, metadata and rule changes update it in place.
+        """
+        if self._columns is None:
+            play_stats = {track_id_for_path(path): stats for path, stats in self._get_play_stats().items()}
+            if self._mapped is not None:
+                self._columns = TrackColumns(self.all_videos, list(self._mapped.hidden_flags()), play_stats,
+                                             rows=self._mapped.column_rows())
+            else:
+                is_hidden = self.search_index.is_hidden
+                self._columns = TrackColumns(self.all_videos, [is_hidden(video) for video in self.all_videos],
+                                             play_stats)
+        return self._columns
+
+    def suggest_videos(self, count, **filters):
+        """Up to count random visible videos matching TrackColumns.indices() filters (max_cost, played_before, ...)."""
+        return self.get_columns().sample(count, **filters)
+
+    def _get_play_stats(self):
+        if self._play_stats is None:
+            catalog = self._get_catalog()
+            try:
+                self._play_stats = catalog.load_play_stats() if catalog else {}
+            except sqlite3.Error as e:
+                self.logger.warning(f"Could not load play history: {e}")
+                return {} # Try again on the next build
+        return self._play_stats
+
+    def record_play(self, video):
+        """Count a play of a library video (in memory at once, in the catalog when it is not busy)."""
+        when = time.time()
+        stats = self._get_play_stats()
+        count, _ = stats.get(video['path'], (0, 0.0))
+        stats[video['path']] = (count + 1, when)
+        if self._columns is not None:
+            self._columns.record_play(video, when)
+        self._unsaved_plays.append((video['path'], when))
+        catalog = self._get_catalog()
+        if catalog is None:
+            self._unsaved_plays = []
+            return
+        try:
+            catalog.record_plays(self._unsaved_plays)
+            self._unsaved_plays = []
+        except sqlite3.Error as e:
+            self.logger.info(f"Catalog busy ({e}); keeping {len(self._unsaved_plays)} plays for later.")
+
+    def get_by_id(self, track_id):
+        """Return the video with this track id, or None."""
+        if self._mapped is not None:
+            return self._mapped.get_by_id(track_id)
+        return self._videos_by_id.get(track_id)
+
+    def get_by_path(self, path):
+        """Return the video for a file path in any spelling (relative, unnormalized, other case on Windows), or None."""
+        if not path:
+            return None
+        return self.get_by_id(track_id_for_path(path))
+
+    # --- Binary library index (cold start) ---
+    def load_index(self):
+        """
+        Install the library saved in the "library_index_file" by the last scan, memory-mapped:
+        searchable at once, tracks built only as they are shown. A scan replaces it with a
+        real library (set_videos). Returns False if there is no usable index.
+        """
+        # A previous index is unmapped first (so a pending index can replace the file), but
+        # built in memory before that: the library stays usable if the new one cannot be opened
+        self._materialize()
+        mapped = MappedLibraryIndex.open(self.settings_manager.get("library_index_file"))
+        if mapped is None:
+            return False
+        Track.default_cost = self.settings_manager.get("default_credit_cost", 1)
+        self._mapped = mapped
+        self.all_videos = mapped.tracks()
+        self._videos_by_id = {}
+        self._columns = None
+        self.search_index = mapped
+        self.apply_rules()
+        self.logger.info(f"Library loaded from index '{mapped.path}': {len(mapped)} tracks.")
+        return True
+
+    def _close_mapped(self):
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+
+    def is_mapped(self):
+        """True while the library is the memory-mapped index loaded at startup (no scan installed yet)."""
+        return self._mapped is not None
+
+    def _materialize(self):
+        """Turn a memory-mapped library into a real one before changing it (builds every track once)."""
+        if self._mapped is not None:
+            self.logger.info("Building the in-memory library from the mapped index.")
+            self.set_videos(list(self.all_videos))
+
+    def save_index(self, videos, search_index=None):
+        """
+        Write videos (a sorted, complete library) and their search postings to the index file.
+        Called on the scan worker thread before the result is installed, and at exit.
+        """
+        index_file = self.settings_manager.get("library_index_file")
+        if not index_file:
+            return
+        rules = RuleEngine.from_settings(self.settings_manager) # Not get_rules(): that caches on the Tk thread
+        try:
+            write_library_index(index_file, videos, [rules.is_blocked(video) for video in videos],
+                                rules.fingerprint(), search_index)
+            self._index_dirty = False
+        except OSError as e:
+            self.logger.warning(f"Could not write library index '{index_file}': {e}. Retrying at exit.")
+            self._index_dirty = True
+
+    def save_index_if_changed(self):
+        if self._index_dirty and self._mapped is None:
+            self.save_index(self.all_videos, self.search_index)
+
+    def _get_catalog(self):
+        """Open the on-disk catalog lazily. Returns None if it cannot be used (scan then lists every directory)."""
+        if self.catalog is None:
+            catalog_file = self.settings_manager.get("library_catalog_file")
+            if not catalog_file:
+                return None
+            try:
+                self.catalog = LibraryCatalog(catalog_file)
+            except Exception as e:
+                self.logger.error(f"Could not open library catalog '{catalog_file}': {e}. Scanning without it.", exc_info=True)
+                return None
+        return self.catalog
+
+    def _scan_without_catalog(self, music_dir, scanner, cancel_event=None, on_tracks=None, on_progress=None):
+        tracks = []
+        dirs_done = [0]
+
+        def process_listing(listing):
+            dirs_done[0] += 1
+            dir_tracks = []
+            for name, _size, _mtime_ns in listing.files or []:
+                full_path = os.path.join(listing.path, name)
+                artist, title, genre = parse_video_filename(full_path)
+                dir_tracks.append({'path': full_path, 'artist': artist, 'title': title, 'genre': genre})
+            tracks.extend(dir_tracks)
+            if on_tracks and dir_tracks:
+                on_tracks(dir_tracks)
+            if on_progress:
+                on_progress(dirs_done[0], 0, len(tracks))
+
+        scanner.scan(music_dir, SUPPORTED_FORMATS, full=True, cancel_event=cancel_event, on_listing=process_listing)
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        return tracks
+
+    def search(self, query, within=None, mode=None):
+        """
+        Substring search on artist/title. 'within' restricts the search to a given list of videos.
+        mode (default: the "search_mode" setting):
+          "index"  - trigram index, same substring semantics, no per-track work per query
+          "tokens" - whole-word match through the token index (last word may be a prefix)
+          "linear" - the original scan over every video, kept as a fallback
+        With the "fuzzy_search" setting, an indexed search that finds nothing is retried
+        typo-tolerantly ("Hairkut 100" finds "Haircut 100"); those results are ranked best first.
+        A query with field qualifiers ('artist:kooks cost<=2 year:1980..1989', see parse_query)
+        runs as index lookups in any mode, or is checked track by track when 'within' is given.
+        """
+        parsed = parse_query(query)
+        if parsed.is_qualified():
+            if within is not None:
+                match_key = self.search_index.match_key
+                results = [video for video in within if parsed.matches(video, match_key(video))]
+                self.logger.debug(f"Narrowed qualified search {parsed!r} found {len(results)} results.")
+                return results
+            results = self.search_index.search_query(parsed)
+            self.logger.debug(f"Qualified search {parsed!r} found {len(results)} results.")
+            return results
+        mode = mode or self.settings_manager.get("search_mode", "index")
+        fuzzy = self.settings_manager.get("fuzzy_search", True)
+        if mode != "linear":
+            if within is not None:
+                results = self.search_index.filter(within, query)
+                if results or not fuzzy:
+                    self.logger.debug(f"Narrowed search for '{query}' found {len(results)} results.")
+                    return results
+                # Nothing left (e.g. the previous results were fuzzy matches): search afresh
+            if not query.strip():
+                self.logger.debug("Search query is empty, returning all videos.")
+                return self.get_all_videos()
+            elif mode == "tokens":
+                results = self.search_index.search_tokens(query)
+            else:
+                results = self.search_index.search(query)
+            if not results and fuzzy:
+                budget_s = self.settings_manager.get("fuzzy_search_budget_ms", 50) / 1000.0
+                results = self.search_index.search_fuzzy(query, budget_s=budget_s)
+                self.logger.debug(f"Fuzzy search for '{query}' found {len(results)} results.")
+                return results
+            self.logger.debug(f"Indexed search ({mode}) for '{query}' found {len(results)} results.")
+            return results
 
-    def search(self, query):
-        query_lower = query.lower().strip() # Ensure it's lower and stripped
+        candidates = self.videos if within is None else within
 
         # If query is empty after stripping, return all videos
-        if not query_lower: 
+        if not query.strip():
             self.logger.debug("Search query is empty, returning all videos.") # Assuming you have self.logger
-            return self.get_all_videos() 
+            return list(candidates)
 
-        results = [
-            video for video in self.videos
-            if query_lower in video['artist'].lower() or query_lower in video['title'].lower()
-        ]
+        # Same normalization as the index; each track's key was computed when it was indexed
+        needle = normalize_search_text(query)
+        match_key = self.search_index.match_key
+        results = [video for video in candidates if needle in match_key(video)] if needle else []
         self.logger.debug(f"Search for '{query}' found {len(results)} results.")
         return results
         
-    def get_all_videos(self):
-        return list(self.videos) # Return a copy
+    def get_all_videos(self, include_blocked=False):
+        """Read-only view of the (visible or complete) library; sorted()/list() it for a copy you can change."""
+        videos = self.all_videos if include_blocked else self.videos
+        return videos if self._mapped is not None else ReadOnlyList(videos) # MappedTrackLists are read-only already
 
-    def get_artists(self):
-        return sorted(list(set(v['artist'] for v in self.videos)))
+    def get_artists(self, include_blocked=False):
+        if self._mapped is not None:
+            return self._mapped.distinct('artist', include_blocked)
+        return sorted(list(set(v['artist'] for v in (self.all_videos if include_blocked else self.videos))))
 
     def get_genres(self): # if you implement genre
+        if self._mapped is not None:
+            return self._mapped.distinct('genre')
         return sorted(list(set(v['genre'] for v in self.videos)))
\ No newline at end of file
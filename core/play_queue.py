@@ -0,0 +1,283 @@
+# core/play_queue.py
+import itertools
+import logging
+
+logger = logging.getLogger("VideoJukebox.PlayQueue")
+
+UNKNOWN_DURATION_MS = 4 * 60 * 1000 # ETA estimate for tracks whose duration is not known yet
+
+
+class QueueEntry:
+    """One queued play of a track. The same track queued twice gets two entries."""
+    __slots__ = ('entry_id', 'song_info', 'media', 'mrl', 'prev', 'next')
+
+    def __init__(self, entry_id, song_info, media=None, mrl=None):
+        self.entry_id = entry_id
+        self.song_info = song_info
+        self.media = media  # vlc.Media mirrored in the MediaList (owned by the queue)
+        self.mrl = mrl
+        self.prev = None
+        self.next = None
+
+
+class PlayQueue:
+    """
+    The play queue: a doubly linked list of QueueEntry plus an entry id -> node map.
+
+    Entry 0 (the head) is the item being played. remove, move and insert_before
+    are O(1) on the Python side: entries are found through the id map, never by
+    walking the list. When a VLC MediaList is attached every change is mirrored into
+    it under its lock, locating the neighbour with libVLC's index_of_item (a scan of
+    its C array, which insert/remove shift anyway), so the two can never disagree.
+    QueueManager and VideoPlayer share one instance.
+    Listeners registered with add_listener() are called after every change as
+    callback(op, entry, before_entry_id) with op one of "add", "remove", "move".
+
+    For wait-time ETAs the queue keeps prefix sums of the track durations (start offset
+    of every entry from the start of the head). A change only invalidates them; they are
+    rebuilt in one pass on the next query, after which each lookup is O(1).
+    """
+
+    def __init__(self):
+        self._head = None
+        self._tail = None
+        self._nodes = {}                # entry id -> QueueEntry
+        self._ids = itertools.count(1)
+        self._media_list = None
+        self._listeners = []
+        self.playing_entry_id = None    # Entry currently loaded in the player (cannot be removed)
+        self._offsets = None            # entry id -> (start offset ms, estimated), None when stale
+        self._total = (0, False)        # (sum of durations ms, estimated)
+
+    # --- Read access ---
+    def __len__(self):
+        return len(self._nodes)
+
+    def __iter__(self):
+        node = self._head
+        while node is not None:
+            yield node
+            node = node.next
+
+    def __contains__(self, entry_id):
+        return entry_id in self._nodes
+
+    def get(self, entry_id):
+        return self._nodes.get(entry_id)
+
+    def head(self):
+        return self._head
+
+    def entry_at(self, index):
+        """O(1) at the ends (0, 1, -1: what the player asks for), O(index) in between (UI positions)."""
+        if index < 0:
+            index += len(self._nodes)
+        if not 0 <= index < len(self._nodes):
+            return None
+        if index == len(self._nodes) - 1:
+            return self._tail
+        node = self._head
+        for _ in range(index):
+            node = node.next
+        return node
+
+    def index_of(self, entry_id):
+        """O(n) position of an entry, for display; the queue itself never needs it."""
+        for i, node in enumerate(self):
+            if node.entry_id == entry_id:
+                return i
+        return -1
+
+    def songs(self):
+        return [node.song_info for node in self]
+
+    # --- Wait-time estimates ---
+    def invalidate_durations(self):
+        """Call when a queued track's duration_ms became known (pre-parse, metadata worker)."""
+        self._offsets = None
+
+    def _ensure_offsets(self):
+        if self._offsets is not None:
+            return
+        offsets, total, estimated = {}, 0, False
+        for node in self:
+            offsets[node.entry_id] = (total, estimated)
+            duration_ms = node.song_info.get('duration_ms')
+            if not duration_ms:
+                duration_ms, estimated = UNKNOWN_DURATION_MS, True
+            total += duration_ms
+        self._offsets, self._total = offsets, (total, estimated)
+
+    def start_offset(self, entry_id):
+        """(ms from the start of the head until this entry starts, estimated?) or None if unknown entry."""
+        self._ensure_offsets()
+        return self._offsets.get(entry_id)
+
+    def total_duration(self):
+        """(ms until everything queued has played from the start of the head, estimated?)."""
+        self._ensure_offsets()
+        return self._total
+
+    # --- VLC mirroring ---
+    def attach_media_list(self, media_list):
+        self._media_list = media_list
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def _notify(self, op, node, before_entry_id=None):
+        self._offsets = None
+        for callback in self._listeners:
+            try:
+                callback(op, node, before_entry_id)
+            except Exception as e:
+                logger.error(f"Play queue listener failed: {e}", exc_info=True)
+
+    def _mirror_insert(self, node, successor):
+        if self._media_list is None or node.media is None:
+            return True
+        self._media_list.lock()
+        try:
+            index = -1
+            if successor is not None and successor.media is not None:
+                index = self._media_list.index_of_item(successor.media)
+            if index < 0:
+                return self._media_list.add_media(node.media) == 0
+            return self._media_list.insert_media(node.media, index) == 0
+        finally:
+            self._media_list.unlock()
+
+    def _mirror_remove(self, node):
+        if self._media_list is None or node.media is None:
+            return
+        self._media_list.lock()
+        try:
+            index = self._media_list.index_of_item(node.media)
+            if index >= 0:
+                self._media_list.remove_index(index)
+            else:
+                logger.warning(f"Queue entry {node.entry_id} was not in the VLC MediaList.")
+        finally:
+            self._media_list.unlock()
+
+    # --- Linking ---
+    def _link_before(self, node, successor):
+        if successor is None: # Append
+            node.prev, node.next = self._tail, None
+            if self._tail is not None:
+                self._tail.next = node
+            else:
+                self._head = node
+            self._tail = node
+        else:
+            node.prev, node.next = successor.prev, successor
+            if successor.prev is not None:
+                successor.prev.next = node
+            else:
+                self._head = node
+            successor.prev = node
+
+    def _unlink(self, node):
+        if node.prev is not None:
+            node.prev.next = node.next
+        else:
+            self._head = node.next
+        if node.next is not None:
+            node.next.prev = node.prev
+        else:
+            self._tail = node.prev
+        node.prev = node.next = None
+
+    # --- Mutations ---
+    def append(self, song_info, media=None, mrl=None):
+        """Queue a track at the end. Takes ownership of media. Returns the new entry id (None on failure)."""
+        return self.insert_before(None, song_info, media, mrl)
+
+    def insert_before(self, before_entry_id, song_info, media=None, mrl=None):
+        """
+        Insert a track in front of another entry (None = at the end). Returns the new entry id.
+        Nothing goes in front of what is playing: such an insert lands right after it.
+        """
+        successor = self._nodes.get(before_entry_id) if before_entry_id is not None else None
+        if before_entry_id is not None and successor is None:
+            raise KeyError(before_entry_id)
+        if successor is not None and successor is self._head and successor.entry_id == self.playing_entry_id:
+            successor = successor.next
+            before_entry_id = successor.entry_id if successor is not None else None
+        node = QueueEntry(next(self._ids), song_info, media, mrl)
+        if not self._mirror_insert(node, successor):
+            logger.error(f"Could not add '{song_info.get('title', mrl)}' to the VLC MediaList.")
+            if media is not None:
+                media.release()
+            return None
+        self._link_before(node, successor)
+        self._nodes[node.entry_id] = node
+        self._notify("add", node, before_entry_id)
+        return node.entry_id
+
+    def insert_at(self, index, song_info, media=None, mrl=None):
+        """Insert at a position (O(index), see entry_at); prefer insert_before with an entry id."""
+        successor = self.entry_at(index) if index < len(self._nodes) else None
+        return self.insert_before(successor.entry_id if successor else None, song_info, media, mrl)
+
+    def remove(self, entry_id, force=False):
+        """Remove an entry and return its song_info (None if unknown or currently playing, unless force)."""
+        node = self._nodes.get(entry_id)
+        if node is None:
+            return None
+        if entry_id == self.playing_entry_id and not force:
+            logger.warning(f"Queue entry {entry_id} is playing; skip it instead of removing it.")
+            return None
+        self._remove_node(node)
+        self._notify("remove", node)
+        return node.song_info
+
+    def _remove_node(self, node):
+        if node.entry_id == self.playing_entry_id:
+            self.playing_entry_id = None
+        self._mirror_remove(node)
+        self._unlink(node)
+        del self._nodes[node.entry_id]
+        if node.media is not None:
+            node.media.release()
+            node.media = None
+
+    def pop_head(self):
+        """Remove the head (the item that just finished) and return its entry, or None."""
+        if self._head is None:
+            return None
+        node = self._head
+        self.remove(node.entry_id, force=True)
+        return node
+
+    def move(self, entry_id, before_entry_id=None):
+        """
+        Move an entry in front of another one (None = to the end). Returns False if either
+        entry is unknown or the move is not allowed (the playing entry stays put).
+        """
+        node = self._nodes.get(entry_id)
+        successor = self._nodes.get(before_entry_id) if before_entry_id is not None else None
+        if node is None or (before_entry_id is not None and successor is None):
+            return False
+        if entry_id == before_entry_id or entry_id == self.playing_entry_id:
+            return False
+        if successor is not None and successor is self._head and self.playing_entry_id == successor.entry_id:
+            return False # Nothing goes in front of what is playing
+        self._mirror_remove(node)
+        self._unlink(node)
+        self._link_before(node, successor)
+        if not self._mirror_insert(node, successor):
+            logger.error(f"Could not mirror move of queue entry {entry_id} into the VLC MediaList.")
+        self._notify("move", node, before_entry_id)
+        return True
+
+    def clear(self, keep_playing=True):
+        """Remove every entry (except the playing one when keep_playing). Returns the removed song_infos."""
+        removed = []
+        for node in list(self):
+            if keep_playing and node.entry_id == self.playing_entry_id:
+                continue
+            self._remove_node(node)
+            removed.append(node.song_info)
+            self._notify("remove", node)
+        return removed
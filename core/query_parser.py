@@ -0,0 +1,118 @@
+# core/query_parser.py
+import re
+from core.search_index import normalize_search_text, words_match
+
+TEXT_FIELDS = ('artist', 'title', 'genre')
+RANGE_FIELDS = ('cost', 'year')
+KEY_PARTS = {'artist': 0, 'title': 1} # Position of the field in a search_key()
+
+# A qualified term (its value may be a quoted phrase), a quoted phrase or a bare word
+TERM_RE = re.compile(r'\w+(?:<=|>=|<|>|=|:)(?:"[^"]*"?|\S*)|"[^"]*"?|\S+')
+QUALIFIER_RE = re.compile(r'(\w+)(<=|>=|<|>|=|:)(.*)', re.DOTALL)
+NUMBER_RE = re.compile(r'[0-9]+')
+RANGE_RE = re.compile(r'([0-9]*)\.\.([0-9]*)')
+
+
+class SearchQuery:
+    """
+    A parsed query (see parse_query):
+      text   - the unqualified part, normalized; matched as a substring like a plain search
+      fields - [(field, words)]: each word must start a word of that field ('artist', 'title', 'genre')
+      ranges - [(field, low, high)]: inclusive bounds ('cost', 'year'), None for an open end
+
+    SearchIndex.search_query() turns every clause into one index lookup (token postings,
+    the genre map, a sorted value array, trigram postings), intersects those smallest
+    first and checks only the survivors with matches_key().
+    """
+    __slots__ = ('text', 'fields', 'ranges')
+
+    def __init__(self, text="", fields=(), ranges=()):
+        self.text = text
+        self.fields = list(fields)
+        self.ranges = list(ranges)
+
+    def is_qualified(self):
+        return bool(self.fields or self.ranges)
+
+    def key_checks(self):
+        """The (key part, words) conditions the index lookups only narrow down (artist/title terms)."""
+        return [(KEY_PARTS[field], words) for field, words in self.fields if field in KEY_PARTS]
+
+    def matches_key(self, key, checks=None):
+        """Check a candidate's search_key() against the free text and the artist/title terms."""
+        if self.text and self.text not in key:
+            return False
+        if checks is None:
+            checks = self.key_checks()
+        if checks:
+            parts = key.split("\n")
+            return all(words_match(words, parts[part]) for part, words in checks)
+        return True
+
+    def matches(self, video, key):
+        """The whole query checked on one track, given its search_key() (for narrowing a short list)."""
+        if not self.matches_key(key):
+            return False
+        for field, words in self.fields:
+            if field == 'genre' and not words_match(words, normalize_search_text(video.get('genre') or "")):
+                return False
+        for field, low, high in self.ranges:
+            value = video.get(field)
+            if value is None or (low is not None and value < low) or (high is not None and value > high):
+                return False
+        return True
+
+    def __repr__(self):
+        return f"SearchQuery(text={self.text!r}, fields={self.fields!r}, ranges={self.ranges!r})"
+
+
+def _bounds(op, value):
+    if op in (':', '='):
+        match = RANGE_RE.fullmatch(value)
+        if match:
+            low, high = match.groups()
+            if not low and not high:
+                return None
+            return (int(low) if low else None, int(high) if high else None)
+        if NUMBER_RE.fullmatch(value):
+            return (int(value), int(value))
+        return None
+    if not NUMBER_RE.fullmatch(value):
+        return None
+    number = int(value)
+    return {'<=': (None, number), '<': (None, number - 1), '>=': (number, None), '>': (number + 1, None)}[op]
+
+
+def _add_clause(term, fields, ranges):
+    """Add a qualified term to fields or ranges. Returns False if it is not one (it is free text then)."""
+    match = QUALIFIER_RE.fullmatch(term)
+    if not match:
+        return False
+    name, op, value = match.group(1).casefold(), match.group(2), match.group(3).strip('"')
+    if name in TEXT_FIELDS and op in (':', '='):
+        words = normalize_search_text(value).split()
+        if words:
+            fields.append((name, words))
+            return True
+    elif name in RANGE_FIELDS:
+        bounds = _bounds(op, value)
+        if bounds is not None:
+            ranges.append((name, *bounds))
+            return True
+    return False
+
+
+def parse_query(query):
+    """
+    Parse a search box query such as 'artist:kooks love cost<=2 year:1980..1989'.
+
+    Qualifiers: artist:, title:, genre: (a word or a "quoted phrase"; words may be
+    prefixes), cost and year with :N, =N, <N, <=N, >N, >=N or :A..B (either end may be
+    left open). Anything else, including a qualifier it cannot read ('re:zero',
+    'year:abc'), is free text, so ordinary queries mean what they always meant.
+    """
+    text_parts, fields, ranges = [], [], []
+    for term in TERM_RE.findall(query):
+        if not _add_clause(term, fields, ranges):
+            text_parts.append(term.strip('"'))
+    return SearchQuery(normalize_search_text(" ".join(text_parts)), fields, ranges)
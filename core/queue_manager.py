@@ -1,21 +1,18 @@
 # core/queue_manager.py
-import collections
 import logging
+from core.play_queue import PlayQueue
 
 logger = logging.getLogger("VideoJukebox.QueueManager")
 
 class QueueManager:
-    def __init__(self, credit_manager, music_library): # video_player is no longer passed directly here for queueing
+    def __init__(self, credit_manager, music_library, play_queue=None):
         self.credit_manager = credit_manager
         self.music_library = music_library
-        # Keep a simple Python list of all queued song_info dicts (in playback order)
-        self._queued_songs = []
-        # This deque can now track song_info objects for UI purposes,
-        # while VLC's MediaList handles the actual playback order.
-        # Or, we simplify and let the main app manage the mapping if needed.
-        # For now, let's keep it simple: it manages credits and tells VideoPlayer what to add.
-        self.app_queue_view = collections.deque() # For UI display mainly
-        logger.info("QueueManager initialized (MediaListPlayer approach).")
+        # The one play queue, shared with VideoPlayer (which mirrors it into VLC's MediaList).
+        # Entry 0 is the song currently playing. Entries have unique ids, so the same
+        # song queued twice is two independent entries.
+        self.play_queue = play_queue if play_queue is not None else PlayQueue()
+        logger.info("QueueManager initialized (shared PlayQueue).")
 
     def add_song_to_system(self, song_info, video_player_instance): # video_player_instance is the argument
         cost = song_info.get('cost', self.credit_manager.settings_manager.get("default_credit_cost"))
@@ -27,56 +24,87 @@ class QueueManager:
 
             # Use the 'video_player_instance' argument here
             if video_player_instance.add_to_playlist(song_info['path'], song_info):
-                self.app_queue_view.append(song_info) 
-                logger.info(f"Added to app queue view & VLC playlist: {song_info['artist']} - {song_info['title']}")
+                logger.info(f"Added to play queue: {song_info['artist']} - {song_info['title']}")
                 return True, "Song added to queue."
             else:
                 logger.error(f"Failed to add {song_info['title']} to VLC playlist. Refunding {cost} credits.")
-                self.credit_manager.add_credits(cost) 
+                self.credit_manager.add_credits(cost)
                 return False, "Failed to add song to playback system."
         else:
             logger.info(f"Cannot add: Insufficient credits for {song_info['title']}.")
             return False, f"Insufficient credits. Need {cost}."
 
-    def get_next_song_for_ui_update(self): # When VLC plays next, app needs to update its UI
-        if self.app_queue_view:
-            return self.app_queue_view.popleft()
-        return None
+    def remove_entry(self, entry_id):
+        """Remove one queue entry by id. Returns its song_info, or None (unknown or currently playing)."""
+        removed = self.play_queue.remove(entry_id)
+        if removed:
+            logger.info(f"Removed queue entry {entry_id}: '{removed['title']}'.")
+        return removed
 
-    def remove_song_from_app_view(self, song_info_to_remove):
-        if not song_info_to_remove or 'path' not in song_info_to_remove:
-            logger.warning("remove_song_from_app_view: Invalid song_info_to_remove.")
-            return False
-        
-        # Remove based on a unique identifier, like path
-        original_len = len(self.app_queue_view)
-        self.app_queue_view = collections.deque(
-            s for s in self.app_queue_view if s['path'] != song_info_to_remove['path']
-        )
-        if len(self.app_queue_view) < original_len:
-            logger.info(f"Removed '{song_info_to_remove['title']}' from app_queue_view.")
-            return True
-        else:
-            logger.warning(f"Could not find/remove '{song_info_to_remove['title']}' from app_queue_view (path mismatch?).")
+    def remove_song(self, index):
+        """Remove the entry at a position in get_full_queue(). The playing song (index 0) cannot be removed."""
+        entry = self.play_queue.entry_at(index)
+        if entry is None:
+            logger.warning(f"remove_song: no queue entry at index {index}.")
+            return None
+        return self.remove_entry(entry.entry_id)
+
+    def move_song(self, index, new_index):
+        """Move the entry at index so it ends up at new_index."""
+        entry = self.play_queue.entry_at(index)
+        if entry is None or index == new_index:
             return False
+        # Moving down means inserting before the entry that currently sits one past new_index
+        target = self.play_queue.entry_at(new_index + 1 if new_index > index else new_index)
+        return self.play_queue.move(entry.entry_id, target.entry_id if target else None)
+
+    def clear_queue(self):
+        """Remove everything except the song that is playing. Returns the removed song_infos."""
+        removed = self.play_queue.clear(keep_playing=True)
+        logger.info(f"Play queue cleared ({len(removed)} entries removed).")
+        return removed
 
     def get_full_queue(self):
         """
-        Return a shallow copy of the list of queued songs (each element is the song_info dict
+        Return a list of the queued songs in play order (each element is the song_info dict
         you originally passed to add_song_to_system). This is what the management dialog will read.
         """
-        return list(self._queued_songs)
+        return self.play_queue.songs()
 
     def get_app_queue_view_strings(self, limit=5):
-        return [f"{s['artist']} - {s['title']}" for i, s in enumerate(self.app_queue_view) if i < limit]
+        strings = []
+        for entry in self.play_queue:
+            if len(strings) >= limit:
+                break
+            strings.append(f"{entry.song_info['artist']} - {entry.song_info['title']}")
+        return strings
+
+    def get_queue_etas(self, position_ms=0, limit=None):
+        """
+        [(song_info, eta_ms, estimated)] in play order; eta_ms is the wait until the entry starts
+        (0 for the one playing). position_ms is how far into the head playback is.
+        """
+        etas = []
+        for entry in self.play_queue:
+            if limit is not None and len(etas) >= limit:
+                break
+            offset_ms, estimated = self.play_queue.start_offset(entry.entry_id)
+            etas.append((entry.song_info, max(0, offset_ms - position_ms), estimated))
+        return etas
+
+    def get_eta_for_new_song(self, position_ms=0):
+        """(wait in ms before a song added now would start, estimated?)."""
+        total_ms, estimated = self.play_queue.total_duration()
+        return max(0, total_ms - position_ms), estimated
 
     def get_full_app_queue(self):
-        return list(self.app_queue_view)
+        return self.play_queue.songs()
 
     def is_app_queue_empty(self):
-        return len(self.app_queue_view) == 0
-    
+        return len(self.play_queue) == 0
+
+    def is_empty(self):
+        return len(self.play_queue) == 0
+
     def clear_app_queue_view(self): # If admin clears
-        self.app_queue_view.clear()
-        # Also need to tell VideoPlayer to clear its MediaList
-        logger.info("App queue view cleared.")
\ No newline at end of file
+        self.clear_queue()
@@ -0,0 +1,99 @@
+# core/rule_engine.py
+import os
+import re
+import fnmatch
+import hashlib
+import logging
+
+logger = logging.getLogger("VideoJukebox.RuleEngine")
+
+GLOB_PREFIX = "glob:"
+REGEX_PREFIX = "re:"
+RULE_SETTINGS = ("blocked_artists", "blocked_genres", "blocked_tracks", "blocked_path_patterns") # RuleEngine() arguments
+
+
+def _path_key(path):
+    # Same normalization as music_library.canonical_path (blocked_tracks may be stored in any case on Windows)
+    return os.path.normcase(os.path.abspath(path))
+
+
+class RuleEngine:
+    """
+    The music rules (blocked artists, genres, tracks and path patterns) compiled for O(1) checks.
+
+    Artists and genres become casefolded sets and blocked tracks a set of canonical paths.
+    Path patterns are "glob:<pattern>" (the default when there is no prefix) or "re:<regex>";
+    they are matched against the path with '/' separators, case-insensitively, and all of
+    them are compiled into one alternation so a track costs a single regex search however
+    many patterns there are. A regex that cannot be part of an alternation (e.g. one with
+    global flags such as '(?i)...') is kept as a separate pattern instead. Build once per
+    rule change, then call block_reason() per track.
+    """
+
+    def __init__(self, blocked_artists=(), blocked_genres=(), blocked_tracks=(), path_patterns=()):
+        self.blocked_artists = frozenset(a.casefold() for a in blocked_artists if a)
+        self.blocked_genres = frozenset(g.casefold() for g in blocked_genres if g)
+        self.blocked_tracks = frozenset(_path_key(p) for p in blocked_tracks if p)
+        self.path_patterns = tuple(p for p in path_patterns if p)
+        self._path_regexes = self._compile_patterns(self.path_patterns)
+
+    @classmethod
+    def from_settings(cls, settings_manager):
+        return cls(*(settings_manager.get(key, []) for key in RULE_SETTINGS))
+
+    @staticmethod
+    def _compile_patterns(patterns):
+        """Compiled path regexes: the combined alternation first, then any rule that only compiles on its own."""
+        alternatives, separate = [], []
+        for pattern in patterns:
+            if pattern.startswith(REGEX_PREFIX):
+                source = pattern[len(REGEX_PREFIX):]
+            else:
+                glob = pattern[len(GLOB_PREFIX):] if pattern.startswith(GLOB_PREFIX) else pattern
+                source = "^" + fnmatch.translate(glob.replace("\\", "/")) # translate() already anchors the end
+            try:
+                re.compile(f"(?:{source})")
+            except re.error:
+                try:
+                    separate.append(re.compile(source, re.IGNORECASE))
+                except re.error as e:
+                    logger.error(f"Ignoring invalid path rule '{pattern}': {e}")
+                continue
+            alternatives.append((pattern, f"(?:{source})"))
+        if alternatives:
+            try:
+                return (re.compile("|".join(source for _, source in alternatives), re.IGNORECASE), *separate)
+            except re.error as e: # e.g. the same group name in two rules
+                logger.warning(f"Path rules cannot be combined ({e}); matching them one by one.")
+                for pattern, source in alternatives:
+                    try:
+                        separate.append(re.compile(source, re.IGNORECASE))
+                    except re.error as e:
+                        logger.error(f"Ignoring invalid path rule '{pattern}': {e}")
+        return tuple(separate)
+
+    def __bool__(self):
+        return bool(self.blocked_artists or self.blocked_genres or self.blocked_tracks or self._path_regexes)
+
+    def fingerprint(self):
+        """8-byte digest of the rules, stored with results computed under them (see core.library_index)."""
+        source = repr((sorted(self.blocked_artists), sorted(self.blocked_genres),
+                       sorted(self.blocked_tracks), self.path_patterns))
+        return hashlib.blake2b(source.encode("utf-8", "surrogateescape"), digest_size=8).digest()
+
+    def block_reason(self, artist, genre, path):
+        """Return why a track is blocked ('artist', 'genre', 'track' or 'path'), or None if it is allowed."""
+        if artist and artist.casefold() in self.blocked_artists:
+            return 'artist'
+        if genre and genre.casefold() in self.blocked_genres:
+            return 'genre'
+        if self.blocked_tracks and _path_key(path) in self.blocked_tracks:
+            return 'track'
+        if self._path_regexes:
+            path = path.replace(os.sep, "/")
+            if any(regex.search(path) for regex in self._path_regexes):
+                return 'path'
+        return None
+
+    def is_blocked(self, video):
+        return self.block_reason(video['artist'], video['genre'], video['path']) is not None
@@ -0,0 +1,417 @@
+# core/search_index.py
+import re
+import time
+import heapq
+import bisect
+import logging
+import unicodedata
+from array import array
+from collections import Counter
+from core.track import Track
+
+logger = logging.getLogger("VideoJukebox.SearchIndex")
+
+TOKEN_RE = re.compile(r"\w+")
+FEATURING_RE = re.compile(r"\b(?:feat|ft)\.|\bfeaturing\b") # "Artist feat. Guest": the marker is not searchable
+DELETED_PUNCTUATION_RE = re.compile(r"['\u2019.]")  # "Don't" -> "dont", "R.E.M." -> "rem"
+SPACED_PUNCTUATION_RE = re.compile(r"[^\w\s]|_")   # "AC/DC" -> "ac dc", "Jay-Z" -> "jay z"
+MIN_GRAM_QUERY = 3             # Shorter queries are checked against the precomputed keys directly
+INTERSECT_UNTIL = 32           # Stop intersecting postings once this few candidates are left
+COMPACT_RATIO = 0.25           # Rebuild postings once this share of documents was removed
+FUZZY_CANDIDATES = 300         # Documents (most shared trigrams first) that get an edit-distance check
+FUZZY_MIN_OVERLAP = 1 / 3      # Share of the query's trigrams a candidate must contain
+FUZZY_LIMIT = 100              # Ranked fuzzy results returned
+FUZZY_BUDGET_S = 0.05          # Time budget for one fuzzy search; what was ranked by then is returned
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def normalize_search_text(text):
+    """
+    The form artist, title and queries are matched in: NFKD-decomposed with the accents
+    dropped (full-width letters and ligatures become plain ones, "Naïve" -> "naive"),
+    casefolded ("Straße" -> "strasse"), without "feat."/"featuring" or punctuation,
+    whitespace collapsed. Computed once per track when it is indexed.
+    """
+    if not text.isascii():
+        text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    text = FEATURING_RE.sub(" ", text.casefold())
+    text = SPACED_PUNCTUATION_RE.sub(" ", DELETED_PUNCTUATION_RE.sub("", text))
+    return " ".join(text.split())
+
+
+def words_match(words, text):
+    """True if every word is the start of a word of text (both normalized)."""
+    text_words = text.split()
+    return all(any(text_word.startswith(word) for text_word in text_words) for word in words)
+
+
+def intersect_smallest_first(doc_id_sets):
+    """Intersect collections of document ids, smallest first, stopping as soon as nothing is left."""
+    ordered = sorted(doc_id_sets, key=len)
+    result = set(ordered[0])
+    for doc_ids in ordered[1:]:
+        if not result:
+            break
+        result.intersection_update(doc_ids)
+    return result
+
+
+def sorted_range_index(values_by_doc):
+    """(doc id, value) pairs -> (values, doc ids) sorted by value, for range_lookup()."""
+    pairs = sorted((value, doc_id) for doc_id, value in values_by_doc)
+    return array('q', (value for value, _ in pairs)), array('i', (doc_id for _, doc_id in pairs))
+
+
+def range_lookup(range_index, low, high):
+    """Document ids whose value is within [low, high] (None: open end): two bisects and a slice."""
+    values, doc_ids = range_index
+    start = 0 if low is None else bisect.bisect_left(values, low)
+    end = len(values) if high is None else bisect.bisect_right(values, high)
+    return doc_ids[start:end]
+
+
+def search_key(artist, title):
+    """A track's precomputed match key: normalized artist and title ('\n' keeps the fields apart)."""
+    return f"{normalize_search_text(artist)}\n{normalize_search_text(title)}"
+
+
+def max_typos(word):
+    """Edits tolerated in one query word: none for short words, one up to 7 letters, then two."""
+    return 0 if len(word) <= 3 else 1 if len(word) <= 7 else 2
+
+
+def substring_distance(word, text, max_distance):
+    """
+    Smallest edit distance between word and any substring of text (Sellers' algorithm;
+    swapping two adjacent letters counts as one edit), or None if it is above max_distance.
+    "hairkut" in "haircut 100" and "jdue" in "hey jude" are both 1.
+    """
+    if word in text:
+        return 0
+    if max_distance == 0:
+        return None
+    before_previous, previous = None, list(range(len(word) + 1))
+    best = previous[-1]
+    previous_ch = None
+    for ch in text:
+        current = [0] # A match may start at any position of text
+        for i, word_ch in enumerate(word):
+            cost = min(previous[i] + (word_ch != ch), previous[i + 1] + 1, current[i] + 1)
+            if i and word_ch == previous_ch and word[i - 1] == ch and before_previous is not None:
+                cost = min(cost, before_previous[i - 1] + 1)
+            current.append(cost)
+        best = min(best, current[-1])
+        before_previous, previous, previous_ch = previous, current, ch
+    return best if best <= max_distance else None
+
+
+def fuzzy_rank(needle, postings_for, match_key, is_live, order_key, limit=FUZZY_LIMIT, budget_s=FUZZY_BUDGET_S):
+    """
+    Typo-tolerant search over any trigram index; returns document ids, best first.
+
+    Shortlist: documents sharing the most trigrams with needle (normalized query), postings
+    counted rarest first. Rerank: every query word must occur in the match key within
+    max_typos() edits; results are ordered by total edits, then shared trigrams, then
+    order_key. Half the budget goes to each step; whatever was ranked when time runs out
+    is returned, so one query never costs more than about budget_s.
+    """
+    deadline = time.perf_counter() + budget_s
+    words = TOKEN_RE.findall(needle)
+    grams = _trigrams(needle)
+    if not words or not grams:
+        return []
+    postings = sorted((p for p in map(postings_for, grams) if p is not None), key=len)
+    overlap = Counter()
+    shortlist_deadline = deadline - budget_s / 2
+    for p in postings:
+        overlap.update(p)
+        if time.perf_counter() > shortlist_deadline:
+            break
+    min_overlap = max(1, int(len(grams) * FUZZY_MIN_OVERLAP))
+    shortlist = heapq.nlargest(FUZZY_CANDIDATES,
+                               (doc_id for doc_id, count in overlap.items() if count >= min_overlap and is_live(doc_id)),
+                               key=overlap.__getitem__)
+
+    ranked = []
+    for doc_id in shortlist:
+        if time.perf_counter() > deadline:
+            break
+        key = match_key(doc_id)
+        edits = 0
+        for word in words:
+            distance = substring_distance(word, key, max_typos(word))
+            if distance is None:
+                break
+            edits += distance
+        else:
+            ranked.append((edits, -overlap[doc_id], order_key(doc_id), doc_id))
+    ranked.sort()
+    return [entry[-1] for entry in ranked[:limit]]
+
+
+class SearchIndex:
+    """
+    Inverted index over artist and title, built once per scan instead of lowercasing
+    every track on every keystroke.
+
+    Each video gets a dense document id and a match key (search_key(): accent-folded,
+    casefolded, punctuation-free), and queries are normalized the same way, so
+    "naive" finds "Naïve" and "rem" finds "R.E.M.". Postings map the key's tokens and
+    character trigrams to ascending arrays of document ids. A substring query
+    intersects the postings of its trigrams (rarest first) and then checks the few
+    remaining candidates against the precomputed key, so it keeps the old
+    "query in artist or query in title" semantics.
+
+    Removal only tombstones the document; postings are compacted once enough
+    documents are gone.
+
+    A visibility bitmap (one byte per document id) hides documents from results
+    without removing them, so the music rules can change without re-indexing.
+    """
+
+    def __init__(self, videos=()):
+        self._clear()
+        for video in videos:
+            self.add(video)
+
+    def _clear(self):
+        self._docs = []          # doc id -> video (None once removed)
+        self._match_keys = []    # doc id -> search_key(artist, title)
+        self._sort_keys = []     # doc id -> library sort key
+        self._doc_by_path = {}   # path -> doc id
+        self._hidden = bytearray()  # doc id -> 1 if blocked by the music rules
+        self._trigrams = {}      # trigram -> array of doc ids
+        self._tokens = {}        # token -> array of doc ids
+        self._vocabulary = None  # sorted tokens for prefix lookups, rebuilt on demand
+        self._field_indexes = {} # 'genre' -> {normalized genre: [doc ids]}, ('cost', default)/'year' -> sorted_range_index()
+        self._removed = 0
+
+    def __len__(self):
+        return len(self._docs) - self._removed
+
+    def add(self, video, hidden=False):
+        if video['path'] in self._doc_by_path:
+            self.remove(video)
+        doc_id = len(self._docs)
+        if self._field_indexes:
+            self._field_indexes = {}
+        match_key = search_key(video['artist'], video['title'])
+        self._docs.append(video)
+        self._hidden.append(1 if hidden else 0)
+        self._match_keys.append(match_key)
+        self._sort_keys.append((video['artist'].lower(), video['title'].lower()))
+        self._doc_by_path[video['path']] = doc_id
+
+        for gram in _trigrams(match_key):
+            postings = self._trigrams.get(gram)
+            if postings is None:
+                self._trigrams[gram] = array('i', (doc_id,))
+            else:
+                postings.append(doc_id)
+        for token in set(TOKEN_RE.findall(match_key)):
+            postings = self._tokens.get(token)
+            if postings is None:
+                self._tokens[token] = array('i', (doc_id,))
+                self._vocabulary = None
+            else:
+                postings.append(doc_id)
+
+    def add_all(self, videos, is_hidden=None):
+        for video in videos:
+            self.add(video, is_hidden(video) if is_hidden else False)
+
+    def remove(self, video):
+        doc_id = self._doc_by_path.pop(video['path'], None)
+        if doc_id is None:
+            return False
+        self._docs[doc_id] = None
+        self._removed += 1
+        if self._field_indexes:
+            self._field_indexes = {}
+        if self._removed > 1000 and self._removed > COMPACT_RATIO * len(self._docs):
+            self._compact()
+        return True
+
+    def _compact(self):
+        live = [(video, hidden) for video, hidden in zip(self._docs, self._hidden) if video is not None]
+        logger.debug(f"Compacting search index: {self._removed} removed, {len(live)} live documents.")
+        self._clear()
+        for video, hidden in live:
+            self.add(video, hidden)
+
+    def set_hidden(self, is_hidden):
+        """Recompute the visibility bitmap with is_hidden(video). Returns the number of hidden documents."""
+        hidden = bytearray(len(self._docs))
+        for doc_id, video in enumerate(self._docs):
+            if video is not None and is_hidden(video):
+                hidden[doc_id] = 1
+        self._hidden = hidden
+        return hidden.count(1)
+
+    def is_hidden(self, video):
+        doc_id = self._doc_by_path.get(video['path'])
+        return doc_id is not None and self._hidden[doc_id] == 1
+
+    def match_key(self, video):
+        doc_id = self._doc_by_path.get(video['path'])
+        if doc_id is not None and self._docs[doc_id] is video:
+            return self._match_keys[doc_id]
+        return search_key(video['artist'], video['title'])
+
+    def _results(self, doc_ids, needle=None):
+        docs, keys, hidden = self._docs, self._match_keys, self._hidden
+        hits = [
+            doc_id for doc_id in doc_ids
+            if docs[doc_id] is not None and not hidden[doc_id] and (needle is None or needle in keys[doc_id])
+        ]
+        hits.sort(key=self._sort_keys.__getitem__)
+        return [docs[doc_id] for doc_id in hits]
+
+    def search(self, query):
+        """Case- and accent-insensitive substring match on artist or title, in library order."""
+        if not query.strip():
+            return self._results(range(len(self._docs)))
+        needle = normalize_search_text(query)
+        if not needle:
+            return [] # Only punctuation or "feat."
+        if len(needle) < MIN_GRAM_QUERY:
+            return self._results(range(len(self._docs)), needle)
+        return self._results(self._trigram_candidates(needle), needle)
+
+    def _trigram_candidates(self, needle):
+        """A superset of the documents containing needle (len >= MIN_GRAM_QUERY), from the trigram postings."""
+        postings = []
+        for gram in _trigrams(needle):
+            p = self._trigrams.get(gram)
+            if p is None:
+                return set() # A trigram nobody has: no match possible
+            postings.append(p)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for p in postings[1:]:
+            if len(candidates) <= INTERSECT_UNTIL or len(p) > 16 * len(candidates):
+                break # Cheaper to verify the remaining candidates directly
+            candidates.intersection_update(p)
+        return candidates
+
+    def search_query(self, query):
+        """
+        Run a parsed core.query_parser.SearchQuery, in library order. Each clause is one index
+        lookup: artist/title words the token index (prefixes), genre the genre map, cost/year
+        a bisect into a sorted value array, free text the trigram postings. The results are
+        intersected smallest first and only the survivors are checked against their keys.
+        """
+        lookups = []
+        for field, words in query.fields:
+            if field == 'genre':
+                lookups.append(self._genre_docs(words))
+            else:
+                lookups.extend(self._prefix_postings(word) for word in words)
+        for field, low, high in query.ranges:
+            lookups.append(range_lookup(self._range_index(field), low, high))
+        if len(query.text) >= MIN_GRAM_QUERY:
+            lookups.append(self._trigram_candidates(query.text))
+        candidates = intersect_smallest_first(lookups) if lookups else range(len(self._docs))
+        keys, checks = self._match_keys, query.key_checks()
+        return self._results(doc_id for doc_id in candidates if query.matches_key(keys[doc_id], checks))
+
+    def _genre_docs(self, words):
+        genres = self._field_indexes.get('genre')
+        if genres is None:
+            genres = {}
+            for doc_id, video in enumerate(self._docs):
+                if video is not None:
+                    genres.setdefault(normalize_search_text(video['genre']), []).append(doc_id)
+            self._field_indexes['genre'] = genres
+        doc_ids = set()
+        for genre, genre_docs in genres.items():
+            if words_match(words, genre):
+                doc_ids.update(genre_docs)
+        return doc_ids
+
+    def _range_index(self, field):
+        key = (field, Track.default_cost) if field == 'cost' else field # Tracks without a cost follow the setting
+        range_index = self._field_indexes.get(key)
+        if range_index is None:
+            range_index = self._field_indexes[key] = sorted_range_index(
+                (doc_id, video[field]) for doc_id, video in enumerate(self._docs)
+                if video is not None and video.get(field) is not None)
+        return range_index
+
+    def invalidate_field_indexes(self):
+        """Call after changing indexed fields (genre, cost, year) of documents in place."""
+        self._field_indexes = {}
+
+    def search_fuzzy(self, query, limit=FUZZY_LIMIT, budget_s=FUZZY_BUDGET_S):
+        """Typo-tolerant search (see fuzzy_rank), best match first. For queries an exact search found nothing for."""
+        needle = normalize_search_text(query)
+        if len(needle) < MIN_GRAM_QUERY:
+            return []
+        docs, hidden = self._docs, self._hidden
+        doc_ids = fuzzy_rank(needle, self._trigrams.get, self._match_keys.__getitem__,
+                             lambda doc_id: docs[doc_id] is not None and not hidden[doc_id],
+                             self._sort_keys.__getitem__, limit, budget_s)
+        return [docs[doc_id] for doc_id in doc_ids]
+
+    def search_tokens(self, query):
+        """Whole-word match: every query word must be a word of artist/title (the last one may be a prefix)."""
+        words = TOKEN_RE.findall(normalize_search_text(query))
+        if not words:
+            return self.search(query)
+        candidates = None
+        for i, word in enumerate(words):
+            if i == len(words) - 1:
+                doc_ids = self._prefix_postings(word)
+            else:
+                doc_ids = set(self._tokens.get(word, ()))
+            candidates = doc_ids if candidates is None else candidates & doc_ids
+            if not candidates:
+                return []
+        return self._results(candidates)
+
+    def _prefix_postings(self, prefix):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._tokens)
+        vocabulary = self._vocabulary
+        doc_ids = set()
+        i = bisect.bisect_left(vocabulary, prefix)
+        while i < len(vocabulary) and vocabulary[i].startswith(prefix):
+            doc_ids.update(self._tokens[vocabulary[i]])
+            i += 1
+        return doc_ids
+
+    def export_postings(self, videos):
+        """
+        The postings renumbered to positions in videos (the library order), for writing the
+        binary library index: ({trigram: [ids]}, {token: [ids]}), ids ascending.
+        Documents that are not in videos are left out.
+        """
+        renumber = array('i', [-1]) * len(self._docs)
+        for position, video in enumerate(videos):
+            doc_id = self._doc_by_path.get(video['path'])
+            if doc_id is not None:
+                renumber[doc_id] = position
+        if renumber == array('i', range(len(videos))):
+            return dict(self._trigrams), dict(self._tokens) # Indexed in this order already (e.g. after a scan)
+
+        def convert(table):
+            converted = {}
+            for key, postings in table.items():
+                ids = sorted(renumber[doc_id] for doc_id in postings if renumber[doc_id] >= 0)
+                if ids:
+                    converted[key] = ids
+            return converted
+
+        return convert(self._trigrams), convert(self._tokens)
+
+    def filter(self, videos, query):
+        """Substring-match a given list of videos (e.g. narrowing a previous result set)."""
+        if not query.strip():
+            return list(videos)
+        needle = normalize_search_text(query)
+        if not needle:
+            return []
+        return [video for video in videos if needle in self.match_key(video)]
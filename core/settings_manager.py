@@ -1,13 +1,34 @@
 # core/settings_manager.py
 import json
 import os
+import time
 import hashlib # For password hashing
+import threading
 
 DEFAULT_CONFIG_PATH = "config.json"
+SAVE_DELAY_S = 0.5 # Write-behind: a burst of changes is written once, this long after the last one
 
 class SettingsManager:
-    def __init__(self, config_path=DEFAULT_CONFIG_PATH):
+    """
+    Settings with write-behind persistence.
+
+    set() and save_settings() only mark the settings dirty; a background writer waits
+    until changes have been quiet for SAVE_DELAY_S and then writes config.json once,
+    atomically (temp file + fsync + os.replace), so a crash mid-write leaves the previous
+    file intact instead of a torn one. Call flush() at exit to write pending changes now.
+    write_behind=False restores synchronous saves.
+    """
+    def __init__(self, config_path=DEFAULT_CONFIG_PATH, write_behind=True, save_delay_s=SAVE_DELAY_S):
         self.config_path = config_path
+        self.write_behind = write_behind
+        self.save_delay_s = save_delay_s
+        self._cond = threading.Condition() # Guards the pending-save state below
+        self._write_lock = threading.Lock()  # Serializes file writes (writer thread vs. flush)
+        self._save_pending = False
+        self._last_change = 0.0
+        self._generation = 0          # Bumped for every snapshot taken for writing
+        self._written_generation = 0  # Newest snapshot on disk; older ones are never written over it
+        self._writer = None
         self.settings = self._load_defaults()
         self.load_settings()
 
@@ -26,6 +47,22 @@ class SettingsManager:
             "blocked_artists": [],
             "blocked_genres": [],
             "blocked_tracks": [],
+            "blocked_path_patterns": [], # "glob:*/Explicit/*" (default) or "re:<regex>", matched with '/' separators
+            "library_catalog_file": os.path.join(os.getcwd(), "library_catalog.sqlite3"), # Persistent scan cache
+            "library_index_file": os.path.join(os.getcwd(), "library_index.bin"), # Memory-mapped library for a fast start
+            "scan_worker_count": 8, # Parallel directory listings during a library scan
+            "library_watch_mode": "auto", # "auto" (inotify, else polling), "inotify", "poll" or "off"
+            "library_watch_debounce_ms": 1500,
+            "library_watch_poll_interval_s": 10,
+            "metadata_extraction": True, # Read tags/duration embedded in MP4/Matroska files in the background
+            "metadata_worker_count": 2, # Processes reading file metadata
+            "search_mode": "index", # "index" (substring via trigrams), "tokens" (whole words) or "linear"
+            "fuzzy_search": True, # When nothing matches exactly, retry tolerating typos (ranked by closeness)
+            "fuzzy_search_budget_ms": 50, # Time limit for one fuzzy search
+            "album_art_cache_dir": os.path.join(os.getcwd(), "art_cache"), # Resized album art thumbnails
+            "album_art_memory_mb": 32, # Decoded album art kept in memory
+            "initial_credits": 20, # Balance on first start; afterwards the state journal restores it
+            "state_journal_dir": os.path.join(os.getcwd(), "state"), # Crash-safe journal of credits and queue
             "last_screen_positions": {} # To store window positions
         }
 
@@ -48,19 +85,91 @@ class SettingsManager:
         except Exception as e:
             print(f"Error loading settings: {e}. Using defaults.")
             self.settings = self._load_defaults() # Revert to full defaults on error
+            if os.path.exists(self.config_path):
+                # Keep the unreadable file: the next save would otherwise replace it with defaults
+                try:
+                    os.replace(self.config_path, f"{self.config_path}.bad")
+                except OSError:
+                    pass
 
     def save_settings(self):
-        try:
-            with open(self.config_path, 'w') as f:
-                json.dump(self.settings, f, indent=4)
-        except Exception as e:
-            print(f"Error saving settings: {e}")
+        """Persist the settings: scheduled on the writer thread in write-behind mode, else written now."""
+        if self.write_behind:
+            self._schedule_save()
+        else:
+            self._write_now()
+
+    def flush(self):
+        """Write any pending changes now, on the calling thread. Call at exit; safe to call again."""
+        with self._cond:
+            snapshot = self._take_snapshot() if self._save_pending else None
+            self._save_pending = False
+        if snapshot is None:
+            with self._write_lock:
+                pass # Nothing new, but let a write the writer thread has started finish
+            return
+        self._write(*snapshot)
+
+    def _write_now(self):
+        with self._cond:
+            self._save_pending = False
+            snapshot = self._take_snapshot()
+        self._write(*snapshot)
+
+    def _schedule_save(self):
+        with self._cond:
+            self._save_pending = True
+            self._last_change = time.monotonic()
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="SettingsWriter", daemon=True)
+                self._writer.start()
+            self._cond.notify()
+
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                while not self._save_pending:
+                    self._cond.wait()
+                while True: # Debounce: wait for the changes to go quiet
+                    remaining = self._last_change + self.save_delay_s - time.monotonic()
+                    if remaining <= 0 or not self._save_pending:
+                        break
+                    self._cond.wait(remaining)
+                if not self._save_pending:
+                    continue # flush() got there first
+                self._save_pending = False
+                snapshot = self._take_snapshot()
+            self._write(*snapshot)
+
+    def _take_snapshot(self):
+        # Caller holds self._cond. Shallow copy: cheap, and set() replaces values rather than mutating them.
+        self._generation += 1
+        return self._generation, dict(self.settings)
+
+    def _write(self, generation, settings):
+        with self._write_lock:
+            if generation <= self._written_generation:
+                return # A newer snapshot is already on disk
+            tmp_path = f"{self.config_path}.tmp"
+            try:
+                data = json.dumps(settings, indent=4)
+                with open(tmp_path, 'w') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.config_path) # Atomic: readers see the old file or the new one
+                self._written_generation = generation
+            except Exception as e:
+                print(f"Error saving settings: {e}")
 
     def get(self, key, default=None):
         return self.settings.get(key, default)
 
     def set(self, key, value):
-        self.settings[key] = value
+        with self._cond:
+            self.settings[key] = value
+        if self.write_behind:
+            self._schedule_save()
 
     def hash_password(self, password):
         if password is None:
@@ -74,5 +183,6 @@ class SettingsManager:
         return self.hash_password(password_attempt) == self.settings.get("admin_password_hash")
 
     def set_admin_password(self, new_password):
-        self.settings["admin_password_hash"] = self.hash_password(new_password)
-        self.save_settings()
\ No newline at end of file
+        with self._cond:
+            self.settings["admin_password_hash"] = self.hash_password(new_password)
+        self.save_settings() # Persisted in either mode, unlike a plain set()
\ No newline at end of file
@@ -0,0 +1,253 @@
+# core/state_journal.py
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger("VideoJukebox.StateJournal")
+
+JOURNAL_FILE = "journal.log"
+SNAPSHOT_FILE = "snapshot.json"
+FSYNC_INTERVAL_S = 0.05   # Group commit window: records written within it share one fsync
+SNAPSHOT_EVERY = 500      # Compact into a new snapshot after this many journal records
+SNAPSHOT_VERSION = 1
+
+# What is kept of a queued song; enough to re-queue it before the library scan has run
+SONG_FIELDS = ("id", "path", "artist", "title", "genre", "cost", "duration_ms")
+
+
+def _song_record(song_info):
+    return {key: song_info[key] for key in SONG_FIELDS if song_info.get(key) is not None}
+
+
+def _write_atomic(path, data):
+    """Write bytes to path via temp file + fsync + os.replace, so readers see old or new, never half."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_directory(os.path.dirname(path))
+
+
+def _fsync_directory(directory):
+    if os.name == 'nt':
+        return # Directories cannot be opened for fsync on Windows; os.replace is durable enough there
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        logger.debug(f"Could not fsync directory {directory}: {e}")
+
+
+class StateJournal:
+    """
+    Write-ahead journal for the state a crash must not lose: the credit balance and the play queue.
+
+    Every credit change and queue mutation is appended as one JSON line to journal.log
+    and handed to the OS immediately; a background thread fsyncs at most every
+    FSYNC_INTERVAL_S, so a burst of changes costs one disk flush. Every SNAPSHOT_EVERY
+    records (and on a clean exit) the full state is written to snapshot.json atomically
+    and the journal is truncated.
+
+    Startup: load() = snapshot + replay of the journal (a torn last line from a crash is
+    dropped), then the caller rebuilds CreditManager and the queue from the result and
+    calls attach() + snapshot() so recording resumes from a compact state.
+    """
+
+    def __init__(self, directory, fsync_interval_s=FSYNC_INTERVAL_S, snapshot_every=SNAPSHOT_EVERY):
+        self.directory = directory
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.fsync_interval_s = fsync_interval_s
+        self.snapshot_every = snapshot_every
+        self._seq = 0                    # Sequence number of the last record written
+        self._records_since_snapshot = 0
+        self._file = None
+        self._write_lock = threading.Lock()  # Guards the file object (writes vs. rotation)
+        self._sync_lock = threading.Lock()   # Held around fsync and rotation so fsync never sees a closed fd
+        self._dirty = threading.Event()
+        self._closing = False
+        self._flusher = None
+        self._credit_manager = None
+        self._play_queue = None
+        os.makedirs(directory, exist_ok=True)
+
+    # --- Startup ---
+    def load(self):
+        """Return the last durable state: {'credits': int or None, 'queue': [song dict, ...]}."""
+        started_at = time.perf_counter()
+        credits, queue = None, {}  # queue: entry id -> song (dicts keep insertion order)
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                if snapshot.get("version") == SNAPSHOT_VERSION:
+                    self._seq = snapshot.get("seq", 0)
+                    credits = snapshot.get("credits")
+                    queue = {entry["entry"]: entry["song"] for entry in snapshot.get("queue", [])}
+                else:
+                    logger.warning(f"Ignoring snapshot with unknown version {snapshot.get('version')}.")
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error(f"Could not read state snapshot {self.snapshot_path}: {e}")
+
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            good_bytes = 0
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("incomplete record")
+                        record = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Dropping torn journal tail at byte {good_bytes}.")
+                        break
+                    good_bytes += len(line)
+                    if record.get("seq", 0) <= self._seq:
+                        continue # Already folded into the snapshot (crash between snapshot and truncate)
+                    self._seq = record["seq"]
+                    credits = self._apply(record, credits, queue)
+                    replayed += 1
+            if good_bytes < os.path.getsize(self.journal_path):
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(good_bytes)
+
+        logger.info(f"State loaded in {(time.perf_counter() - started_at) * 1000:.1f} ms "
+                    f"({replayed} journal records replayed, credits={credits}, {len(queue)} queued).")
+        return {"credits": credits, "queue": list(queue.values())}
+
+    @staticmethod
+    def _apply(record, credits, queue):
+        op = record.get("op")
+        if op == "credits":
+            return record["balance"]
+        if op == "queue_add":
+            queue[record["entry"]] = record["song"]
+            if record.get("before") in queue:
+                StateJournal._move_before(queue, record["entry"], record["before"])
+        elif op == "queue_remove":
+            queue.pop(record["entry"], None)
+        elif op == "queue_move":
+            if record["entry"] in queue:
+                StateJournal._move_before(queue, record["entry"], record.get("before"))
+        else:
+            logger.warning(f"Unknown journal record: {record}")
+        return credits
+
+    @staticmethod
+    def _move_before(queue, entry_id, before_id):
+        song = queue.pop(entry_id)
+        if before_id not in queue:
+            queue[entry_id] = song
+            return
+        items = list(queue.items())
+        queue.clear()
+        for key, value in items:
+            if key == before_id:
+                queue[entry_id] = song
+            queue[key] = value
+
+    # --- Recording ---
+    def attach(self, credit_manager, play_queue):
+        """Start journaling changes to the credit balance and the play queue."""
+        self._credit_manager = credit_manager
+        self._play_queue = play_queue
+        credit_manager.on_balance_changed = self._on_balance_changed
+        play_queue.add_listener(self._on_queue_changed)
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="StateJournalFlusher", daemon=True)
+            self._flusher.start()
+
+    def _on_balance_changed(self, balance):
+        self.append({"op": "credits", "balance": balance})
+
+    def _on_queue_changed(self, op, entry, before_entry_id=None):
+        if op == "add":
+            self.append({"op": "queue_add", "entry": entry.entry_id, "before": before_entry_id,
+                         "song": _song_record(entry.song_info)})
+        elif op == "remove":
+            self.append({"op": "queue_remove", "entry": entry.entry_id})
+        elif op == "move":
+            self.append({"op": "queue_move", "entry": entry.entry_id, "before": before_entry_id})
+
+    def append(self, record):
+        """Append one record. It reaches the OS now and the disk within fsync_interval_s."""
+        with self._write_lock:
+            if self._closing:
+                return
+            self._seq += 1
+            record["seq"] = self._seq
+            try:
+                if self._file is None:
+                    self._file = open(self.journal_path, 'ab')
+                self._file.write(json.dumps(record, separators=(',', ':')).encode('utf-8') + b"\n")
+                self._file.flush()
+            except OSError as e:
+                logger.error(f"Could not append to state journal: {e}")
+                return
+            self._records_since_snapshot += 1
+        self._dirty.set()
+        if self._records_since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def _flush_loop(self):
+        while not self._closing:
+            self._dirty.wait()
+            time.sleep(self.fsync_interval_s) # Let the burst finish; one fsync covers all of it
+            self._dirty.clear()
+            self.sync()
+
+    def sync(self):
+        """fsync everything appended so far."""
+        with self._sync_lock:
+            with self._write_lock:
+                fd = self._file.fileno() if self._file is not None else None
+            if fd is not None:
+                try:
+                    os.fsync(fd)
+                except (OSError, ValueError) as e:
+                    logger.error(f"State journal fsync failed: {e}")
+
+    # --- Compaction ---
+    def snapshot(self):
+        """Write the attached state as a new snapshot and truncate the journal."""
+        if self._credit_manager is None or self._play_queue is None:
+            return False
+        state = {
+            "version": SNAPSHOT_VERSION,
+            "credits": self._credit_manager.get_balance(),
+            "queue": [{"entry": entry.entry_id, "song": _song_record(entry.song_info)}
+                      for entry in self._play_queue],
+        }
+        with self._sync_lock, self._write_lock:
+            state["seq"] = self._seq
+            try:
+                _write_atomic(self.snapshot_path, json.dumps(state, separators=(',', ':')).encode('utf-8'))
+                if self._file is not None:
+                    self._file.close()
+                self._file = open(self.journal_path, 'wb') # Truncate: the snapshot covers it all
+                self._records_since_snapshot = 0
+            except OSError as e:
+                logger.error(f"Could not write state snapshot: {e}")
+                return False
+        logger.debug(f"State snapshot written at seq {state['seq']} ({len(state['queue'])} queued).")
+        return True
+
+    def close(self):
+        """Compact, fsync and stop recording. Safe to call more than once."""
+        if self._closing:
+            return
+        self.snapshot()
+        self.sync()
+        with self._sync_lock, self._write_lock:
+            self._closing = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        self._dirty.set() # Wake the flusher so it can exit
@@ -0,0 +1,139 @@
+# core/track.py
+import sys
+from collections.abc import MutableMapping, Sequence
+
+# Mapping keys; each is also the attribute name ('cost' is a property so tracks can share the default cost)
+_FIELDS = frozenset(('id', 'artist', 'title', 'path', 'genre', 'cost', 'year', 'duration_ms', 'metadata_source',
+                     'video_tracks', 'audio_tracks', 'media_error', 'media_validated'))
+_FIELD_ORDER = ('id', 'artist', 'title', 'path', 'genre', 'cost', 'year', 'duration_ms', 'metadata_source',
+                'video_tracks', 'audio_tracks', 'media_error', 'media_validated')
+_INTERNED = frozenset(('artist', 'genre', 'metadata_source')) # Few distinct values, repeated across many tracks
+
+
+class Track(MutableMapping):
+    """
+    One library track. A __slots__ record instead of a dict: no per-instance dict, artist
+    and genre strings interned (one copy per distinct value) and the cost shared through
+    Track.default_cost unless a track has its own.
+
+    It is still a MutableMapping, so code written for the old video dicts keeps working:
+    track['artist'], track.get('duration_ms'), 'year' in track, track['media_error'] = ...
+    Optional fields (year, duration_ms, ...) hold None until set, and a None field counts
+    as absent ('year' in track is False, like a missing dict key); keys that are not
+    fields go to a small overflow dict created on first use.
+    """
+    __slots__ = ('id', 'artist', 'title', 'path', 'genre', '_cost', 'year', 'duration_ms',
+                 'metadata_source', 'video_tracks', 'audio_tracks', 'media_error', 'media_validated', '_extra')
+
+    default_cost = 1 # MusicLibrary sets this from the "default_credit_cost" setting
+
+    def __init__(self, track_id, artist, title, path, genre, cost=None):
+        self.id = track_id
+        self.artist = sys.intern(artist)
+        self.title = title
+        self.path = path
+        self.genre = sys.intern(genre)
+        self._cost = cost # None: use Track.default_cost
+        self.year = self.duration_ms = self.metadata_source = None
+        self.video_tracks = self.audio_tracks = self.media_error = self.media_validated = None
+        self._extra = None
+
+    @property
+    def cost(self):
+        return Track.default_cost if self._cost is None else self._cost
+
+    @cost.setter
+    def cost(self, value):
+        self._cost = value
+
+    @property
+    def own_cost(self):
+        """The track's own cost, or None when it uses Track.default_cost."""
+        return self._cost
+
+    # --- Mapping protocol ---
+    def __getitem__(self, key):
+        if key in _FIELDS:
+            value = getattr(self, key)
+            if value is None:
+                raise KeyError(key)
+            return value
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in _FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self._extra.get(key, default) if self._extra is not None else default
+
+    def __contains__(self, key):
+        if key in _FIELDS:
+            return getattr(self, key) is not None
+        return self._extra is not None and key in self._extra
+
+    def __setitem__(self, key, value):
+        if key in _FIELDS:
+            if key in _INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key == 'cost':
+            self._cost = None # Back to the shared default
+            return
+        if key in _FIELDS:
+            if getattr(self, key) is None:
+                raise KeyError(key)
+            setattr(self, key, None)
+            return
+        try:
+            del self._extra[key]
+        except (KeyError, TypeError):
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        for key in _FIELD_ORDER:
+            if getattr(self, key) is not None:
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    # A track is one library entry, not a value: compare and hash by identity (Mapping would
+    # compare field by field and make it unhashable), so tracks work in sets and as dict keys
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        return f"Track({dict(self)!r})"
+
+
+class ReadOnlyList(Sequence):
+    """Read-only view of a list, handed out instead of a copy. Use sorted()/list() to get a mutable copy."""
+    __slots__ = ('_items',)
+
+    def __init__(self, items):
+        self._items = items
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __repr__(self):
+        return f"ReadOnlyList({len(self._items)} items)"
@@ -0,0 +1,165 @@
+# core/track_columns.py
+import random
+import logging
+from array import array
+from core.track import Track
+
+try:
+    import numpy as np
+except ImportError: # Optional: the same queries run as plain Python loops without it
+    np = None
+
+logger = logging.getLogger("VideoJukebox.TrackColumns")
+
+UNKNOWN_CODE = -1 # Code of a genre/artist that is not in the library
+DEFAULT_COST = -1 # Cost column value of a track without its own cost: Track.default_cost, resolved when filtering
+
+
+class TrackColumns:
+    """
+    Parallel columns over a track list (MusicLibrary.all_videos, same order) for bulk filtering.
+
+    cost, duration_ms, genre code, artist code, last played (epoch seconds) and the
+    blocked flag live in NumPy arrays when NumPy is installed, so a filter such as
+    "genre = Rock, cost <= balance, not blocked, not played in the last hour" is a handful
+    of vectorized comparisons over 100k tracks. Without NumPy the same columns are
+    array.array and filters are evaluated in a single Python pass.
+
+    Built in one pass when the track list changes; per-track updates (a play, new
+    metadata, a rule change) are O(1) or one column-wide assignment.
+    """
+
+    def __init__(self, tracks, blocked=None, play_stats=None, rows=None):
+        """
+        play_stats: {track id: (play_count, last_played)}. rows: (id, own cost or None, duration_ms,
+        genre, artist) per track, read instead of the tracks themselves (see MappedLibraryIndex.column_rows).
+        """
+        self.tracks = tracks
+        play_stats = play_stats or {}
+        self.genre_codes = {}   # casefolded genre -> code
+        self.artist_codes = {}  # casefolded artist -> code
+        self._index_by_id = {}
+        if rows is None:
+            rows = ((track['id'], self._own_cost(track), track.get('duration_ms') or 0, track['genre'], track['artist'])
+                    for track in tracks)
+        cost, duration, genre, artist, last_played = [], [], [], [], []
+        genre_code_of, artist_code_of = {}, {} # Exact value -> code, saves casefolding every row
+        for index, (track_id, track_cost, duration_ms, track_genre, track_artist) in enumerate(rows):
+            self._index_by_id[track_id] = index
+            cost.append(DEFAULT_COST if track_cost is None else track_cost)
+            duration.append(duration_ms)
+            code = genre_code_of.get(track_genre)
+            if code is None:
+                code = genre_code_of[track_genre] = self._code(self.genre_codes, track_genre)
+            genre.append(code)
+            code = artist_code_of.get(track_artist)
+            if code is None:
+                code = artist_code_of[track_artist] = self._code(self.artist_codes, track_artist)
+            artist.append(code)
+            last_played.append(play_stats.get(track_id, (0, 0.0))[1])
+        blocked = blocked if blocked is not None else [False] * len(tracks)
+        if np is not None:
+            self.cost = np.array(cost, dtype=np.int32)
+            self.duration_ms = np.array(duration, dtype=np.int64)
+            self.genre = np.array(genre, dtype=np.int32)
+            self.artist = np.array(artist, dtype=np.int32)
+            self.last_played = np.array(last_played, dtype=np.float64)
+            self.blocked = np.array(blocked, dtype=bool)
+        else:
+            self.cost = array('i', cost)
+            self.duration_ms = array('q', duration)
+            self.genre = array('i', genre)
+            self.artist = array('i', artist)
+            self.last_played = array('d', last_played)
+            self.blocked = bytearray(1 if b else 0 for b in blocked)
+
+    def __len__(self):
+        return len(self.tracks)
+
+    @staticmethod
+    def _own_cost(track):
+        # Not track['cost']: that is Track.default_cost already resolved, and the default can change
+        return track.own_cost if isinstance(track, Track) else track.get('cost')
+
+    @staticmethod
+    def _code(codes, value):
+        key = (value or "").casefold()
+        code = codes.get(key)
+        if code is None:
+            code = codes[key] = len(codes)
+        return code
+
+    def index_of(self, track):
+        return self._index_by_id.get(track['id'])
+
+    # --- Updates ---
+    def set_blocked(self, flags):
+        """flags: one truthy/falsy value per track, in track order."""
+        if np is not None:
+            self.blocked = np.fromiter(flags, dtype=bool, count=len(self.tracks))
+        else:
+            self.blocked = bytearray(1 if flag else 0 for flag in flags)
+
+    def update_track(self, track):
+        """Refresh one track's metadata columns (duration, genre, artist, cost) after it changed."""
+        index = self.index_of(track)
+        if index is None:
+            return False
+        cost = self._own_cost(track)
+        self.cost[index] = DEFAULT_COST if cost is None else cost
+        self.duration_ms[index] = track.get('duration_ms') or 0
+        self.genre[index] = self._code(self.genre_codes, track['genre'])
+        self.artist[index] = self._code(self.artist_codes, track['artist'])
+        return True
+
+    def record_play(self, track, when):
+        index = self.index_of(track)
+        if index is not None:
+            self.last_played[index] = when
+
+    # --- Queries ---
+    def indices(self, max_cost=None, genre=None, artist=None, include_blocked=False,
+                played_before=None, max_duration_ms=None):
+        """
+        Indices (into tracks, ascending) of the tracks matching every given filter:
+        max_cost - cost <= max_cost (Track.default_cost for tracks without their own); genre/artist - case-insensitive equality;
+        played_before - never played, or last played before this epoch time;
+        max_duration_ms - known duration <= this (unknown durations pass).
+        """
+        genre_code = self.genre_codes.get(genre.casefold(), UNKNOWN_CODE) if genre is not None else None
+        artist_code = self.artist_codes.get(artist.casefold(), UNKNOWN_CODE) if artist is not None else None
+        if UNKNOWN_CODE in (genre_code, artist_code):
+            return []
+
+        if np is not None:
+            mask = np.ones(len(self.tracks), dtype=bool) if include_blocked else ~self.blocked
+            if max_cost is not None:
+                mask &= np.where(self.cost == DEFAULT_COST, Track.default_cost, self.cost) <= max_cost
+            if genre_code is not None:
+                mask &= self.genre == genre_code
+            if artist_code is not None:
+                mask &= self.artist == artist_code
+            if played_before is not None:
+                mask &= self.last_played < played_before
+            if max_duration_ms is not None:
+                mask &= self.duration_ms <= max_duration_ms
+            return np.flatnonzero(mask)
+
+        cost, genres, artists = self.cost, self.genre, self.artist
+        blocked, last_played, duration = self.blocked, self.last_played, self.duration_ms
+        default_cost = Track.default_cost
+        return [
+            i for i in range(len(self.tracks))
+            if (include_blocked or not blocked[i])
+            and (max_cost is None or (default_cost if cost[i] == DEFAULT_COST else cost[i]) <= max_cost)
+            and (genre_code is None or genres[i] == genre_code)
+            and (artist_code is None or artists[i] == artist_code)
+            and (played_before is None or last_played[i] < played_before)
+            and (max_duration_ms is None or duration[i] <= max_duration_ms)
+        ]
+
+    def sample(self, count, rng=random, **filters):
+        """Up to count random matching tracks (e.g. suggestions or autoplay picks)."""
+        matches = self.indices(**filters)
+        chosen = rng.sample(range(len(matches)), min(count, len(matches)))
+        return [self.tracks[int(matches[i])] for i in chosen]
@@ -1,22 +1,52 @@
 import os
 import vlc
+import time
 import platform
 import logging
+import threading
+from collections import deque
+from core.play_queue import PlayQueue
 
 logger = logging.getLogger("VideoJukebox.VideoPlayer")
 
+TRANSITION_GAP_BUDGET_MS = 100 # Logged as a warning when a transition takes longer
+PREPARSE_TIMEOUT_MS = 5000     # libVLC async parse of a newly queued file
+STOP_POLL_MS = 20              # A pre-roll waiting for the standby player to finish stopping checks again this often
+
 class VideoPlayer:
-    def __init__(self, settings_manager, on_media_list_player_event=None):
+    """
+    Double-buffered playback of the PlayQueue (head = the playing item), which is
+    mirrored into a VLC MediaList.
+
+    Two MediaPlayers take turns. While the active one plays index 0, the standby one
+    opens index 1 with :start-paused, so it has demuxed, decoded and drawn its first
+    frame into its own (hidden) drawable before the current video ends. At
+    EndReached the standby player is unpaused and its drawable raised, then the old
+    one is stopped in the background. No open/buffer/re-embed happens at the cut.
+
+    The gap from EndReached to the next player's Playing event is measured for
+    every transition (last_transition_gap_ms, transition_gaps_ms).
+    """
+
+    def __init__(self, settings_manager, on_media_list_player_event=None, event_bus=None, play_queue=None):
         self.settings_manager = settings_manager
         self.on_media_list_player_event = on_media_list_player_event
-        logger.info("Initializing VideoPlayer with MediaListPlayer approach.")
+        # libVLC calls our event handlers on its own thread. With an EventBus they only
+        # publish a record and the real work (_on_* methods) runs on the Tk thread.
+        self.event_bus = event_bus
+        if event_bus:
+            event_bus.subscribe("vlc.EndReached", lambda e: self._on_single_media_ended(e.data['player'], e.data['mrl'], e.time))
+            event_bus.subscribe("vlc.Playing", lambda e: self._on_player_playing(e.data['player'], e.time))
+            event_bus.subscribe("vlc.EncounteredError", lambda e: self._on_media_error(e.data['player']))
+            event_bus.subscribe("vlc.MediaParsed", lambda e: self._on_media_parsed(e.data['entry_id']))
+        logger.info("Initializing VideoPlayer with double-buffered MediaPlayers.")
         vlc_args = [
             "--no-qt-privacy-ask",
             "--no-metadata-network-access",
             "--no-stats",
             "--no-video-title-show",
         ]
-        log_file_path = "vlc_native_from_class.txt" 
+        log_file_path = "vlc_native_from_class.txt"
         vlc_args.extend([
             "--verbose=2",
             f"--logfile={log_file_path}",
@@ -27,14 +57,13 @@ class VideoPlayer:
             logger.info(f"Attempting vlc.Instance with args: {vlc_args}")
             self.instance = vlc.Instance(vlc_args)
             logger.info(f"VLC Instance CREATED: {self.instance}")
-            import time
             time.sleep(0.2)
             logger.info("Short delay after VLC Instance creation.")
         except Exception as e:
             logger.error(f"Failed to create VLC instance with args {vlc_args}: {e}", exc_info=True)
             raise RuntimeError(f"Could not initialize VLC Instance for VideoPlayer. Args: {vlc_args}") from e
 
-        # Create the VLC MediaList and MediaListPlayer
+        # The PlayQueue (shared with QueueManager) is the play queue; the VLC MediaList mirrors it
         self.media_list = self.instance.media_list_new()
         if self.media_list is None:
             logger.error("self.instance.media_list_new() FAILED (returned None).")
@@ -43,184 +72,364 @@ class VideoPlayer:
             raise RuntimeError("Could not create VLC MediaList.")
         else:
             logger.info(f"VLC MediaList CREATED: {self.media_list}")
-
-        self.ml_player = self.instance.media_list_player_new()
-        if not self.ml_player:
-            logger.error("Failed to create VLC MediaListPlayer.")
-            if self.instance:
-                self.instance.release()
-            if self.media_list:
-                self.media_list.release()
-            raise RuntimeError("Could not create VLC MediaListPlayer.")
-        logger.info(f"VLC MediaListPlayer CREATED: {self.ml_player}")
-
-        # Tell the MediaListPlayer to use that list
-        self.ml_player.set_media_list(self.media_list)
-
-        # Grab the underlying MediaPlayer so we can embed, attach events, etc.
-        self.media_player = self.ml_player.get_media_player()
-        if not self.media_player:
-            logger.error("Failed to get MediaPlayer from MediaListPlayer.")
-            if self.instance:
-                self.instance.release()
-            if self.media_list:
-                self.media_list.release()
-            if self.ml_player:
-                self.ml_player.release()
-            raise RuntimeError("Could not get MediaPlayer from MediaListPlayer.")
-        logger.info(f"Underlying MediaPlayer obtained: {self.media_player}")
+        self.play_queue = play_queue if play_queue is not None else PlayQueue()
+        self.play_queue.attach_media_list(self.media_list)
+        self.play_queue.add_listener(self._on_queue_changed)
+
+        # Two MediaPlayers: one active, one pre-rolling the next item
+        self.players = [self.instance.media_player_new(), self.instance.media_player_new()]
+        if not all(self.players):
+            logger.error("Failed to create the VLC MediaPlayers.")
+            self.media_list.release()
+            self.instance.release()
+            raise RuntimeError("Could not create VLC MediaPlayers.")
+        self.active_index = 0
+        self.media_player = self.players[0]  # Always the active player
+        self.preroll_entry_id = None         # Queue entry opened (paused) on the standby player
+        self.drawable_widgets = [None, None] # Frame per player (may be the same frame)
+        self._stop_threads = [None, None]    # Per player: the thread running its blocking stop(), if any
+        self._preroll_after_id = None        # Pending after() retry of _preroll_next()
+        self._transition_started_at = None   # EndReached time of the transition being measured
+        self._pending_parses = {}            # queue entry id -> (vlc.Media, song_info) while libVLC parses it
+        self.last_transition_gap_ms = None
+        self.transition_gaps_ms = deque(maxlen=50)
 
         self.embedded_frame_widget_id = None
         self.current_song_info = None
 
-        # Attach VLC events
-        mlp_events = self.ml_player.event_manager()
-        if mlp_events:
-            mlp_events.event_attach(vlc.EventType.MediaListPlayerNextItemSet, self._handle_next_item_set)
-        else:
-            logger.warning("Could not get event manager for MediaListPlayer.")
-
-        player_events = self.media_player.event_manager()
-        if player_events:
-            player_events.event_attach(vlc.EventType.MediaPlayerEndReached, self._handle_single_media_ended)
-            player_events.event_attach(vlc.EventType.MediaPlayerEncounteredError, self._handle_media_error)
-        else:
-            logger.warning("Could not get event manager for underlying MediaPlayer.")
+        # Attach VLC events to both players
+        for index, player in enumerate(self.players):
+            player_events = player.event_manager()
+            if not player_events:
+                logger.warning(f"Could not get event manager for MediaPlayer {index}.")
+                continue
+            player_events.event_attach(vlc.EventType.MediaPlayerEndReached, self._handle_single_media_ended, index)
+            player_events.event_attach(vlc.EventType.MediaPlayerPlaying, self._handle_playing, index)
+            player_events.event_attach(vlc.EventType.MediaPlayerEncounteredError, self._handle_media_error, index)
         logger.info("VideoPlayer initialization complete.")
 
-    def _handle_next_item_set(self, event):
-        """
-        Called when VLC is about to start the next item in the list.
-        We re-embed the new MediaPlayer (so video still shows inside our Tk frame),
-        then fire our own “NextItemSet” event so the UI knows what’s about to play.
-        """
-        
-        logger.info(f"MediaListPlayer Event: NextItemSet received (event type: {event.type})")
-        # 1) Figure out the new MRL that VLC is about to play:
-        next_mrl = None
-        if self.media_player:
-            m = self.media_player.get_media()
+    @property
+    def standby_player(self):
+        return self.players[1 - self.active_index]
+
+    def _current_mrl(self, player=None):
+        """MRL of the media currently loaded in a player (default: the active one), or None."""
+        player = player or self.media_player
+        if player:
+            m = player.get_media()
             if m:
-                next_mrl = m.get_mrl()
-                logger.info(f"MediaListPlayer Event: NextItemSet. Current media on player MRL: {next_mrl}")
+                mrl = m.get_mrl()
                 m.release()
-            else:
-                logger.warning("MediaListPlayer Event: NextItemSet, but get_media() returned None.")
+                return mrl
+        return None
+
+    def _dispatch_vlc_event(self, event_type, handler, **data):
+        """Called on libVLC's thread: hand the event to the Tk thread (or handle inline without a bus)."""
+        if self.event_bus:
+            self.event_bus.publish(event_type, **data)
         else:
-            logger.warning("MediaListPlayer Event: NextItemSet, but self.media_player is None.")
+            handler(*data.values(), time.monotonic())
 
-        # 2) Re-embed the new media_player into our Tk frame (so the video actually shows)
-        if self.embedded_frame_widget_id:
-            try:
-                self._embed_player()
-            except Exception as e:
-                logger.error(f"Error with re-embedding on NextItemSet: {e}", exc_info=True)
+    # --- libVLC event thread: capture what we need and post, nothing else ---
+    def _handle_single_media_ended(self, event, index):
+        # Capture the finished MRL now, before anything else is loaded into the player
+        self._dispatch_vlc_event("vlc.EndReached", self._on_single_media_ended,
+                                 player=index, mrl=self._current_mrl(self.players[index]))
+
+    def _handle_playing(self, event, index):
+        self._dispatch_vlc_event("vlc.Playing", self._on_player_playing, player=index)
+
+    def _handle_media_parsed(self, event, entry_id):
+        if self.event_bus:
+            self.event_bus.publish("vlc.MediaParsed", entry_id=entry_id)
+        else:
+            self._on_media_parsed(entry_id)
+
+    def _handle_media_error(self, event, index):
+        if self.event_bus:
+            self.event_bus.publish("vlc.EncounteredError", player=index)
+        else:
+            self._on_media_error(index)
 
-        # 3) Notify the main app about “NextItemSet”:
+    # --- Tk thread ---
+    def _on_next_item_set(self, next_mrl):
+        """A new item started on the active player: tell the app what is playing now."""
+        if next_mrl:
+            logger.info(f"NextItemSet. Current media on player MRL: {next_mrl}")
+        else:
+            logger.warning("NextItemSet, but the player had no media.")
         if self.on_media_list_player_event:
             self.on_media_list_player_event(event_type="NextItemSet", mrl=next_mrl)
 
-    def _handle_single_media_ended(self, event):
+    def _on_single_media_ended(self, player_index, actual_mrl, ended_at):
         """
         Called when the current item finishes.
-        We remove index 0 from self.media_list (the video that just ended),
-        then fire the “SingleMediaEnded” event so the UI can pop it from the on-screen queue,
-        and finally call ml_player.play() again if there’s still something left.
-        and finally call ml_player.play_item_at_index(0) for the next item if there’s still something left.
+        We cut over to the pre-rolled next item first (that is the gap the viewer sees),
+        then drop the queue head (the video that just ended) and fire the
+        “SingleMediaEnded” and “NextItemSet” events so the UI can update.
         """
+        if player_index != self.active_index:
+            logger.debug(f"EndReached from standby player {player_index} ignored.")
+            return
         # 1) Log what just ended
         current_song_title = self.current_song_info.get('title', 'N/A') if self.current_song_info else 'Unknown'
         logger.info(f"MediaPlayer Event: MediaPlayerEndReached for item: {current_song_title}")
- 
-        # 2) Grab the actual MRL of the finished media
-        actual_mrl = None
-        if self.media_player:
-            m = self.media_player.get_media()
-            if m:
-                actual_mrl = m.get_mrl()
-                m.release()
 
-        # 3) Remove index 0 from VLC’s media_list (the just-played item)
-        if self.media_list and self.media_list.count() > 0:
-            self.media_list.lock()
-            try:
-                logger.debug(
-                    f"Removing finished item at index 0 from VLC MediaList "
-                    f"(MRL: {actual_mrl}). Count before removal: {self.media_list.count()}"
-                )
-                result = self.media_list.remove_index(0)
-                if result == 0:
-                    logger.info(
-                        f"Successfully removed finished item (was MRL: {actual_mrl}) "
-                        f"from VLC MediaList. New count: {self.media_list.count()}"
-                    )
-                else:
-                    logger.error(
-                        f"Failed to remove item at index 0 "
-                        f"(was MRL: {actual_mrl}) from VLC MediaList (error code: {result})."
-                    )
-            except Exception as e:
-                logger.error(f"Exception removing item from VLC MediaList: {e}", exc_info=True)
-            finally:
-                self.media_list.unlock()
+        # 2) Drop the just-played item from the queue (and VLC's media_list)
+        self._remove_head(actual_mrl)
 
-        # 4) Notify the app that “SingleMediaEnded” occurred
+        # 3) Switch to the next item right away
+        next_mrl = self._start_head(transition_started_at=ended_at)
+
+        # 4) Notify the app that “SingleMediaEnded” occurred, then what plays next
         if self.on_media_list_player_event:
             self.on_media_list_player_event(event_type="SingleMediaEnded", mrl=actual_mrl)
- 
-        # 5) If there’s still at least one item in the list, start index 0 via play_item_at_index
-        if self.media_list and self.media_list.count() > 0:
-            logger.info("_handle_single_media_ended: Next item exists; calling play_item_at_index(0).")
-            next_result = self.ml_player.play_item_at_index(0)
-            if next_result == 0:
-                logger.info("_handle_single_media_ended: play_item_at_index(0) succeeded for next item.")
+        if next_mrl:
+            self._on_next_item_set(next_mrl)
+
+    def _on_player_playing(self, player_index, playing_at):
+        if player_index != self.active_index:
+            return # The standby player reports Playing briefly while it pre-rolls
+        if self._transition_started_at is not None:
+            gap_ms = (playing_at - self._transition_started_at) * 1000.0
+            self._transition_started_at = None
+            self.last_transition_gap_ms = gap_ms
+            self.transition_gaps_ms.append(gap_ms)
+            if gap_ms > TRANSITION_GAP_BUDGET_MS:
+                logger.warning(f"Transition gap {gap_ms:.0f} ms (budget {TRANSITION_GAP_BUDGET_MS} ms).")
+            else:
+                logger.info(f"Transition gap {gap_ms:.0f} ms.")
+        self._preroll_next()
+
+    def _on_media_error(self, player_index):
+        logger.error(f"MediaPlayer Event: MediaPlayerEncounteredError (player {player_index}).")
+        if player_index != self.active_index:
+            self.preroll_entry_id = None # Cannot pre-roll it; the cut falls back to a plain play()
+            return
+        if self.on_media_list_player_event:
+            self.on_media_list_player_event(event_type="MediaError")
+
+    def _on_media_parsed(self, entry_id):
+        """
+        Background parse of a queued item finished. Cache duration and track info on the
+        track record (song_info is the library's video dict), and pull the item out of
+        the queue now if it cannot be played, instead of failing when it reaches the head.
+        """
+        pending = self._pending_parses.pop(entry_id, None)
+        if pending is None:
+            return
+        media, song_info = pending
+        try:
+            status = media.get_parsed_status()
+            if status == vlc.MediaParsedStatus.skipped:
+                return # Not a local file (or parsing disabled): nothing learned, play it as usual
+            if status == vlc.MediaParsedStatus.timeout:
+                # A slow or network share, not proof of a bad file: let it play and fail there if it must
+                logger.warning(f"Background parse of '{media.get_mrl()}' timed out after "
+                               f"{PREPARSE_TIMEOUT_MS} ms; it stays queued.")
+                return
+            video_tracks = audio_tracks = 0
+            for track in media.tracks_get() or ():
+                if track.type == vlc.TrackType.video:
+                    video_tracks += 1
+                elif track.type == vlc.TrackType.audio:
+                    audio_tracks += 1
+            duration_ms = media.get_duration()
+            if duration_ms and duration_ms > 0:
+                song_info['duration_ms'] = duration_ms
+                self.play_queue.invalidate_durations()
+            song_info['video_tracks'] = video_tracks
+            song_info['audio_tracks'] = audio_tracks
+
+            if status != vlc.MediaParsedStatus.done:
+                reason = "could not be parsed"
+            elif not (video_tracks or audio_tracks):
+                reason = "has no playable streams"
             else:
-                logger.error(
-                    f"_handle_single_media_ended: play_item_at_index(0) FAILED with code {next_result}."
-                )
+                song_info.pop('media_error', None)
+                song_info['media_validated'] = True # Opened by libVLC once: no need to parse it again
+                logger.info(f"Pre-parsed '{song_info.get('title', media.get_mrl())}': "
+                            f"{(duration_ms or 0) / 1000:.0f}s, {video_tracks} video / {audio_tracks} audio track(s).")
+                return
+            song_info['media_error'] = reason
+            logger.error(f"Queued media '{media.get_mrl()}' {reason}; removing it before it reaches playback.")
+            self._drop_invalid_entry(entry_id, media.get_mrl(), song_info)
+        finally:
+            media.release()
 
-    def _handle_media_error(self, event):
-        logger.error("MediaPlayer Event: MediaPlayerEncounteredError.")
+    def _drop_invalid_entry(self, entry_id, mrl, song_info):
+        if entry_id == self.play_queue.playing_entry_id:
+            return # Already the current item: the player's own error handling takes it from here
+        if self.play_queue.remove(entry_id) is not None and self.on_media_list_player_event:
+            self.on_media_list_player_event(event_type="MediaInvalid", mrl=mrl, song_info=song_info)
+
+    def _start_preparse(self, media, song_info, entry_id):
+        """Ask libVLC to parse a queued media in the background (duration, tracks, validity)."""
+        media_events = media.event_manager()
+        if not media_events:
+            return
+        media.retain() # Our reference, released in _on_media_parsed
+        self._pending_parses[entry_id] = (media, song_info)
+        media_events.event_attach(vlc.EventType.MediaParsedChanged, self._handle_media_parsed, entry_id)
+        if media.parse_with_options(vlc.MediaParseFlag.local, PREPARSE_TIMEOUT_MS) != 0:
+            logger.warning(f"Could not start background parse of {media.get_mrl()}.")
+            self._pending_parses.pop(entry_id, None)
+            media.release()
 
-    def set_embedding_widget(self, frame_widget):
-        """Call this once from PlayerUI to set the target frame."""
-        if frame_widget:
-            self.embedded_frame_widget_id = frame_widget.winfo_id()
-            logger.info(f"Embedding frame ID set: {self.embedded_frame_widget_id}")
-            if self.media_player and self.embedded_frame_widget_id:
-                self._embed_player()
+    # --- Queue / engine ---
+    def _on_queue_changed(self, op=None, entry=None, before_entry_id=None):
+        """PlayQueue listener: keep the pre-rolled item equal to the entry after the playing one."""
+        head = self.play_queue.head()
+        upcoming = (head.entry_id, head.next.entry_id if head.next else None) if head else ()
+        if self.preroll_entry_id is not None and self.preroll_entry_id not in upcoming:
+            self._cancel_preroll() # Removed or moved away: pre-roll whatever is next now
+        if self.preroll_entry_id is None and self.get_state() in [vlc.State.Playing, vlc.State.Opening, vlc.State.Buffering]:
+            self._preroll_next()
+
+    def _remove_head(self, actual_mrl=None):
+        finished = self.play_queue.pop_head()
+        if finished is not None:
+            logger.info(f"Removed finished item (was MRL: {actual_mrl or finished.mrl}) from the queue. "
+                        f"New count: {len(self.play_queue)}")
+
+    def _start_head(self, transition_started_at=None):
+        """Start the queue head: swap to the pre-rolled standby player if it holds it, else open it. Returns its MRL."""
+        head = self.play_queue.head()
+        if head is None:
+            return None
+        if self.preroll_entry_id == head.entry_id:
+            self.active_index = 1 - self.active_index
+            self.media_player = self.players[self.active_index]
+            self.media_player.set_pause(0) # First frame is already decoded and on screen (hidden)
+            self._raise_drawable(self.active_index)
+            self._stop_in_background(1 - self.active_index) # The player we just cut away from
+            logger.info(f"Gapless cut to pre-rolled item: {head.mrl}")
+        else:
+            # The standby player may hold a stale pre-roll (queue reordered since): stop and free it
+            self._stop_in_background(1 - self.active_index)
+            media = self.instance.media_new(head.mrl)
+            self.media_player.set_media(media)
+            media.release()
+            result = self.media_player.play()
+            self._raise_drawable(self.active_index)
+            if result != 0:
+                logger.error(f"play() FAILED with code {result} for {head.mrl}.")
+        self.preroll_entry_id = None
+        self.play_queue.playing_entry_id = head.entry_id
+        self._transition_started_at = transition_started_at
+        return head.mrl
+
+    def _preroll_next(self):
+        """Open the entry after the playing one paused on the standby player so the next cut is instant."""
+        head = self.play_queue.head()
+        upcoming = head.next if head else None
+        if upcoming is None or upcoming.entry_id == self.preroll_entry_id:
+            return
+        if self._is_stopping(1 - self.active_index):
+            self._retry_preroll_later() # Never wait for libVLC on the Tk thread
+            return
+        media = self.instance.media_new(upcoming.mrl)
+        media.add_option(":start-paused")
+        standby = self.standby_player
+        standby.set_media(media)
+        media.release()
+        standby.audio_set_volume(self.media_player.audio_get_volume())
+        if standby.play() == 0:
+            self.preroll_entry_id = upcoming.entry_id
+            logger.info(f"Pre-rolling next item: {upcoming.mrl}")
         else:
-            logger.error("set_embedding_widget called with None frame_widget.")
+            logger.warning(f"Could not pre-roll {upcoming.mrl}; the next cut will open it directly.")
+
+    def _retry_preroll_later(self):
+        """Poll from the Tk loop until the standby player has stopped, then pre-roll into it."""
+        widget = self.drawable_widgets[self.active_index]
+        if widget is None or self._preroll_after_id is not None:
+            return # Not embedded (no Tk loop to poll from) or already polling: the cut opens the item directly
+        def retry():
+            self._preroll_after_id = None
+            if self.players[0] is not None and self.get_state() in [vlc.State.Playing, vlc.State.Opening, vlc.State.Buffering]:
+                self._preroll_next()
+        try:
+            self._preroll_after_id = widget.after(STOP_POLL_MS, retry)
+        except Exception as e:
+            logger.warning(f"Could not schedule the pre-roll: {e}")
+
+    def _cancel_preroll(self):
+        if self.preroll_entry_id is not None:
+            self.preroll_entry_id = None
+            self._stop_in_background(1 - self.active_index)
+
+    def _is_stopping(self, index):
+        thread = self._stop_threads[index]
+        return thread is not None and thread.is_alive()
+
+    def _stop_in_background(self, index):
+        # libvlc_media_player_stop() blocks until the decoder threads are joined
+        if self._is_stopping(index):
+            return # Already on its way down; nothing has been opened on it since
+        thread = threading.Thread(target=self.players[index].stop, name=f"VLCStop{index}", daemon=True)
+        self._stop_threads[index] = thread
+        thread.start()
+
+    def _raise_drawable(self, index):
+        widget = self.drawable_widgets[index]
+        if widget is not None and widget is not self.drawable_widgets[1 - index]:
+            try:
+                widget.lift()
+            except Exception as e:
+                logger.warning(f"Could not raise video frame: {e}")
+
+    def play_next(self):
+        """Drop the current item (e.g. after a media error) and start the next one."""
+        self._remove_head(self._current_mrl())
+        if len(self.play_queue) == 0:
+            self.stop()
+            return None
+        next_mrl = self._start_head()
+        self._on_next_item_set(next_mrl)
+        return next_mrl
 
-    def _embed_player(self):
-        """Internal method to perform embedding using the stored ID."""
-        if self.media_player and self.embedded_frame_widget_id:
-            logger.debug(f"Attempting to embed MediaPlayer {self.media_player} into frame ID: {self.embedded_frame_widget_id}")
+    def set_embedding_widget(self, frame_widget):
+        """Use one frame for both players (no hidden pre-roll surface). See set_embedding_widgets()."""
+        self.set_embedding_widgets([frame_widget, frame_widget])
+
+    def set_embedding_widgets(self, frame_widgets):
+        """Call this once from PlayerUI with two stacked frames, one drawable per player."""
+        if not frame_widgets or not all(frame_widgets):
+            logger.error("set_embedding_widgets called without frame widgets.")
+            return
+        self.drawable_widgets = list(frame_widgets)
+        self.embedded_frame_widget_id = frame_widgets[0].winfo_id()
+        for index, player in enumerate(self.players):
+            self._embed_player(player, frame_widgets[index].winfo_id())
+        self._raise_drawable(self.active_index)
+
+    def _embed_player(self, player, widget_id):
+        """Internal method to perform embedding of one player into a window id."""
+        if player and widget_id:
+            logger.debug(f"Attempting to embed MediaPlayer {player} into frame ID: {widget_id}")
             try:
                 if platform.system() == "Linux":
-                    self.media_player.set_xwindow(self.embedded_frame_widget_id)
+                    player.set_xwindow(widget_id)
                 elif platform.system() == "Windows":
-                    self.media_player.set_hwnd(self.embedded_frame_widget_id)
+                    player.set_hwnd(widget_id)
                 elif platform.system() == "Darwin":
-                    self.media_player.set_nsobject(self.embedded_frame_widget_id)
-                logger.info(f"MediaPlayer embedding setup for frame ID: {self.embedded_frame_widget_id}")
+                    player.set_nsobject(widget_id)
+                logger.info(f"MediaPlayer embedding setup for frame ID: {widget_id}")
             except Exception as e:
                 logger.error(f"Error during MediaPlayer embedding: {e}", exc_info=True)
 
     def add_to_playlist(self, video_path, song_info):
+        """Queue a video at the end of the play queue. Returns the new queue entry id, or False."""
         logger.info(f"ADD_TO_PLAYLIST CALLED FOR: {video_path}")
 
-        if self.instance is None or self.ml_player is None or self.media_list is None:
+        if self.instance is None or self.media_list is None:
             logger.error("ADD_TO_PLAYLIST: one of the VLC objects is None. Cannot proceed.")
             return False
-
-        if not bool(self.instance) or not bool(self.ml_player):
-            logger.error("ADD_TO_PLAYLIST: VLC wrapper objects exist but evaluate to False. Cannot proceed.")
+        if song_info.get('media_error'):
+            logger.error(f"ADD_TO_PLAYLIST: '{video_path}' was flagged earlier ({song_info['media_error']}). Not queueing it.")
             return False
 
-        if not bool(self.media_list):
-            logger.warning("ADD_TO_PLAYLIST: self.media_list (empty) is False, but VLC can still add media to an empty list.")
-
         try:
             media = self.instance.media_new(video_path)
             if not media:
@@ -228,117 +437,126 @@ class VideoPlayer:
                 return False
 
             media.set_meta(vlc.Meta.NowPlaying, f"{song_info.get('artist','')} - {song_info.get('title','')}")
-            logger.debug(f"ADD_TO_PLAYLIST: Attempting self.media_list.add_media() for {media.get_mrl()}")
-            result_add = self.media_list.add_media(media)
-            media.release()
-
-            if result_add == 0:
-                logger.info(f"Successfully added '{video_path}' to self.media_list. VLC MediaList count: {self.media_list.count()}")
-                return True
-            else:
-                logger.error(f"ADD_TO_PLAYLIST: self.media_list.add_media() for '{video_path}' returned code {result_add}.")
+            mrl = media.get_mrl()
+            logger.debug(f"ADD_TO_PLAYLIST: Appending {mrl} to the play queue")
+            entry_id = self.play_queue.append(song_info, media=media, mrl=mrl) # The queue owns media now
+            if entry_id is None:
+                logger.error(f"ADD_TO_PLAYLIST: could not queue '{video_path}'.")
                 return False
+            logger.info(f"Successfully queued '{video_path}' as entry {entry_id}. Queue length: {len(self.play_queue)}")
+            if not song_info.get('media_validated'):
+                self._start_preparse(media, song_info, entry_id) # Validated and measured before it is due
+            return entry_id
         except Exception as e:
             logger.error(f"ADD_TO_PLAYLIST: EXCEPTION while creating or adding media: {e}", exc_info=True)
             return False
 
     def play_playlist(self):
         """
-        When the UI asks us to start the playlist, we simply call ml_player.play()
-       (instead of play_item_at_index(0)) on the very first track.
+        When the UI asks us to start the playlist: resume if paused, otherwise start index 0
+        (which also pre-rolls index 1 once it is playing).
         """
-        if not (self.ml_player and self.media_list):
-            logger.error("play_playlist: MediaListPlayer or MediaList not initialized. Cannot play.")
+        if not (self.media_player and self.media_list):
+            logger.error("play_playlist: MediaPlayer or MediaList not initialized. Cannot play.")
             return False
 
-        total_items = self.media_list.count()
+        total_items = len(self.play_queue)
         if total_items == 0:
             logger.info("play_playlist: Playlist is empty. Nothing to play.")
             if self.on_media_list_player_event:
                 self.on_media_list_player_event(event_type="PlaylistEmptyOrEnded")
             return False
 
-        state = self.ml_player.get_state()
-        logger.info(f"play_playlist called. Current MLP state: {state}. MediaList count: {total_items}")
- 
-        # 1) If empty, we already returned above. Now, if not already playing/buffering/opening,
-        #    we call play(), which will start index 0 for the very first item.
-        if state not in [vlc.State.Playing, vlc.State.Opening, vlc.State.Buffering]:
-            logger.info("MediaListPlayer is not active. Calling ml_player.play() to start playback.")
-            result = self.ml_player.play()    # <— STILL use play() here for the first track
-            if result == 0:
-                logger.info("play_playlist: ml_player.play() call successful.")
-            else:
-                logger.error(f"play_playlist: ml_player.play() FAILED with code {result}.")
-                if self.on_media_list_player_event:
-                    self.on_media_list_player_event(event_type="MediaError")
+        state = self.get_state()
+        logger.info(f"play_playlist called. Current player state: {state}. MediaList count: {total_items}")
+
+        if state in [vlc.State.Playing, vlc.State.Opening, vlc.State.Buffering]:
+            logger.info(f"Player already active (state: {state}); skipping new play command.")
             return True
-        else:
-            logger.info(f"MediaListPlayer already active (state: {state}); skipping new play command.")
+        if state == vlc.State.Paused:
+            self.media_player.set_pause(0)
             return True
 
+        next_mrl = self._start_head()
+        if next_mrl:
+            logger.info("play_playlist: started the first item.")
+            self._on_next_item_set(next_mrl)
+        else:
+            logger.error("play_playlist: could not start the first item.")
+            if self.on_media_list_player_event:
+                self.on_media_list_player_event(event_type="MediaError")
+        return True
+
     def stop(self):
-        if self.ml_player:
-            logger.info("Stopping MediaListPlayer.")
-            self.ml_player.stop()
+        logger.info("Stopping playback.")
+        self._cancel_preroll()
+        if self.media_player:
+            self.media_player.stop()
+        self.play_queue.playing_entry_id = None
         self.current_song_info = None
 
     def pause(self):
-        if self.ml_player:
-            self.ml_player.pause()
+        if self.media_player:
+            self.media_player.pause()
 
     def set_volume(self, volume):
-        if self.media_player:
-            self.media_player.audio_set_volume(int(volume))
+        for player in self.players:
+            if player:
+                player.audio_set_volume(int(volume))
 
     def get_volume(self):
         return self.media_player.audio_get_volume() if self.media_player else 0
 
     def get_playlist_count(self):
-        return self.media_list.count() if self.media_list else 0
+        return len(self.play_queue)
+
+    def get_position_ms(self):
+        """How far into the playing queue entry playback is (0 if nothing is playing)."""
+        if self.play_queue.playing_entry_id is None or not self.media_player:
+            return 0
+        position = self.media_player.get_time()
+        return position if position and position > 0 else 0
 
     def get_state(self):
-        return self.ml_player.get_state() if self.ml_player else vlc.State.Ended
+        return self.media_player.get_state() if self.media_player else vlc.State.Ended
 
     def get_current_song_info_from_player(self):
-        if self.media_player:
-            current_media = self.media_player.get_media()
-            if current_media:
-                mrl = current_media.get_mrl()
-                current_media.release()
-                return {"mrl": mrl}
-        return None
+        mrl = self._current_mrl()
+        return {"mrl": mrl} if mrl else None
 
     def release(self):
         logger.warning("== VIDEO_PLAYER.RELEASE() CALLED ==")
-        logger.info("VideoPlayer (MediaList approach) release called.")
-
-        if self.ml_player:
-            logger.debug(f"Stopping and releasing MediaListPlayer: {self.ml_player}")
-            self.ml_player.stop()
+        logger.info("VideoPlayer (double-buffered) release called.")
+        if self._preroll_after_id is not None:
             try:
-                mlp_events = self.ml_player.event_manager()
-                if mlp_events:
-                    mlp_events.event_detach(vlc.EventType.MediaListPlayerNextItemSet)
-            except Exception as e:
-                logger.warning(f"Exception detaching events from ml_player: {e}")
-            self.ml_player.release()
-            self.ml_player = None
-            logger.debug("MediaListPlayer released.")
-
-        if self.media_player:
-            logger.debug(f"Releasing underlying MediaPlayer: {self.media_player}")
+                self.drawable_widgets[self.active_index].after_cancel(self._preroll_after_id)
+            except Exception:
+                pass # Widget already destroyed
+            self._preroll_after_id = None
+
+        for index, player in enumerate(self.players):
+            if not player:
+                continue
+            logger.debug(f"Stopping and releasing MediaPlayer {index}: {player}")
             try:
-                player_events = self.media_player.event_manager()
+                player_events = player.event_manager()
                 if player_events:
                     player_events.event_detach(vlc.EventType.MediaPlayerEndReached)
+                    player_events.event_detach(vlc.EventType.MediaPlayerPlaying)
                     player_events.event_detach(vlc.EventType.MediaPlayerEncounteredError)
             except Exception as e:
-                logger.warning(f"Exception detaching events from media_player: {e}")
-            self.media_player = None
-            logger.debug("Underlying MediaPlayer reference nullified.")
+                logger.warning(f"Exception detaching events from media player {index}: {e}")
+            if self._is_stopping(index):
+                self._stop_threads[index].join() # Shutting down: it must be stopped before release()
+            self._stop_threads[index] = None
+            player.stop()
+            player.release()
+        self.players = [None, None]
+        self.media_player = None
+        self.preroll_entry_id = None
 
         if self.media_list:
+            self.play_queue.attach_media_list(None)
             logger.debug(f"Releasing MediaList: {self.media_list}")
             self.media_list.release()
             self.media_list = None
@@ -48,14 +48,24 @@ from core.logger_setup import setup_logging
 from core.settings_manager import SettingsManager
 from core.credit_manager import CreditManager
 from core.queue_manager import QueueManager
-from core.music_library import MusicLibrary
+from core.play_queue import PlayQueue
+from core.music_library import MusicLibrary, SUPPORTED_FORMATS
 from core.video_player import VideoPlayer
+from core.event_bus import EventBus
+from core.state_journal import StateJournal
+from core.library_scan_worker import LibraryScanWorker
+from core.library_watcher import LibraryWatcher
+from core.metadata_worker import MetadataWorker, DEFAULT_METADATA_PROCESSES
 from ui.preferences_dialog import PreferencesDialog
 from ui.splash_screen import SplashScreen # 
 from ui.player_ui import PlayerUI
 from ui.main_ui import MainUI # 
 # from ui.management_dialog import ManagementDialog # Placeholder
 
+LIBRARY_SCAN_POLL_MS = 100 # How often the Tk loop drains the background scan queue
+LIBRARY_WATCH_POLL_MS = 500 # How often the Tk loop drains the library watcher queue
+METADATA_POLL_MS = 250 # How often the Tk loop drains the metadata worker queue
+
 class VideoJukeboxApp:
     def __init__(self, root):
         self.root = root
@@ -71,12 +81,30 @@ class VideoJukeboxApp:
         self.settings_manager = SettingsManager()
         self.logger = setup_logging(self.settings_manager) # SETUP LOGGING EARLY
         self.logger.info("Application starting...")        
-        self.credit_manager = CreditManager(self.settings_manager, initial_credits=20)
+        self.credit_manager = CreditManager(self.settings_manager,
+                                            initial_credits=self.settings_manager.get("initial_credits", 20))
         self.music_library = MusicLibrary(self.settings_manager) # music_library is created
-        self.queue_manager = QueueManager(self.credit_manager, self.music_library)
-
+        self.music_library.load_index() # Last run's library, memory-mapped: searchable before the scan finishes
+        self.play_queue = PlayQueue() # Shared by QueueManager and VideoPlayer
+        self.queue_manager = QueueManager(self.credit_manager, self.music_library, self.play_queue)
+        self.library_scan_worker = None # LibraryScanWorker while a background scan runs
+        self._library_before_scan = None
+        self._scan_has_results = False
+        self.library_watcher = None # LibraryWatcher, started after the first scan
+        self._deferred_library_changes = [] # Watcher batches that arrived during a scan
+        self.metadata_worker = None # MetadataWorker, reads embedded tags after a scan
+
+        # VLC callbacks are marshalled onto the Tk loop through the event bus
+        self.event_bus = EventBus()
         self.video_player = VideoPlayer(self.settings_manager, 
-                                        on_media_list_player_event=self.handle_vlc_playlist_event)
+                                        on_media_list_player_event=self.handle_vlc_playlist_event,
+                                        event_bus=self.event_bus,
+                                        play_queue=self.play_queue)
+        self.event_bus.start(self.root)
+
+        # Credits and the queue survive crashes: replay the journal before anything can change them
+        self.state_journal = StateJournal(self.settings_manager.get("state_journal_dir"))
+        self.restore_journaled_state()
 
         if self.settings_manager.get("show_splash_on_startup"):
             self.show_splash()
@@ -96,6 +124,28 @@ class VideoJukeboxApp:
         self.root.bind("<Control-Alt-m>", self.open_management_interface_event)
         self.root.protocol("WM_DELETE_WINDOW", self.on_exit) # Handle main control window close
 
+    def restore_journaled_state(self):
+        """Rebuild credits and the play queue (and so the VLC MediaList) from the state journal."""
+        try:
+            state = self.state_journal.load()
+        except Exception as e:
+            self.logger.error(f"Could not load the state journal: {e}", exc_info=True)
+            state = {"credits": None, "queue": []}
+        if state["credits"] is not None:
+            self.credit_manager.set_balance(state["credits"])
+        restored = 0
+        for song_info in state["queue"]:
+            # The library has not been scanned yet; the journal keeps enough of each song to queue it
+            if self.video_player.add_to_playlist(song_info["path"], song_info):
+                restored += 1
+            else:
+                self.logger.warning(f"Could not re-queue journaled song: {song_info.get('path')}")
+        # Record from here on, starting from a fresh snapshot (the re-queued entries have new ids)
+        self.state_journal.attach(self.credit_manager, self.play_queue)
+        self.state_journal.snapshot()
+        if restored:
+            self.logger.info(f"Restored {restored} queued songs from the state journal.")
+
     def show_splash(self):
         splash_path = os.path.join(
             self.settings_manager.get("splash_directory"),
@@ -125,9 +175,6 @@ class VideoJukeboxApp:
 
         print("Initializing application UI and components...")
         # self.root.deiconify() # If it was withdrawn
-        self.logger.info(f"Attempting to scan music library. Directory from settings: '{self.settings_manager.get('music_video_directory')}'")
-        self.music_library.scan_videos() # Scan music library
-        self.logger.info(f"Music library scan complete. Number of videos found: {len(self.music_library.videos)}")
         self.setup_displays() # Creates main_ui_window and player_window
 
         # Now instantiate UI classes with their respective Toplevel windows
@@ -144,7 +191,177 @@ class VideoJukeboxApp:
             print("Error: Player window not available for PlayerUI class.")
 
         self.update_all_ui_elements() # A new method to refresh UIs
-        #self.check_queue_and_play()
+        if not self.queue_manager.is_empty():
+            self.check_queue_and_play() # Resume a queue restored from the state journal
+
+        # Scan in the background; results stream into the UI as they are found.
+        self.logger.info(f"Attempting to scan music library. Directory from settings: '{self.settings_manager.get('music_video_directory')}'")
+        self.start_library_scan()
+
+    def start_library_scan(self, full=False):
+        """Start a background library scan. Returns False if one is already running."""
+        if self.library_scan_worker and self.library_scan_worker.is_running():
+            self.logger.info("start_library_scan: A library scan is already running.")
+            return False
+        # Results still in flight describe tracks the scan is about to replace: drop them.
+        # _finish_library_scan() restarts extraction for whatever library is installed then.
+        self.stop_metadata_worker()
+        # Restored if the scan is cancelled
+        self._library_before_scan = (self.music_library.all_videos, self.music_library.search_index)
+        self._scan_has_results = False
+        self.library_scan_worker = LibraryScanWorker(self.music_library, full=full)
+        self.library_scan_worker.start()
+        self._report_scan_progress("running", 0, 0, 0)
+        self.root.after(LIBRARY_SCAN_POLL_MS, self._drain_library_scan)
+        return True
+
+    def cancel_library_scan(self):
+        if self.library_scan_worker:
+            self.library_scan_worker.cancel()
+
+    def is_library_scan_running(self):
+        return bool(self.library_scan_worker and self.library_scan_worker.is_running())
+
+    def _drain_library_scan(self):
+        worker = self.library_scan_worker
+        if worker is None:
+            return
+        finished = False
+        for kind, payload in worker.drain():
+            if kind == "batch":
+                if self.music_library.is_mapped():
+                    continue # The index already shows the whole library; the scan result replaces it at "done"
+                if not self._scan_has_results:
+                    # First results of this scan replace whatever was shown before
+                    self._scan_has_results = True
+                    self.music_library.set_videos([])
+                    if self.main_ui:
+                        self.main_ui.begin_scan_results()
+                visible = self.music_library.extend_videos(payload)
+                if self.main_ui:
+                    self.main_ui.append_scan_results(visible)
+            elif kind == "progress":
+                dirs_done, dirs_expected, videos_found = payload
+                self._report_scan_progress("running", dirs_done, dirs_expected, videos_found)
+            elif kind == "done":
+                videos, search_index = payload
+                self.music_library.set_videos(videos, search_index)
+                self.logger.info(f"Music library scan complete. Number of videos found: {len(videos)}")
+                self._finish_library_scan("done")
+                finished = True
+            else: # "cancelled" or "error": keep the library we had before the scan
+                if self._scan_has_results:
+                    self.music_library.set_videos(*self._library_before_scan)
+                self.logger.info(f"Music library scan ended without results ({kind}: {payload}).")
+                self._finish_library_scan(kind)
+                finished = True
+
+        if not finished:
+            self.root.after(LIBRARY_SCAN_POLL_MS, self._drain_library_scan)
+
+    def _finish_library_scan(self, outcome):
+        self._library_before_scan = None
+        self.library_scan_worker = None
+        if self.main_ui:
+            self.main_ui.refresh_sidebar_lists()
+            self.main_ui.perform_search()
+        self._report_scan_progress(outcome, 0, 0, len(self.music_library.videos))
+        # Also after a cancel or error: the worker was stopped when the scan started (files already read are cached)
+        self.start_metadata_extraction(self.music_library.paths_missing_metadata())
+
+        # Changes seen while scanning may not be in the scan result: apply them now.
+        deferred, self._deferred_library_changes = self._deferred_library_changes, []
+        for added, removed in deferred:
+            self._apply_library_changes(added, removed)
+        self.start_library_watcher() # (Re)starts if the music directory changed
+
+    def start_library_watcher(self):
+        """Watch the music directory so new/deleted videos show up without a rescan."""
+        mode = self.settings_manager.get("library_watch_mode", "auto")
+        music_dir = self.settings_manager.get("music_video_directory")
+        if mode == "off" or not music_dir or not os.path.isdir(music_dir):
+            self.stop_library_watcher()
+            return
+        watcher = self.library_watcher
+        if watcher and watcher.is_running() and watcher.root_dir == os.path.normpath(music_dir):
+            return # Already watching this directory
+        self.stop_library_watcher()
+        self.library_watcher = LibraryWatcher(
+            music_dir, SUPPORTED_FORMATS, mode=mode,
+            debounce_s=self.settings_manager.get("library_watch_debounce_ms", 1500) / 1000.0,
+            poll_interval_s=self.settings_manager.get("library_watch_poll_interval_s", 10))
+        self.library_watcher.start()
+        self.logger.info(f"Library watcher started for '{music_dir}' (mode: {mode}).")
+        self.root.after(LIBRARY_WATCH_POLL_MS, self._drain_library_watcher)
+
+    def stop_library_watcher(self):
+        if self.library_watcher:
+            self.library_watcher.stop()
+            self.library_watcher = None
+
+    def _drain_library_watcher(self):
+        watcher = self.library_watcher
+        if watcher is None:
+            return
+        for kind, payload in watcher.drain():
+            if kind == "overflow":
+                self.logger.warning("Library watcher lost events. Starting a background rescan.")
+                self.start_library_scan()
+            elif kind == "changes":
+                if self.is_library_scan_running():
+                    self._deferred_library_changes.append(payload)
+                else:
+                    self._apply_library_changes(*payload)
+        if watcher is self.library_watcher and watcher.is_running():
+            self.root.after(LIBRARY_WATCH_POLL_MS, self._drain_library_watcher)
+
+    def _apply_library_changes(self, added_paths, removed_paths):
+        added_videos, removed_videos = self.music_library.apply_file_changes(added_paths, removed_paths)
+        if self.main_ui and (added_videos or removed_videos):
+            self.main_ui.apply_library_changes(added_videos, removed_videos)
+        self.start_metadata_extraction(p for p in added_paths if p.lower().endswith(SUPPORTED_FORMATS))
+
+    def start_metadata_extraction(self, paths):
+        """Queue files for embedded tag/duration extraction (cached in the catalog, so each file is read once)."""
+        catalog = self.music_library.catalog
+        if not self.settings_manager.get("metadata_extraction", True) or catalog is None:
+            return
+        if self.metadata_worker is None or not self.metadata_worker.is_running():
+            self.metadata_worker = MetadataWorker(
+                catalog, self.settings_manager.get("metadata_worker_count", DEFAULT_METADATA_PROCESSES))
+            self.metadata_worker.start()
+            self.root.after(METADATA_POLL_MS, self._drain_metadata_worker)
+        self.metadata_worker.enqueue(paths)
+
+    def stop_metadata_worker(self):
+        if self.metadata_worker:
+            self.metadata_worker.stop()
+            self.metadata_worker = None
+
+    def _drain_metadata_worker(self):
+        worker = self.metadata_worker
+        if worker is None:
+            return
+        views_changed = False
+        for kind, payload in worker.drain():
+            if kind == "metadata":
+                views_changed = self.music_library.apply_metadata(payload) or views_changed
+                self.play_queue.invalidate_durations() # Queued songs may have learned their duration
+        if views_changed and self.main_ui and not self.is_library_scan_running():
+            self.main_ui.refresh_library_views()
+        if worker is self.metadata_worker and worker.is_running():
+            self.root.after(METADATA_POLL_MS, self._drain_metadata_worker)
+
+    def apply_music_rules(self):
+        """Apply edited music rules to the in-memory library at once (no rescan) and refresh the views."""
+        self.music_library.apply_rules()
+        if self.main_ui:
+            self.main_ui.refresh_library_views()
+
+    def _report_scan_progress(self, state, dirs_done, dirs_expected, videos_found):
+        dialog = getattr(self, 'management_dialog_instance', None)
+        if dialog and dialog.winfo_exists():
+            dialog.update_scan_progress(state, dirs_done, dirs_expected, videos_found)
 
     def setup_displays(self):
         # ... (monitor detection logic as before) ...
@@ -282,6 +499,10 @@ class VideoJukeboxApp:
             self.main_ui.update_queue_display() 
             # Currently playing is updated by handle_vlc_playlist_event
 
+    def request_ui_refresh(self):
+        """Coalesced update_all_ui_elements(): runs once after the current burst of player events."""
+        self.event_bus.coalesce("update_all_ui_elements", self.update_all_ui_elements)
+
     def get_vlc_instance(self): # Added for main_ui to access
         return self.video_player.instance if self.video_player else None
 
@@ -337,6 +558,12 @@ class VideoJukeboxApp:
     def on_exit(self):
         if messagebox.askokcancel("Quit", "Do you really want to quit Video Jukebox?", parent=self.root):
             self.logger.info("Application exit sequence initiated by user.")
+            self.stop_library_watcher()
+            self.cancel_library_scan()
+            self.stop_metadata_worker()
+            self.music_library.save_index_if_changed() # Watcher/metadata changes since the last scan
+            self.event_bus.stop()
+            self.state_journal.close() # Final snapshot before the player tears the queue down
             if self.video_player:
                 #self.logger.info("Stopping Playlist and Releasing video player resources...")
                 #self.video_player.stop_playlist() # Stop the MediaListPlayer first
@@ -344,7 +571,7 @@ class VideoJukeboxApp:
                 self.logger.info("Video player resources released.")
             
             # ... (save settings, self.root.quit(), self.root.destroy()) ...
-            self.settings_manager.save_settings() 
+            self.settings_manager.flush() # Write-behind: make sure pending changes hit the disk
             self.logger.info("Quitting Tkinter mainloop.")
             self.root.quit()
             self.root.destroy() 
@@ -352,6 +579,10 @@ class VideoJukeboxApp:
 
     def cleanup_on_python_exit(self):
         self.logger.info("ATEEXIT: Cleanup function called.")
+        if getattr(self, 'state_journal', None):
+            self.state_journal.close() # No-op if on_exit already closed it
+        if getattr(self, 'settings_manager', None):
+            self.settings_manager.flush()
         if hasattr(self, 'video_player') and self.video_player:
             self.logger.info("ATEEXIT: video_player object exists. Calling its release() method.")
             try:
@@ -399,7 +630,7 @@ class VideoJukeboxApp:
 
     def check_queue_and_play(self):
         self.logger.info("== VideoJukeboxApp.check_queue_and_play (MediaListPlayer Strategy) CALLED ==")
-        if not (self.video_player and self.video_player.media_list_player and self.video_player.media_list):
+        if not (self.video_player and self.video_player.media_player and self.video_player.media_list):
             self.logger.error("App.check_queue_and_play: VideoPlayer components not ready.")
             return
 
@@ -424,7 +655,7 @@ class VideoJukeboxApp:
 
     def trigger_playback_check(self): # Called after adding a song via UI
         self.logger.debug("App.trigger_playback_check (MediaListPlayer Strategy) called.")
-        if not (self.video_player and self.video_player.media_list_player): return
+        if not (self.video_player and self.video_player.media_player): return
 
         mlp_state = self.video_player.get_state()
         # If MLP is idle AND there are items in its list, call check_queue_and_play to start it.
@@ -436,7 +667,7 @@ class VideoJukeboxApp:
              mlp_state not in [vlc.State.Playing, vlc.State.Opening, vlc.State.Buffering]:
             if self.main_ui: self.main_ui.reset_idle_timer() # Ensure idle timer is managed if queue becomes empty
 
-    def handle_vlc_playlist_event(self, event_type, mrl=None):
+    def handle_vlc_playlist_event(self, event_type, mrl=None, song_info=None):
         self.logger.info(f"App Handling VLC Event: {event_type}, MRL (if any): {mrl}")
         
         current_playing_song_info = None # This will be what we determine is now playing
@@ -447,10 +678,11 @@ class VideoJukeboxApp:
                 self.logger.debug(f"NextItemSet: MRL '{mrl}' normalized to path '{path_from_mrl}'")
                 
                 # Find the song in our library based on the path
-                current_playing_song_info = next((s for s in self.music_library.videos if os.path.normpath(s['path']) == path_from_mrl), None)
+                current_playing_song_info = self.music_library.get_by_path(path_from_mrl)
 
                 if current_playing_song_info:
                     self.logger.info(f"NextItemSet: Mapped MRL to song: {current_playing_song_info['title']}")
+                    self.music_library.record_play(current_playing_song_info)
                 else:
                     self.logger.warning(f"NextItemSet: Could not map path '{path_from_mrl}' to any known song_info.")
                     current_playing_song_info = {"title": "Unknown Track", "artist": "From MRL", "path": path_from_mrl} # Placeholder
@@ -465,17 +697,14 @@ class VideoJukeboxApp:
                     self.main_ui.exit_idle_mode()
                 else:
                     self.main_ui.reset_idle_timer()
-            self.update_all_ui_elements()
+            self.request_ui_refresh()
 
         elif event_type == "SingleMediaEnded":
             self.logger.info("App Handling SingleMediaEnded.")
             if mrl:
                 path_that_ended = self.normalize_mrl_to_path(mrl)
-                self.logger.info(f"Song with path '{path_that_ended}' assumed to have ended.")
-                # Pop that track out of the on-screen queue
-                self.queue_manager.remove_song_from_app_view(
-                    {"path": path_that_ended, "title": "Track that ended"}
-                )
+                # VideoPlayer already dropped its queue entry, so the on-screen queue follows
+                self.logger.info(f"Song with path '{path_that_ended}' has ended.")
             else:
                 self.logger.warning("SingleMediaEnded received, but MRL not provided.")
 
@@ -487,28 +716,38 @@ class VideoJukeboxApp:
                     self.main_ui.set_currently_playing(None)
                     self.main_ui.reset_idle_timer()
             else:
-                self.logger.info("SingleMediaEnded: Playlist has more items. Ensuring playback continues.")
-                self.video_player.play_playlist()
+                # VideoPlayer has already cut over to the next (pre-rolled) item
+                self.logger.info("SingleMediaEnded: Playlist has more items; next item already started.")
 
-            self.update_all_ui_elements()
+            self.request_ui_refresh()
 
         elif event_type == "MediaError":
             # ... (as before)
             if self.main_ui: self.main_ui.set_currently_playing(None)
-            self.update_all_ui_elements()
+            self.request_ui_refresh()
             # Attempt to play next after an error
             if self.video_player.get_playlist_count() > 0:
                 self.logger.info("MediaError: Attempting to play next item in playlist.")
-                self.video_player.ml_player.next() # Tell MLP to try the next one
+                self.video_player.play_next() # Drop the failed item and start the next one
             elif self.main_ui: self.main_ui.reset_idle_timer()
         
+        elif event_type == "MediaInvalid": # Background pre-parse found a queued file unplayable
+            title = song_info.get('title', mrl) if song_info else mrl
+            self.logger.error(f"MediaInvalid: '{title}' ({song_info.get('media_error') if song_info else 'unknown'}) "
+                              f"was removed from the queue before playing.")
+            if song_info: # Its queue entry is already gone; just give the credits back
+                refund = song_info.get('cost', self.settings_manager.get("default_credit_cost"))
+                self.credit_manager.add_credits(refund)
+                self.logger.info(f"MediaInvalid: refunded {refund} credits for '{title}'.")
+            self.request_ui_refresh()
+
         elif event_type == "PlaylistEmptyOrEnded": # From our VideoPlayer.play_playlist()
             self.logger.info("App Handling PlaylistEmptyOrEnded event from VideoPlayer.")
             self.video_player.current_song_info = None
             if self.main_ui:
                 self.main_ui.set_currently_playing(None)
                 self.main_ui.reset_idle_timer()
-            self.update_all_ui_elements()
+            self.request_ui_refresh()
 
     def normalize_mrl_to_path(self, mrl):
         if not mrl:
@@ -0,0 +1,137 @@
+# ui/album_art_cache.py
+import os
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from PIL import Image, ImageTk
+
+logger = logging.getLogger("VideoJukebox.AlbumArtCache")
+
+DEFAULT_MEMORY_BUDGET_MB = 32  # Decoded PhotoImages kept in memory
+DEFAULT_MAX_ENTRIES = 256
+NEGATIVE_TTL_S = 300.0         # Re-probe tracks without art after this long (art may have been added)
+ART_NAMES = ("cover", "folder", "albumart") # Per-folder art, tried before "<video name>.jpg/png"
+ART_EXTENSIONS = (".jpg", ".png")
+
+
+def find_art_file(video_path):
+    """Return (art_path, mtime_ns) of the first art file for a video, or None. Same order as always."""
+    video_dir = os.path.dirname(video_path)
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    for ext in ART_EXTENSIONS:
+        for name in ART_NAMES + (stem,):
+            art_path = os.path.join(video_dir, name + ext)
+            try:
+                return art_path, os.stat(art_path).st_mtime_ns
+            except OSError:
+                continue
+    return None
+
+
+class AlbumArtCache:
+    """
+    Two-tier cache for album art, so showing art is normally a dictionary hit.
+
+    1. Memory: an LRU of decoded PhotoImages keyed by (video path, size), bounded by
+       entry count and by an estimate of their pixel memory (w * h * 4 bytes).
+    2. Disk: pre-resized PNG thumbnails in thumbnail_dir, named after the source art
+       file, its mtime and the size, so replacing cover.jpg produces a new thumbnail.
+       Decoding a 200x200 PNG is far cheaper than opening and resizing the original.
+
+    Videos without art are remembered in a negative cache for NEGATIVE_TTL_S, which
+    saves probing the candidate files again on every now-playing change.
+    Must be used from the Tk thread (PhotoImage).
+    """
+
+    def __init__(self, thumbnail_dir=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.thumbnail_dir = thumbnail_dir
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.max_entries = max_entries
+        self._images = OrderedDict() # (path, size) -> (PhotoImage, bytes)
+        self._memory_used = 0
+        self._no_art = {}            # path -> monotonic time it was found to have no art
+        if thumbnail_dir:
+            try:
+                os.makedirs(thumbnail_dir, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"Cannot create thumbnail directory '{thumbnail_dir}': {e}. Using memory cache only.")
+                self.thumbnail_dir = None
+
+    def get(self, video_path, size=(200, 200)):
+        """Return a PhotoImage of the video's art at size, or None if it has none."""
+        if not video_path:
+            return None
+        size = tuple(size)
+        key = (video_path, size)
+        cached = self._images.get(key)
+        if cached is not None:
+            self._images.move_to_end(key)
+            return cached[0]
+        checked_at = self._no_art.get(video_path)
+        if checked_at is not None and time.monotonic() - checked_at < NEGATIVE_TTL_S:
+            return None
+
+        found = find_art_file(video_path)
+        if found is None:
+            self._no_art[video_path] = time.monotonic()
+            return None
+        self._no_art.pop(video_path, None)
+        image = self._load_thumbnail(found[0], found[1], size)
+        if image is None:
+            return None
+        tk_image = ImageTk.PhotoImage(image)
+        self._remember(key, tk_image, size[0] * size[1] * 4)
+        return tk_image
+
+    def _thumbnail_path(self, art_path, mtime_ns, size):
+        digest = hashlib.sha1(f"{art_path}\0{mtime_ns}".encode("utf-8", "surrogateescape")).hexdigest()
+        return os.path.join(self.thumbnail_dir, f"{digest}_{size[0]}x{size[1]}.png")
+
+    def _load_thumbnail(self, art_path, mtime_ns, size):
+        thumb_path = self._thumbnail_path(art_path, mtime_ns, size) if self.thumbnail_dir else None
+        if thumb_path:
+            try:
+                with Image.open(thumb_path) as thumb:
+                    thumb.load()
+                    return thumb.copy()
+            except (OSError, ValueError):
+                pass # Not generated yet (or unreadable): build it from the original
+
+        try:
+            with Image.open(art_path) as img:
+                if img.mode not in ("RGB", "RGBA"):
+                    img = img.convert("RGBA") # Palette/CMYK/greyscale: something PNG can store
+                image = img.resize(size, Image.Resampling.LANCZOS)
+        except Exception as e:
+            logger.error(f"Error loading custom art '{art_path}': {e}")
+            return None
+        logger.info(f"Loaded custom album art: {art_path}")
+
+        if thumb_path:
+            tmp_path = thumb_path + ".tmp"
+            try:
+                image.save(tmp_path, "PNG")
+                os.replace(tmp_path, thumb_path) # Never leave a half-written thumbnail behind
+            except OSError as e:
+                logger.warning(f"Could not write thumbnail '{thumb_path}': {e}")
+        return image
+
+    def _remember(self, key, tk_image, nbytes):
+        self._images[key] = (tk_image, nbytes)
+        self._memory_used += nbytes
+        while self._images and (self._memory_used > self.memory_budget or len(self._images) > self.max_entries):
+            _key, (_image, evicted_bytes) = self._images.popitem(last=False)
+            self._memory_used -= evicted_bytes
+
+    def invalidate(self, video_path=None):
+        """Forget cached art for one video, or everything when video_path is None."""
+        if video_path is None:
+            self._images.clear()
+            self._memory_used = 0
+            self._no_art.clear()
+            return
+        self._no_art.pop(video_path, None)
+        for key in [k for k in self._images if k[0] == video_path]:
+            self._memory_used -= self._images.pop(key)[1]
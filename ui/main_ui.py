@@ -1,13 +1,35 @@
 # video_jukebox/ui/main_ui.py
 import os
+import time
+import bisect
 import tkinter as tk
 from tkinter import ttk, Listbox, Scrollbar, messagebox
 from PIL import Image, ImageTk # For album art
 import vlc
+from core.music_library import video_sort_key
+from core.search_index import normalize_search_text
+from ui.virtual_results import VirtualResultsView
+from ui.album_art_cache import AlbumArtCache
 
 # Default image path (relative to where the script is run or a known assets folder)
 DEFAULT_ALBUM_ART_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "default_album_art.png")
 
+SEARCH_DEBOUNCE_MS = 150    # Search-as-you-type waits for this pause in typing
+SUGGESTION_COUNT = 10
+SUGGESTION_REPLAY_GAP_S = 3600 # Suggestions skip songs played within this many seconds
+
+
+def format_wait(wait_ms, estimated=False):
+    """Patron-facing wait time: 'under a minute', '4 min', '~1 h 05 min' (~ when some durations are guessed)."""
+    minutes = int(round(wait_ms / 60000.0))
+    if minutes < 1:
+        text = "under a minute"
+    elif minutes < 60:
+        text = f"{minutes} min"
+    else:
+        text = f"{minutes // 60} h {minutes % 60:02d} min"
+    return f"~{text}" if estimated and minutes >= 1 else text
+
 
 # video_jukebox/ui/main_ui.py
 
@@ -44,8 +66,16 @@ class MainUI:
         self.right_panel = ttk.Frame(self.window, style="TFrame")
         self.right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
 
+        # --- Search-as-you-type state ---
+        self.is_idle = False
+        self._search_after_id = None      # Pending debounced search
+        self._last_search_query = None
+        self._last_search_results = None  # Narrowed further when the query is extended
+
         # --- LOAD DEFAULT ARTWORK EARLY ---
         self.load_default_album_art()
+        self.album_art_cache = AlbumArtCache(self.settings.get("album_art_cache_dir"),
+                                             self.settings.get("album_art_memory_mb", 32))
 
         # --- Populate Left Panel ---
         self._create_credits_display(self.left_panel)
@@ -67,7 +97,6 @@ class MainUI:
         # --- Idle Timer Setup ---
         self.idle_timeout_ms = self.settings.get("idle_timeout_ms", 60000)
         self.idle_timer_id = None
-        self.is_idle = False
         self.app.root.after(100, self.reset_idle_timer) 
         
         self.window.bind("<KeyPress>", self.reset_idle_timer_event, add="+")
@@ -146,6 +175,7 @@ class MainUI:
         self.search_button = ttk.Button(search_bar_frame, text="Search", command=self.perform_search, style="Search.TButton")
         self.search_button.grid(row=0, column=2, padx=(10,0), sticky="e")
         self.search_entry.bind("<Return>", lambda event: self.perform_search())
+        self.search_entry_var.trace_add("write", self._on_search_text_changed)
 
         # Cost/Balance (Mockup style)
         info_frame = ttk.Frame(parent, style="TFrame")
@@ -161,7 +191,12 @@ class MainUI:
         parent.rowconfigure(2, weight=1) # Make results area expand
 
         columns = ("artist", "title", "cost")
-        self.results_tree = ttk.Treeview(results_frame, columns=columns, show="headings", style="Treeview", selectmode="browse")
+        # Only the rows in view are materialized; iids stay the video paths
+        self.results_view = VirtualResultsView(results_frame, columns,
+                                               row_id=lambda s: s['path'],
+                                               row_values=lambda s: (s['artist'], s['title'], s.get('cost', 'N/A')),
+                                               style="Treeview")
+        self.results_tree = self.results_view.tree
         self.results_tree.heading("artist", text="Artist")
         self.results_tree.heading("title", text="Title")
         self.results_tree.heading("cost", text="Cost")
@@ -169,13 +204,9 @@ class MainUI:
         self.results_tree.column("title", width=350, anchor="w")
         self.results_tree.column("cost", width=80, anchor="center")
 
-        vsb = ttk.Scrollbar(results_frame, orient="vertical", command=self.results_tree.yview)
-        self.results_tree.configure(yscrollcommand=vsb.set)
-        
-        self.results_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.results_view.pack(fill=tk.BOTH, expand=True)
 
-        self.results_tree.bind("<<TreeviewSelect>>", self.on_result_selected)
+        self.results_tree.bind("<<TreeviewSelect>>", self.on_result_selected, add="+") # After the view records it
         self.results_tree.bind("<Double-1>", self.on_result_double_clicked)
 
         # --- Bottom Panels Frame (Artists A-Z / Most Popular) ---
@@ -261,6 +292,11 @@ class MainUI:
         
         # Placeholder for description and album art
         desc_text = f"'{song_details['title']}' by {song_details['artist']}.\n\n"
+        wait_ms, estimated = self.app.queue_manager.get_eta_for_new_song(self.app.video_player.get_position_ms())
+        if wait_ms:
+            desc_text += f"Added now, it would play in {format_wait(wait_ms, estimated)}.\n\n"
+        else:
+            desc_text += "Added now, it would play right away.\n\n"
         desc_text += "This is a placeholder description. Real applications might fetch this from a database or metadata."
         self.detail_description_text.config(state=tk.NORMAL)
         self.detail_description_text.delete(1.0, tk.END)
@@ -271,38 +307,12 @@ class MainUI:
         self.set_album_art(self.detail_art_label, song_details.get('path')) # Try to load art
 
     def set_album_art(self, art_label_widget, video_path, size=(200, 200)):
-        loaded_custom_art = False
-        if video_path:
-            video_dir = os.path.dirname(video_path)
-            video_filename_stem = os.path.splitext(os.path.basename(video_path))[0]
-            
-            # Common art filenames to check
-            possible_art_files = [
-                os.path.join(video_dir, "cover.jpg"),
-                os.path.join(video_dir, "folder.jpg"),
-                os.path.join(video_dir, "albumart.jpg"),
-                os.path.join(video_dir, f"{video_filename_stem}.jpg"),
-                os.path.join(video_dir, "cover.png"),
-                os.path.join(video_dir, "folder.png"),
-                os.path.join(video_dir, "albumart.png"),
-                os.path.join(video_dir, f"{video_filename_stem}.png"),
-            ]
-
-            for art_file_path in possible_art_files:
-                if os.path.exists(art_file_path):
-                    try:
-                        img = Image.open(art_file_path)
-                        img = img.resize(size, Image.Resampling.LANCZOS)
-                        tk_image = ImageTk.PhotoImage(img)
-                        art_label_widget.config(image=tk_image)
-                        art_label_widget.image = tk_image  # Keep reference
-                        loaded_custom_art = True
-                        self.app.logger.info(f"Loaded custom album art: {art_file_path}")
-                        break 
-                    except Exception as e:
-                        self.app.logger.error(f"Error loading custom art '{art_file_path}': {e}")
-        
-        if not loaded_custom_art:
+        # cover/folder/albumart/<video name> .jpg/.png, served from the memory/thumbnail cache
+        tk_image = self.album_art_cache.get(video_path, size)
+        if tk_image:
+            art_label_widget.config(image=tk_image)
+            art_label_widget.image = tk_image  # Keep reference
+        else:
             if self.default_album_art_tk:
                 art_label_widget.config(image=self.default_album_art_tk)
                 art_label_widget.image = self.default_album_art_tk
@@ -310,34 +320,56 @@ class MainUI:
                 art_label_widget.config(text="[No Art]", image='')
 
     def perform_search(self):
+        """Search right away (Search button, Return, programmatic refresh). Always a full search."""
+        if self._search_after_id:
+            self.window.after_cancel(self._search_after_id)
+            self._search_after_id = None
+        self._execute_search(self.search_entry_var.get(), allow_narrowing=False)
+
+    def _on_search_text_changed(self, *args):
+        """search_entry_var trace: (re)start the debounce timer on every keystroke."""
+        if self.is_idle:
+            return # The idle prompt text is not a query
+        if self._search_after_id:
+            self.window.after_cancel(self._search_after_id)
+        self._search_after_id = self.window.after(SEARCH_DEBOUNCE_MS, self._run_live_search)
+
+    def _run_live_search(self):
+        self._search_after_id = None
         query = self.search_entry_var.get()
-        results = self.app.music_library.search(query)
-        
-        self.results_tree.delete(*self.results_tree.get_children()) # Clear previous results
-        if results:
-            for song in results:
-                self.results_tree.insert("", tk.END, values=(
-                    song['artist'], song['title'], song.get('cost', 'N/A')
-                ), iid=song['path']) # Use path as unique ID
-        else:
-            # Maybe insert a "No results found" item or show a label
-            pass
+        if query == self._last_search_query:
+            return # Already showing these results (e.g. set programmatically, then searched)
+        self._execute_search(query, allow_narrowing=True)
+
+    def _execute_search(self, query, allow_narrowing):
+        library = self.app.music_library
+        within = None
+        previous_query = self._last_search_query
+        previous_needle = normalize_search_text(previous_query) if previous_query else ""
+        if allow_narrowing and self._last_search_results is not None and previous_needle \
+                and self.settings.get("search_mode", "index") != "tokens" \
+                and normalize_search_text(query).startswith(previous_needle):
+            # Extending a substring query can only drop matches: filter the previous results
+            within = self._last_search_results
+        results = library.search(query, within=within)
+        self._last_search_query = query
+        self._last_search_results = results
+
+        self.results_view.set_items(results) # Renders only the visible rows
         self.update_search_view_balance_cost() # Reset cost display
 
     def on_result_selected(self, event):
-        selected_item = self.results_tree.focus() # Get selected item's IID (path)
+        selected_item = self.results_view.selected_path() or self.results_tree.focus() # Selected IID (path)
         if selected_item:
-            # Find the song details from the library using the path
-            song_details = next((s for s in self.app.music_library.videos if s['path'] == selected_item), None)
+            song_details = self.app.music_library.get_by_path(selected_item)
             if song_details:
                 self.current_selected_song_details = song_details
                 self.update_search_view_balance_cost(song_details.get('cost'))
 
     def on_result_double_clicked(self, event):
-        selected_item_iid = self.results_tree.focus()
+        selected_item_iid = self.results_view.selected_path() or self.results_tree.focus()
         if selected_item_iid:
-            # Find the song by its path (IID)
-            song_details = next((s for s in self.app.music_library.videos if s['path'] == selected_item_iid), None)
+            song_details = self.app.music_library.get_by_path(selected_item_iid)
             if song_details:
                 self.show_details_view(song_details)
 
@@ -384,10 +416,15 @@ class MainUI:
     def update_queue_display(self):
         self.queue_listbox.delete(0, tk.END)
         if self.app and hasattr(self.app, 'queue_manager') and self.app.queue_manager: # Add safety check
-            # Use the correct method name here
-            items_to_display = self.app.queue_manager.get_app_queue_view_strings(limit=10) 
-            for item_text in items_to_display:
-                self.queue_listbox.insert(tk.END, item_text)
+            # Wait times come from the queue's duration prefix sums: O(1) per entry
+            position_ms = self.app.video_player.get_position_ms()
+            player_state = self.app.video_player.get_state()
+            # The head is only "now playing" while the player really plays it (not stopped, idle or paused)
+            head_label = {vlc.State.Playing: "now playing", vlc.State.Paused: "paused"}.get(player_state, "up next")
+            etas = self.app.queue_manager.get_queue_etas(position_ms, limit=10)
+            for index, (song, eta_ms, estimated) in enumerate(etas):
+                when = head_label if index == 0 else f"in {format_wait(eta_ms, estimated)}"
+                self.queue_listbox.insert(tk.END, f"{song['artist']} - {song['title']}  ({when})")
         else:
             self.app.logger.warning("update_queue_display: queue_manager not available on app object.")
 
@@ -409,9 +446,57 @@ class MainUI:
     def populate_artists_az_list(self):
         self.artists_az_listbox.delete(0, tk.END)
         artists = self.app.music_library.get_artists()
+        self.az_artists = list(artists) # Sorted copy, used to place artists found by a running scan
         for artist in artists:
             self.artists_az_listbox.insert(tk.END, artist)
 
+    def begin_scan_results(self):
+        """A background scan produced its first results: clear the views it is about to refill."""
+        self.results_view.set_items([])
+        self.artists_az_listbox.delete(0, tk.END)
+        self.az_artists = []
+
+    def append_scan_results(self, videos):
+        """Add a batch from a running background scan to the results view and the A-Z list."""
+        self._last_search_results = None # The library changed: nothing to narrow from
+        self.results_view.append_items(self._matching_current_query(videos))
+        self._add_az_artists(videos)
+
+    def _matching_current_query(self, videos):
+        query = "" if self.is_idle else self.search_entry_var.get()
+        return self.app.music_library.search(query, within=videos)
+
+    def _add_az_artists(self, videos):
+        for artist in sorted(set(v['artist'] for v in videos)):
+            index = bisect.bisect_left(self.az_artists, artist)
+            if index < len(self.az_artists) and self.az_artists[index] == artist:
+                continue # Already listed
+            self.az_artists.insert(index, artist)
+            self.artists_az_listbox.insert(index, artist)
+
+    def apply_library_changes(self, added_videos, removed_videos):
+        """Reflect an incremental library update (from the folder watcher) without a full refresh."""
+        self._last_search_results = None
+        self.results_view.remove_items(song['path'] for song in removed_videos)
+        self.results_view.insert_items_sorted(self._matching_current_query(added_videos), key=video_sort_key)
+        self._add_az_artists(added_videos)
+
+        # Artists whose last video disappeared drop out of the A-Z list
+        gone_artists = set(v['artist'] for v in removed_videos)
+        if gone_artists:
+            gone_artists -= set(v['artist'] for v in self.app.music_library.videos)
+        for artist in gone_artists:
+            index = bisect.bisect_left(self.az_artists, artist)
+            if index < len(self.az_artists) and self.az_artists[index] == artist:
+                del self.az_artists[index]
+                self.artists_az_listbox.delete(index)
+
+    def refresh_library_views(self):
+        """The visible library changed (rules edited, tags read): rebuild the A-Z and popular lists and re-run the search."""
+        self._last_search_results = None
+        self.refresh_sidebar_lists()
+        self.perform_search()
+
     def on_artist_az_selected(self, event):
         widget = event.widget
         selection = widget.curselection()
@@ -422,46 +507,33 @@ class MainUI:
 
     def populate_most_popular_list(self):
         self.most_popular_listbox.delete(0, tk.END)
+        self.popular_song_ids = [] # Track id per listbox row
         all_videos = self.app.music_library.get_all_videos()
         if not all_videos:
             self.most_popular_listbox.insert(tk.END, "(No music in library)")
             return
 
-        import random
-        # Display up to 10 random songs as "suggestions"
-        num_to_show = min(len(all_videos), 10)
-        suggestions = random.sample(all_videos, num_to_show)
-        
+        # Up to 10 random affordable songs that have not played in the last hour, else any 10
+        library = self.app.music_library
+        suggestions = library.suggest_videos(SUGGESTION_COUNT, max_cost=self.app.credit_manager.get_balance(),
+                                             played_before=time.time() - SUGGESTION_REPLAY_GAP_S)
+        if not suggestions:
+            suggestions = library.suggest_videos(SUGGESTION_COUNT)
+
         for song in suggestions:
-            # Store the full path as a hidden part of the item if needed, or lookup later
-            # For now, just display. We will need to store the song object or path to go to details.
-            # A simple way is to store the path and then retrieve the song object.
-            # Let's store the index in all_videos, or the path. Path is better for stability if list changes.
             display_text = f"{song['artist']} - {song['title']}"
             self.most_popular_listbox.insert(tk.END, display_text)
-            # Associate data with listbox item (not directly supported by tk.Listbox easily without custom widgets)
-            # So, we'll rely on matching the text or re-fetching on selection.
-            # A better way for complex data: use a dictionary to map display_text to song_object
+            self.popular_song_ids.append(song['id']) # Stays valid across rescans
 
     def on_popular_song_double_clicked(self, event):
         widget = event.widget
         selection = widget.curselection()
-        if selection:
-            selected_display_text = widget.get(selection[0])
-            # Now we need to find the song_details matching this text.
-            # This is inefficient if lists are very long.
-            # A better approach for popular_listbox would be to store song paths or IDs.
-            # For now, let's iterate:
-            found_song = None
-            for song in self.app.music_library.get_all_videos(): # Re-fetch or use a stored list for suggestions
-                if f"{song['artist']} - {song['title']}" == selected_display_text:
-                    found_song = song
-                    break
-            
+        if selection and selection[0] < len(self.popular_song_ids):
+            found_song = self.app.music_library.get_by_id(self.popular_song_ids[selection[0]])
             if found_song:
                 self.show_details_view(found_song)
             else:
-                self.app.logger.warning(f"Could not find song details for popular list selection: {selected_display_text}")
+                self.app.logger.warning(f"Could not find song details for popular list selection: {widget.get(selection[0])}")
 
     # In __init__ or another method, make sure these are called when library changes:
     # self.populate_artists_az_list()
@@ -523,5 +595,6 @@ class MainUI:
         # For example, if queue becomes empty AND video stops playing.
         if self.app.can_go_idle() and not self.idle_timer_id and not self.is_idle:
             self.reset_idle_timer() # Re-evaluate if timer should start
+        self.update_queue_display() # Wait times count down while a song plays
         
         self.window.after(5000, self.periodic_update) # Reschedule
\ No newline at end of file
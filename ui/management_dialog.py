@@ -184,13 +184,9 @@ class ManagementDialog(tk.Toplevel):
         self.all_tracks_map = {} # Maps display string to path for all_tracks_list
         self.blocked_tracks_map = {} # Maps display string to path for blocked_tracks_list
 
-    # In load_data_into_tabs():
-
-    def load_data_into_tabs(self):
-        # ... (Queue, Credits loading) ...
-
-        # Music Rules
-        all_lib_artists = self.app.music_library.get_artists()
+    def _load_music_rules_tab(self):
+        # Music Rules (the whole catalog is listed, blocked tracks included)
+        all_lib_artists = self.app.music_library.get_artists(include_blocked=True)
         current_blocked_artists = set(s.lower() for s in self.settings.get("blocked_artists", []))
 
         self.all_artists_list.delete(0, tk.END)
@@ -202,7 +198,9 @@ class ManagementDialog(tk.Toplevel):
             self.blocked_artists_list.insert(tk.END, blocked_artist.capitalize()) # Show consistently
 
         # Tracks
-        all_lib_videos = self.app.music_library.get_all_videos() # list of dicts
+        # Read-only view of the catalog, so sort into a new list rather than in place
+        all_lib_videos = sorted(self.app.music_library.get_all_videos(include_blocked=True),
+                                key=lambda x: (x['artist'].lower(), x['title'].lower()))
         current_blocked_track_paths = set(self.settings.get("blocked_tracks", []))
         
         self.all_tracks_list.delete(0, tk.END)
@@ -210,9 +208,6 @@ class ManagementDialog(tk.Toplevel):
         self.all_tracks_map.clear()
         self.blocked_tracks_map.clear()
 
-        # Sort all library videos for consistent display
-        all_lib_videos.sort(key=lambda x: (x['artist'].lower(), x['title'].lower()))
-
         for video_info in all_lib_videos:
             display_text = f"{video_info['artist']} - {video_info['title']}"
             path = video_info['path']
@@ -349,18 +344,29 @@ class ManagementDialog(tk.Toplevel):
         
         self.app.logger.info(f"Saved music rules. Blocked artists: {len(new_blocked_artists)}, Blocked tracks: {len(new_blocked_track_paths)}")
 
-        if messagebox.askyesno("Rules Saved", "Music rules saved. Re-scan library to apply changes?", parent=self):
-            self.rescan_library_action() # This already shows a confirmation
-        else:
-            messagebox.showinfo("Rules Saved", "Music rules saved. Re-scan library from the main menu or later to apply.", parent=self)
+        # Rules are a filter over the in-memory library, so they apply immediately (no rescan)
+        self.app.apply_music_rules()
+        messagebox.showinfo("Rules Saved", "Music rules saved and applied.", parent=self)
         
-        # Refresh lists in case re-scan didn't happen or to reflect current state from settings.
+        # Refresh lists to reflect current state from settings.
         self.load_data_into_tabs()
     def _create_system_tab(self, tab):
         ttk.Label(tab, text="System Operations & Settings:", font=("Segoe UI", 14, "bold")).pack(pady=10, anchor="w")
 
-        rescan_button = ttk.Button(tab, text="Re-scan Music Library", command=self.rescan_library_action)
-        rescan_button.pack(pady=5, fill=tk.X)
+        self.rescan_button = ttk.Button(tab, text="Re-scan Music Library", command=self.rescan_library_action)
+        self.rescan_button.pack(pady=5, fill=tk.X)
+
+        # Background scan progress (the scan itself runs on a worker thread)
+        scan_frame = ttk.Frame(tab)
+        scan_frame.pack(fill=tk.X, pady=5)
+        self.scan_progressbar = ttk.Progressbar(scan_frame, orient=tk.HORIZONTAL, mode="determinate", maximum=100)
+        self.scan_progressbar.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0,5))
+        self.cancel_scan_button = ttk.Button(scan_frame, text="Cancel Scan", command=self.cancel_scan_action, state=tk.DISABLED)
+        self.cancel_scan_button.pack(side=tk.LEFT)
+        self.scan_status_label = ttk.Label(tab, text="Library scan: idle", font=("Segoe UI", 10))
+        self.scan_status_label.pack(anchor="w")
+        if self.app.is_library_scan_running():
+            self.update_scan_progress("running", 0, 0, len(self.app.music_library.videos))
         
         change_pass_button = ttk.Button(tab, text="Change Admin Password", command=self.change_admin_password)
         change_pass_button.pack(pady=5, fill=tk.X)
@@ -382,11 +388,7 @@ class ManagementDialog(tk.Toplevel):
         self.mg_current_credits_label.config(text=str(self.app.credit_manager.get_balance()))
         self.set_credits_var.set(self.app.credit_manager.get_balance())
 
-        # Music Rules (load from settings)
-        self.blocked_artists_list.delete(0, tk.END)
-        for artist in self.settings.get("blocked_artists", []):
-            self.blocked_artists_list.insert(tk.END, artist)
-        # Do similarly for tracks and genres if implemented
+        self._load_music_rules_tab()
 
     def refresh_ui_data(self):
         """Call this after actions that change underlying data."""
@@ -416,8 +418,7 @@ class ManagementDialog(tk.Toplevel):
             
     def skip_current_song(self):
         if messagebox.askyesno("Confirm", "Skip the currently playing song?", parent=self):
-            self.app.video_player.stop() # This will trigger on_video_end
-            # on_video_end will call check_queue_and_play, effectively skipping
+            self.app.video_player.play_next() # Drops the playing entry and starts the next one
             self.refresh_ui_data()
 
 
@@ -444,26 +445,47 @@ class ManagementDialog(tk.Toplevel):
             messagebox.showerror("Input Error", "Invalid number for credits.", parent=self)
 
 
-    def save_music_rules(self):
-        # Example for blocked artists
-        # current_blocked_artists_in_ui = list(self.blocked_artists_list.get(0, tk.END))
-        # self.settings.set("blocked_artists", current_blocked_artists_in_ui)
-        # self.settings.save_settings()
-        # self.app.music_library.scan_videos() # Re-scan to apply new rules
-        # self.app.main_ui.perform_search() # Refresh search results in main UI
-        messagebox.showinfo("Music Rules", "Music rules saving is a TODO. \nRe-scan library if changes were made manually to config.", parent=self)
-        self.refresh_ui_data()
-
-
     def rescan_library_action(self):
-        if messagebox.askyesno("Confirm", "Re-scan the music library? This may take a moment.", parent=self):
+        if self.app.is_library_scan_running():
+            messagebox.showinfo("Library Scan", "A library scan is already running.", parent=self)
+            return
+        if messagebox.askyesno("Confirm", "Re-scan the music library? Results will fill in while it runs.", parent=self):
             self.app.logger.info("Admin triggered library re-scan.")
-            self.app.music_library.scan_videos()
-            if self.app.main_ui:
-                self.app.main_ui.perform_search() # Clear and potentially repopulate search
-                self.app.main_ui.refresh_sidebar_lists() # Add this
-            messagebox.showinfo("Library Scan", "Music library re-scan complete.", parent=self)
-            self.app.logger.info("Library re-scan complete.")
+            self.app.start_library_scan()
+
+    def cancel_scan_action(self):
+        self.app.logger.info("Admin cancelled library re-scan.")
+        self.app.cancel_library_scan()
+        self.cancel_scan_button.config(state=tk.DISABLED)
+
+    def update_scan_progress(self, state, dirs_done, dirs_expected, videos_found):
+        """Called by the app while a background scan runs and once when it ends."""
+        if state == "running":
+            self.rescan_button.config(state=tk.DISABLED)
+            self.cancel_scan_button.config(state=tk.NORMAL)
+            if dirs_expected:
+                # Size of the previous scan is known: show a real percentage
+                self.scan_progressbar.stop()
+                self.scan_progressbar.config(mode="determinate")
+                self.scan_progressbar['value'] = min(100, 100 * dirs_done / dirs_expected)
+            elif str(self.scan_progressbar.cget("mode")) != "indeterminate":
+                self.scan_progressbar.config(mode="indeterminate")
+                self.scan_progressbar.start(50)
+            self.scan_status_label.config(text=f"Library scan: {dirs_done} folders, {videos_found} videos found...")
+            return
+
+        self.scan_progressbar.stop()
+        self.scan_progressbar.config(mode="determinate")
+        self.scan_progressbar['value'] = 100 if state == "done" else 0
+        self.rescan_button.config(state=tk.NORMAL)
+        self.cancel_scan_button.config(state=tk.DISABLED)
+        if state == "done":
+            self.scan_status_label.config(text=f"Library scan complete: {videos_found} videos.")
+            self.load_data_into_tabs()
+        elif state == "cancelled":
+            self.scan_status_label.config(text="Library scan cancelled. Previous library kept.")
+        else:
+            self.scan_status_label.config(text="Library scan failed. See log for details.")
 
     def change_admin_password(self):
         current_password = simpledialog.askstring("Current Password", "Enter current admin password:", show='*', parent=self)
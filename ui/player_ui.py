@@ -23,6 +23,13 @@ class PlayerUI:
         # Create a frame within the Toplevel window for VLC to embed into.
         self.video_frame = tk.Frame(self.window, bg="black")
         self.video_frame.pack(fill=tk.BOTH, expand=True)
+        # Two stacked surfaces, one per VLC player: the next video pre-rolls into the
+        # hidden one and is raised at the cut (see VideoPlayer)
+        self.video_surfaces = []
+        for _ in range(2):
+            surface = tk.Frame(self.video_frame, bg="black")
+            surface.place(x=0, y=0, relwidth=1, relheight=1)
+            self.video_surfaces.append(surface)
 
         # CRUCIAL: Force window and frame to be fully created and mapped
         # before getting its HWND/XID for VLC.
@@ -32,7 +39,7 @@ class PlayerUI:
         logger.debug("PlayerUI: Window update complete.")
 
         if self.video_player:
-            self.video_player.set_embedding_widget(self.video_frame) # This remains the same logic
+            self.video_player.set_embedding_widgets(self.video_surfaces)
             logger.info("PlayerUI: Embedding widget set for VideoPlayer.")
             #frame_handle = self.video_frame.winfo_id()
             #if frame_handle:
@@ -43,7 +50,7 @@ class PlayerUI:
             #else:
             #    logger.error("PlayerUI: video_frame.winfo_id() returned 0 or None. Cannot embed.")
         else:
-            fallback_label = tk.Label(self.video_frame, text="Video Playback Area (VLC not connected)",
+            fallback_label = tk.Label(self.video_surfaces[0], text="Video Playback Area (VLC not connected)",
                                       bg="black", fg="white", font=("Arial", 24))
             fallback_label.pack(expand=True)
             logger.warning("PlayerUI: VideoPlayer instance not available for setting embedding handle.")
@@ -79,6 +79,16 @@ class PreferencesDialog(tk.Toplevel):
         self.vars["default_credit_cost"] = tk.IntVar()
         ttk.Entry(credit_cost_frame, textvariable=self.vars["default_credit_cost"], width=5).pack(side=tk.LEFT, padx=5)
 
+        # --- Library Scan Settings ---
+        library_frame = ttk.LabelFrame(frame, text="Library Scanning", padding="10")
+        library_frame.pack(fill=tk.X, pady=5)
+
+        scan_workers_frame = ttk.Frame(library_frame)
+        scan_workers_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(scan_workers_frame, text="Parallel Scan Workers:").pack(side=tk.LEFT)
+        self.vars["scan_worker_count"] = tk.IntVar()
+        ttk.Spinbox(scan_workers_frame, textvariable=self.vars["scan_worker_count"], from_=1, to=64, width=5).pack(side=tk.LEFT, padx=5)
+
         # --- Music Control (Placeholder - expand later) ---
         # music_control_frame = ttk.LabelFrame(frame, text="Music Controls", padding="10")
         # music_control_frame.pack(fill=tk.X, pady=5)
@@ -175,11 +185,11 @@ class PreferencesDialog(tk.Toplevel):
                 if messagebox.askyesno("Apply Changes", "Music video directory has changed. Re-scan library now?", parent=self):
                     self.app_controller.logger.info("User requested library re-scan after preferences change.")
                     if hasattr(self.app_controller, 'music_library') and self.app_controller.music_library:
-                        self.app_controller.music_library.scan_videos()
-                        if hasattr(self.app_controller, 'main_ui') and self.app_controller.main_ui:
-                            self.app_controller.main_ui.refresh_sidebar_lists()
-                            self.app_controller.main_ui.perform_search() # Clear/update search results
-                        messagebox.showinfo("Library Scan", "Music library re-scan complete.", parent=self)
+                        # Runs in the background; the main UI fills in as videos are found.
+                        if self.app_controller.start_library_scan():
+                            messagebox.showinfo("Library Scan", "Music library re-scan started.", parent=self)
+                        else:
+                            messagebox.showinfo("Library Scan", "A library scan is already running. Re-scan again when it finishes.", parent=self)
                     else:
                         messagebox.showwarning("Scan Error", "Could not initiate library scan. Music library component not ready.", parent=self)
             messagebox.showinfo("Preferences", "Settings saved!", parent=self) # Show this after potential scan
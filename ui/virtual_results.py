@@ -0,0 +1,200 @@
+# ui/virtual_results.py
+import bisect
+import tkinter as tk
+from tkinter import ttk
+
+DEFAULT_OVERSCAN = 5 # Extra rows materialized below the viewport (partially visible row, resize slack)
+
+
+class VirtualResultsView(ttk.Frame):
+    """
+    A Treeview that only materializes the rows in its viewport plus a small overscan.
+
+    The full result list stays a Python list or immutable sequence (self.items). The Treeview holds
+    at most visible_rows + overscan rows starting at self.offset, and the scrollbar,
+    mouse wheel, touch drag and arrow/page keys all move that offset, so showing 50k
+    results costs the same as showing 50. Rows are only rebuilt for the new window.
+
+    Rows keep the same iid as before (row_id(item), the track path), so
+    tree.focus()/selection() still resolve to a path while the row is on screen;
+    selected_path() also works after the selected row has been scrolled away.
+    """
+
+    def __init__(self, parent, columns, row_id, row_values, overscan=DEFAULT_OVERSCAN, **tree_kwargs):
+        super().__init__(parent, style="TFrame")
+        self.row_id = row_id
+        self.row_values = row_values
+        self.overscan = overscan
+        self.items = []
+        self.offset = 0           # Index in self.items of the first visible row
+        self.visible_rows = 20    # Recomputed from the widget height
+        self.rowheight = 25
+        self._window_end = 0      # self.items[offset:_window_end] is materialized
+        self._selected_path = None
+        self._drag_start_y = None
+        self._drag_start_offset = 0
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse", **tree_kwargs)
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.vsb.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind("<Configure>", self._on_configure, add="+")
+        self.tree.bind("<<TreeviewSelect>>", self._remember_selection, add="+")
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)          # Windows / macOS
+        self.tree.bind("<Button-4>", lambda e: self._scroll_rows(-3)) # X11 wheel up
+        self.tree.bind("<Button-5>", lambda e: self._scroll_rows(3))  # X11 wheel down
+        self.tree.bind("<ButtonPress-1>", self._on_press, add="+")
+        self.tree.bind("<B1-Motion>", self._on_drag)
+        for key, delta in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"), ("<Next>", "page"),
+                           ("<Home>", "home"), ("<End>", "end")):
+            self.tree.bind(key, lambda e, d=delta: self._on_key_move(d))
+
+    # --- Data ---
+    def set_items(self, items):
+        # Immutable sequences (the mapped library's track lists) are kept as they are, so a
+        # 100k-row result is not materialized; they are copied on the first change.
+        self.items = items if getattr(items, "immutable", False) else list(items)
+        self.offset = 0
+        self._selected_path = None
+        self._render()
+
+    def append_items(self, items):
+        if not items:
+            return
+        self._own_items()
+        self.items.extend(items)
+        if self._window_end - self.offset < self.visible_rows + self.overscan:
+            self._render() # The new rows land inside the viewport
+        else:
+            self._update_scrollbar()
+
+    def insert_items_sorted(self, items, key):
+        """Insert items at their sorted position (self.items must already be sorted by key)."""
+        if items:
+            self._own_items()
+        for item in items:
+            self.items.insert(bisect.bisect_left(self.items, key(item), key=key), item)
+        if items:
+            self._render()
+
+    def remove_items(self, row_ids):
+        row_ids = set(row_ids)
+        if not row_ids:
+            return
+        self.items = [item for item in self.items if self.row_id(item) not in row_ids]
+        if self._selected_path in row_ids:
+            self._selected_path = None
+        self._render()
+
+    def _own_items(self):
+        if not isinstance(self.items, list):
+            self.items = list(self.items)
+
+    def selected_path(self):
+        return self._selected_path
+
+    # --- Rendering ---
+    def _render(self):
+        total = len(self.items)
+        self.offset = max(0, min(self.offset, total - self.visible_rows))
+        end = min(total, self.offset + self.visible_rows + self.overscan)
+        self._window_end = end
+
+        self.tree.delete(*self.tree.get_children())
+        for item in self.items[self.offset:end]:
+            self.tree.insert("", tk.END, iid=self.row_id(item), values=self.row_values(item))
+        self.tree.yview_moveto(0)
+        if self._selected_path is not None and self.tree.exists(self._selected_path):
+            self.tree.selection_set(self._selected_path)
+            self.tree.focus(self._selected_path)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.items)
+        if total <= self.visible_rows:
+            self.vsb.set(0.0, 1.0)
+        else:
+            self.vsb.set(self.offset / total, min(1.0, (self.offset + self.visible_rows) / total))
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), len(self.items) - self.visible_rows))
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+
+    def _scroll_rows(self, delta):
+        self.scroll_to(self.offset + delta)
+        return "break"
+
+    # --- Event handlers ---
+    def _on_configure(self, event):
+        try:
+            self.rowheight = int(ttk.Style().lookup("Treeview", "rowheight")) or 25
+        except (TypeError, ValueError, tk.TclError):
+            self.rowheight = 25
+        visible = max(1, event.height // self.rowheight - 1) # Minus the heading row
+        if visible != self.visible_rows:
+            self.visible_rows = visible
+            self._render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * len(self.items))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_to(self.offset + int(amount) * step)
+
+    def _on_mousewheel(self, event):
+        return self._scroll_rows(-3 if event.delta > 0 else 3)
+
+    def _on_press(self, event):
+        self._drag_start_y = event.y
+        self._drag_start_offset = self.offset
+
+    def _on_drag(self, event):
+        """Touch-style scrolling: drag the list with a finger."""
+        if self._drag_start_y is None:
+            return
+        rows = int((self._drag_start_y - event.y) / self.rowheight)
+        if rows:
+            self.scroll_to(self._drag_start_offset + rows)
+        return "break"
+
+    def _on_key_move(self, delta):
+        """Arrow/page keys move the selection through the whole list, scrolling as needed."""
+        if not self.items:
+            return "break"
+        current = self._selected_index()
+        if delta == "home":
+            target = 0
+        elif delta == "end":
+            target = len(self.items) - 1
+        else:
+            if delta in ("page", "-page"):
+                delta = self.visible_rows if delta == "page" else -self.visible_rows
+            target = 0 if current is None else current + delta
+        target = max(0, min(target, len(self.items) - 1))
+        if target < self.offset:
+            self.offset = target
+        elif target >= self.offset + self.visible_rows:
+            self.offset = target - self.visible_rows + 1
+        self._selected_path = self.row_id(self.items[target])
+        self._render()
+        self.tree.event_generate("<<TreeviewSelect>>")
+        return "break"
+
+    def _selected_index(self):
+        if self._selected_path is None:
+            return None
+        if self.tree.exists(self._selected_path):
+            return self.offset + self.tree.index(self._selected_path)
+        for index, item in enumerate(self.items):
+            if self.row_id(item) == self._selected_path:
+                return index
+        return None
+
+    def _remember_selection(self, event=None):
+        selection = self.tree.selection()
+        if selection:
+            self._selected_path = selection[0]